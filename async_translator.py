@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from translator_backend import iter_batches
+
+
+class RateLimiter:
+    """Giới hạn số request mỗi giây gửi tới một backend
+
+    Dùng threading.Lock nên một limiter được chia sẻ giữa nhiều event loop/thread
+    (batch runner dịch nhiều module song song trên cùng một backend).
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.interval = 1.0 / rate if rate else 0
+        self._next_time = 0
+        self._lock = threading.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_limiters_lock = threading.Lock()
+
+
+def shared_limiter(backend, rate):
+    """RateLimiter gắn với backend thật (bỏ qua lớp bọc như CachedTranslatorBackend)
+
+    Mọi bộ dịch dùng chung một backend với cùng rate dùng chung một limiter, nên tốc độ
+    thực tế không bị nhân lên theo số lần gọi hay số module chạy song song.
+    """
+    while getattr(backend, 'backend', None) is not None:
+        backend = backend.backend
+    with _limiters_lock:
+        limiters = backend.__dict__.setdefault('_rate_limiters', {})
+        if rate not in limiters:
+            limiters[rate] = RateLimiter(rate)
+        return limiters[rate]
+
+
+class AsyncBatchTranslator:
+    """Dịch theo lô với nhiều request song song bằng asyncio
+
+    - concurrency: số request tối đa đang chạy cùng lúc
+    - retries: số lần thử lại khi lỗi, chờ theo hàm mũ có jitter
+    - rate: số request tối đa mỗi giây tới backend (None = không giới hạn)
+    """
+
+    def __init__(self, backend, max_count=50, max_chars=4000, concurrency=4,
+                 retries=3, base_delay=0.5, max_delay=10, rate=None):
+        self.backend = backend
+        self.max_count = max_count
+        self.max_chars = max_chars
+        self.concurrency = concurrency
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate = rate
+        self.limiter = shared_limiter(backend, rate)
+
+    def translate_all(self, texts, src, dest, progress=None):
+        """Cùng giao diện với BatchTranslator.translate_all"""
+        return asyncio.run(self.translate_all_async(texts, src, dest, progress))
+
+    async def translate_all_async(self, texts, src, dest, progress=None):
+        unique_texts = list(dict.fromkeys(text for text in texts if text))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = self.limiter
+        translations = {}
+
+        async def _run(batch):
+            async with semaphore:
+                results = await self._translate_with_retry(batch, src, dest, limiter)
+            for text, translation in zip(batch, results):
+                if translation:
+                    translations[text] = translation
+            # Cập nhật tiến độ ngay khi mỗi lô xong, trong luồng event loop
+            if progress is not None:
+                progress(len(batch))
+
+        batches = iter_batches(unique_texts, self.max_count, self.max_chars)
+        await asyncio.gather(*(_run(batch) for batch in batches))
+        return translations
+
+    async def _translate_with_retry(self, batch, src, dest, limiter):
+        """Gửi một lô, thử lại với backoff hàm mũ + jitter; trả về [] nếu vẫn lỗi"""
+        for attempt in range(self.retries + 1):
+            await limiter.wait()
+            try:
+                return await self._call_backend(batch, src, dest)
+            except Exception as e:
+                if attempt >= self.retries:
+                    logging.error(f'Lỗi khi dịch lô {len(batch)} phần tử {src}->{dest}: {str(e)}')
+                    return []
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.5)
+                logging.warning(f'Thử lại lô {src}->{dest} sau {delay:.2f}s (lần {attempt + 1}): {str(e)}')
+                await asyncio.sleep(delay)
+        return []
+
+    async def _call_backend(self, batch, src, dest):
+        """Dùng translate_batch_async nếu backend có, nếu không chạy bản đồng bộ trong thread"""
+        translate_async = getattr(self.backend, 'translate_batch_async', None)
+        if translate_async is not None:
+            return await translate_async(batch, src, dest)
+        return await asyncio.to_thread(self.backend.translate_batch, batch, src, dest)
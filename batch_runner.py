@@ -0,0 +1,181 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from change_plan import ChangePlan
+from metrics import METRICS, echo
+from worker_pool import shared_pool
+
+# Các bước chạy cho mỗi module, theo thứ tự mặc định
+STEPS = ('validation', 'log_van_ban', 'format', 'replace')
+# File khai báo module Odoo (__openerp__.py là tên cũ trước Odoo 10)
+MANIFEST_NAMES = ('__manifest__.py', '__openerp__.py')
+
+
+def is_odoo_module(path):
+    return any((path / name).is_file() for name in MANIFEST_NAMES)
+
+
+class OdooModule:
+    """Một module Odoo tìm thấy trong addons path cùng các ngôn ngữ có file i18n/<lang>.po"""
+
+    __slots__ = ('name', 'path', 'languages')
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.name = self.path.name
+        self.languages = sorted(po_file.stem for po_file in (self.path / 'i18n').glob('*.po'))
+
+    def __repr__(self):
+        return f'OdooModule({self.name}, {self.languages})'
+
+
+def discover_modules(addons_paths, names=None):
+    """Tìm các module trong danh sách addons path (mỗi phần tử cũng có thể là một module)
+
+    Module trùng tên ở nhiều addons path chỉ lấy bản đầu tiên, giống thứ tự nạp của Odoo.
+    names: chỉ lấy các module có tên trong tập này.
+    """
+    seen = set()
+    modules = []
+    for addons_path in addons_paths:
+        addons_path = Path(addons_path)
+        if is_odoo_module(addons_path):
+            candidates = [addons_path]
+        elif addons_path.is_dir():
+            candidates = sorted(path for path in addons_path.iterdir()
+                                if path.is_dir() and not path.name.startswith('.'))
+        else:
+            logging.warning(f'Không tìm thấy addons path: {addons_path}')
+            continue
+        for path in candidates:
+            if path.name in seen or not is_odoo_module(path):
+                continue
+            if names is not None and path.name not in names:
+                continue
+            seen.add(path.name)
+            modules.append(OdooModule(path))
+    return modules
+
+
+class ModuleResult:
+    """Kết quả chạy các bước trên một module"""
+
+    __slots__ = ('module', 'plan', 'changed', 'errors')
+
+    def __init__(self, module):
+        self.module = module
+        # plan: các thay đổi của module (chỉ gộp khi dry_run, lúc file chưa bị ghi giữa các bước)
+        self.plan = ChangePlan()
+        # changed: bước -> số file thay đổi
+        self.changed = {}
+        self.errors = []
+
+
+class BatchRunner:
+    """Chạy các bot trên nhiều module và nhiều ngôn ngữ trong một tiến trình
+
+    - Các module được xử lý song song bằng module_jobs thread; trong mỗi module các bước
+      chạy tuần tự theo steps.
+    - Mọi bot dùng chung một pool jobs tiến trình (shared_pool), một backend dịch và một
+      bộ nhớ dịch, nên text đã dịch ở module này không phải dịch lại ở module khác.
+    - Bước replace dùng catalog source_lang (ngôn ngữ viết trong code), bước format chạy
+      cho mọi ngôn ngữ của module (hoặc chỉ các ngôn ngữ trong languages).
+    """
+
+    def __init__(self, modules, steps=STEPS, languages=None, source_lang='vi_VN', jobs=1,
+                 module_jobs=1, translator=None, memory=None, concurrency=1, rate=None,
+                 incremental=False, dry_run=False, use_index=False, glossary_files=(),
+                 builtin_glossary=True):
+        self.modules = list(modules)
+        self.steps = list(steps)
+        self.languages = set(languages) if languages else None
+        self.source_lang = source_lang
+        self.jobs = jobs
+        self.module_jobs = max(1, module_jobs)
+        self.translator = translator
+        self.memory = memory
+        self.concurrency = concurrency
+        self.rate = rate
+        self.incremental = incremental
+        self.dry_run = dry_run
+        self.use_index = use_index
+        # Bảng thuật ngữ của mỗi module: thuật ngữ có sẵn + i18n/glossary.csv + glossary_files
+        self.glossary_files = list(glossary_files)
+        self.builtin_glossary = builtin_glossary
+
+    def run(self):
+        """Chạy toàn bộ, trả về (ChangePlan gộp, danh sách ModuleResult theo thứ tự module)"""
+        if 'format' in self.steps and self.translator is None:
+            from translator_backend import GoogleTranslatorBackend
+            self.translator = GoogleTranslatorBackend()
+
+        echo(f"\nSố module: {len(self.modules)}")
+        with shared_pool(self.jobs):
+            with ThreadPoolExecutor(max_workers=self.module_jobs) as executor:
+                results = list(executor.map(self.run_module, self.modules))
+
+        plan = ChangePlan()
+        for result in results:
+            for path in plan.merge(result.plan):
+                logging.warning(f'Thay đổi của {path} trùng với module khác, bỏ qua')
+        METRICS.count('modules', len(results))
+        return plan, results
+
+    def run_module(self, module):
+        """Chạy lần lượt các bước trên một module"""
+        result = ModuleResult(module)
+        for step in self.steps:
+            try:
+                with METRICS.timer(step):
+                    plans = list(self._run_step(step, module))
+            except Exception as e:
+                logging.error(f'Lỗi khi chạy bước {step} trên module {module.name}: {str(e)}')
+                result.errors.append((step, str(e)))
+                continue
+            result.changed[step] = sum(len(step_plan) for step_plan in plans)
+            if self.dry_run:
+                # Mỗi bước lập kế hoạch trên nội dung gốc nên có thể gộp được
+                for step_plan in plans:
+                    for path in result.plan.merge(step_plan):
+                        logging.warning(f'Bước {step} sửa chồng lên thay đổi trước đó trong {path}, '
+                                        f'hãy chạy lại sau khi áp dụng')
+        echo(f"Module {module.name}: " + ', '.join(
+            f'{step} {count} file' for step, count in result.changed.items()))
+        return result
+
+    def _run_step(self, step, module):
+        """Chạy một bước, trả về các ChangePlan của bước đó"""
+        if step == 'validation':
+            from special_cases_bot import ValidationMessageBot
+            yield ValidationMessageBot(module.path, jobs=self.jobs, incremental=self.incremental,
+                                       dry_run=self.dry_run).process_files()
+        elif step == 'log_van_ban':
+            from i18n_log_van_ban_bot import I18nLogVanBanBot
+            for file_path in sorted(module.path.rglob('log_van_ban.py')):
+                yield I18nLogVanBanBot(module.path, dry_run=self.dry_run,
+                                       file_path=file_path).process_file()
+        elif step == 'format':
+            from glossary import Glossary
+            from translation_format_bot import TranslationFormatBot
+            glossary = Glossary.for_module(module.path, self.glossary_files, self.builtin_glossary)
+            for lang in self.module_languages(module):
+                bot = TranslationFormatBot(module.path, translator=self.translator, memory=self.memory,
+                                           concurrency=self.concurrency, rate=self.rate,
+                                           incremental=self.incremental, dry_run=self.dry_run,
+                                           lang=lang, glossary=glossary)
+                yield bot.format_and_translate()
+        elif step == 'replace':
+            if self.source_lang in module.languages:
+                from translation_replace_bot import TranslationReplaceBot
+                bot = TranslationReplaceBot(module.path, jobs=self.jobs, incremental=self.incremental,
+                                            dry_run=self.dry_run, use_index=self.use_index,
+                                            lang=self.source_lang)
+                yield bot.find_and_replace()
+        else:
+            raise ValueError(f'Bước không hợp lệ: {step}')
+
+    def module_languages(self, module):
+        if self.languages is None:
+            return module.languages
+        return [lang for lang in module.languages if lang in self.languages]
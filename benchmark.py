@@ -0,0 +1,386 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from change_plan import ChangePlan
+from i18n_log_van_ban_bot import I18nLogVanBanBot
+from po_catalog import POCatalog, po_escape
+from special_cases_bot import ValidationMessageBot
+from translation_format_bot import TranslationFormatBot
+from translation_name_bot import collect_files, process_file
+from translation_replace_bot import TranslationReplaceBot
+from translator_backend import FakeTranslatorBackend
+
+# Từ dùng để sinh text tiếng Việt / tiếng Anh giả lập
+VI_WORDS = ['văn', 'bản', 'đến', 'công', 'việc', 'người', 'xử', 'lý', 'hạn', 'ngày',
+            'trạng', 'thái', 'phòng', 'ban', 'duyệt', 'gửi', 'nhận', 'số', 'ký', 'hiệu']
+EN_WORDS = ['document', 'incoming', 'task', 'user', 'deadline', 'date', 'state',
+            'department', 'approve', 'send', 'receive', 'number', 'sign', 'code']
+
+
+class SyntheticModule:
+    """Sinh module Odoo giả lập với kích thước tuỳ chỉnh để đo hiệu năng các bot
+
+    - models: số file model, mỗi file có ValidationError, dict 'name' và text đã dịch trong catalog
+    - views: số file XML view
+    - entries: số phần tử trong i18n/vi_VN.po (có cả phần tử nhiều dòng và chưa dịch)
+    """
+
+    def __init__(self, models=50, views=20, entries=1000, fields_per_model=10, seed=0):
+        self.models = models
+        self.views = views
+        self.entries = entries
+        self.fields_per_model = fields_per_model
+        self.random = random.Random(seed)
+        self.pairs = []
+
+    def _phrase(self, words, index):
+        picked = self.random.sample(words, 3)
+        return f"{' '.join(picked)} {index}".capitalize()
+
+    def generate(self, module_path):
+        """Ghi module vào module_path, trả về module_path"""
+        module_path = Path(module_path)
+        (module_path / 'models' / 'action_van_ban_den').mkdir(parents=True, exist_ok=True)
+        (module_path / 'views').mkdir(exist_ok=True)
+        (module_path / 'i18n').mkdir(exist_ok=True)
+
+        # Cặp (msgid tiếng Anh, msgstr tiếng Việt) đã dịch, dùng lại trong code và view
+        self.pairs = [(self._phrase(EN_WORDS, i), self._phrase(VI_WORDS, i))
+                      for i in range(self.entries)]
+
+        (module_path / '__manifest__.py').write_text(
+            "{\n    'name': 'Synthetic',\n    'depends': ['base'],\n}\n", encoding='utf-8')
+        (module_path / '__init__.py').write_text('from . import models\n', encoding='utf-8')
+        for index in range(self.models):
+            (module_path / 'models' / f'model_{index}.py').write_text(
+                self._model_source(index), encoding='utf-8')
+        (module_path / 'models' / 'action_van_ban_den' / 'log_van_ban.py').write_text(
+            self._log_van_ban_source(), encoding='utf-8')
+        for index in range(self.views):
+            (module_path / 'views' / f'view_{index}.xml').write_text(
+                self._view_source(index), encoding='utf-8')
+        (module_path / 'i18n' / 'vi_VN.po').write_text(self._po_source(), encoding='utf-8')
+        return module_path
+
+    def _pick_pair(self):
+        return self.random.choice(self.pairs)
+
+    def _model_source(self, index):
+        lines = [
+            'from odoo import api, fields, models',
+            'from odoo.exceptions import ValidationError',
+            '',
+            '',
+            f'class Model{index}(models.Model):',
+            f"    _name = 'synthetic.model{index}'",
+            '',
+        ]
+        for field in range(self.fields_per_model):
+            lines.append(f"    field_{field} = fields.Char(string='{self._pick_pair()[1]}')")
+        lines += [
+            '',
+            "    @api.constrains('field_0')",
+            '    def _check_field(self):',
+            '        for record in self:',
+            '            if not record.field_0:',
+            f"                raise ValidationError('{self._phrase(VI_WORDS, index)}')",
+            '',
+            '    def action_open(self):',
+            '        return {',
+            f"            'name': '{self._pick_pair()[1]}',",
+            "            'type': 'ir.actions.act_window',",
+            f"            'res_model': 'synthetic.model{index}',",
+            '        }',
+            '',
+        ]
+        return '\n'.join(lines)
+
+    def _log_van_ban_source(self):
+        lines = ['from markupsafe import Markup', '', '', 'def log(record):']
+        for index in range(self.models):
+            vi_text = self._phrase(VI_WORDS, index)
+            lines += [
+                f"    record.message_post(body=Markup(f'<b>{vi_text}:</b> {{record.name}}'))",
+                f"    record.notify(title='{vi_text}', message='{self._pick_pair()[1]}')",
+            ]
+        return '\n'.join(lines) + '\n'
+
+    def _view_source(self, index):
+        lines = ['<?xml version="1.0" encoding="utf-8"?>', '<odoo>']
+        for record in range(self.fields_per_model):
+            en_text, vi_text = self._pick_pair()
+            lines += [
+                f'    <record id="view_{index}_{record}" model="ir.ui.view">',
+                f'        <field name="name">synthetic.view.{index}.{record}</field>',
+                '        <field name="arch" type="xml">',
+                f'            <form string="{vi_text}">',
+                f'                <p>{self._pick_pair()[1]}</p>',
+                f'                <field name="field_{record}" placeholder="{en_text}"/>',
+                '            </form>',
+                '        </field>',
+                '    </record>',
+            ]
+        lines.append('</odoo>')
+        return '\n'.join(lines) + '\n'
+
+    def _po_source(self):
+        lines = [
+            'msgid ""',
+            'msgstr ""',
+            '"Content-Type: text/plain; charset=UTF-8\\n"',
+            '"Language: vi_VN\\n"',
+            '',
+        ]
+        for index, (msgid, msgstr) in enumerate(self.pairs):
+            lines.append('#. module: synthetic')
+            lines.append(f'#: model:ir.model.fields,field_description:synthetic.field_{index}')
+            if index % 10 == 3:
+                # Phần tử chưa dịch (msgid tiếng Việt) cho TranslationFormatBot
+                msgid, msgstr = msgstr, ''
+            elif index % 10 == 7:
+                # Phần tử chưa dịch (msgid tiếng Anh)
+                msgstr = ''
+            if index % 10 == 5:
+                # Phần tử nhiều dòng
+                lines += ['msgid ""', f'"{po_escape(msgid)}\\n"', f'"{po_escape(msgid)}"',
+                          'msgstr ""', f'"{po_escape(msgstr)}\\n"', f'"{po_escape(msgstr)}"']
+            else:
+                lines += [f'msgid "{po_escape(msgid)}"', f'msgstr "{po_escape(msgstr)}"']
+            lines.append('')
+        return '\n'.join(lines)
+
+
+def _run_name_bot(module_path):
+    """Chạy translation_name_bot như main() nhưng với module_path tuỳ chọn"""
+    plan = ChangePlan()
+    for file_path in collect_files(module_path):
+        plan.add(process_file(file_path))
+    plan.apply()
+    return plan
+
+
+def _count_module_files(module_path):
+    return sum(1 for path in Path(module_path).rglob('*') if path.is_file())
+
+
+def _count_catalog_entries(module_path):
+    return len(POCatalog(Path(module_path) / 'i18n' / 'vi_VN.po'))
+
+
+# Tên benchmark -> hàm chạy bot trên một bản sao module
+BENCHMARKS = {
+    'translation_replace': lambda path: TranslationReplaceBot(path).find_and_replace(),
+    'translation_format': lambda path: TranslationFormatBot(
+        path, translator=FakeTranslatorBackend()).format_and_translate(),
+    'validation_message': lambda path: ValidationMessageBot(path).process_files(),
+    'translation_name': _run_name_bot,
+    'i18n_log_van_ban': lambda path: I18nLogVanBanBot(path).process_file(),
+}
+
+
+# Lệnh con của cli.py được đo thời gian import khi khởi động
+STARTUP_COMMANDS = ('replace', 'validation', 'log-van-ban', 'name', 'pipeline', 'coverage',
+                    'format', 'batch')
+
+
+def _import_time_ms(output):
+    """Tổng thời gian import (ms) từ output của python -X importtime (chỉ cộng các import cấp ngoài cùng)"""
+    total = 0
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # Import cấp ngoài cùng có đúng một khoảng trắng trước tên module
+        if not parts[2].startswith('  '):
+            total += int(parts[1])
+    return total / 1000
+
+
+def measure_startup(command, repeat=3):
+    """Thời gian import (ms, lần nhanh nhất) của `python cli.py <command> --help`"""
+    cli_path = Path(__file__).with_name('cli.py')
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', str(cli_path), command, '--help'],
+            capture_output=True, text=True, cwd=cli_path.parent,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f'cli.py {command} --help lỗi: {result.stderr.strip().splitlines()[-1:]}')
+        milliseconds = _import_time_ms(result.stderr)
+        best = milliseconds if best is None else min(best, milliseconds)
+    return best
+
+
+def _run_once(func, template_path, work_dir, trace_memory=False):
+    """Chạy func trên một bản sao mới của module mẫu, trả về (giây, bộ nhớ đỉnh)"""
+    module_path = Path(work_dir) / 'module'
+    if module_path.exists():
+        shutil.rmtree(module_path)
+    shutil.copytree(template_path, module_path)
+
+    # Bỏ output từng dòng của bot để không đo thời gian in ra màn hình
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            func(module_path)
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = None
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+    return elapsed, peak
+
+
+def run_benchmarks(generator, names=None, repeat=3):
+    """Sinh module rồi đo từng bot, trả về dict kết quả (ghi được ra JSON)
+
+    Thời gian lấy lần chạy nhanh nhất trong repeat lần; bộ nhớ đỉnh đo ở một lần chạy riêng
+    bằng tracemalloc vì tracemalloc làm chậm đáng kể.
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='odoo_bench_') as work_dir:
+        template_path = generator.generate(Path(work_dir) / 'template')
+        files = _count_module_files(template_path)
+        entries = _count_catalog_entries(template_path)
+
+        for name in names:
+            func = BENCHMARKS[name]
+            seconds = min(_run_once(func, template_path, work_dir)[0] for _ in range(repeat))
+            peak = _run_once(func, template_path, work_dir, trace_memory=True)[1]
+            results.append({
+                'name': name,
+                'seconds': round(seconds, 6),
+                'files': files,
+                'entries': entries,
+                'files_per_second': round(files / seconds, 2) if seconds else None,
+                'entries_per_second': round(entries / seconds, 2) if seconds else None,
+                'peak_memory_bytes': peak,
+            })
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'models': generator.models,
+            'views': generator.views,
+            'entries': generator.entries,
+            'fields_per_model': generator.fields_per_model,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare_results(report, baseline, threshold=0.10):
+    """So sánh với lần chạy trước, trả về danh sách (tên, tỉ lệ thời gian) chậm hơn threshold"""
+    previous = {result['name']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        old = previous.get(result['name'])
+        if not old or not old.get('seconds'):
+            continue
+        ratio = result['seconds'] / old['seconds']
+        result['baseline_ratio'] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append((result['name'], ratio))
+    return regressions
+
+
+def print_report(report, stream=None):
+    stream = stream or sys.stdout
+    config = report['config']
+    stream.write(f"Module: {config['models']} models, {config['views']} views, "
+                 f"{config['entries']} entries\n")
+    stream.write(f"{'Bot':<22}{'Giây':>10}{'File/s':>12}{'Entry/s':>12}{'Bộ nhớ (KiB)':>15}"
+                 f"{'So với trước':>14}\n")
+    for result in report['results']:
+        peak = result['peak_memory_bytes']
+        ratio = result.get('baseline_ratio')
+        stream.write(
+            f"{result['name']:<22}{result['seconds']:>10.3f}{result['files_per_second'] or 0:>12.1f}"
+            f"{result['entries_per_second'] or 0:>12.1f}"
+            f"{(peak or 0) / 1024:>15.1f}{(f'x{ratio:.2f}' if ratio else '-'):>14}\n"
+        )
+    if report.get('startup_ms'):
+        stream.write(f"\n{'Lệnh cli.py':<22}{'Import (ms)':>12}\n")
+        for command, milliseconds in report['startup_ms'].items():
+            stream.write(f'{command:<22}{milliseconds:>12.1f}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Đo hiệu năng các bot trên module Odoo giả lập')
+    parser.add_argument('--models', type=int, default=50, help='Số file model')
+    parser.add_argument('--views', type=int, default=20, help='Số file XML view')
+    parser.add_argument('--entries', type=int, default=1000, help='Số phần tử trong vi_VN.po')
+    parser.add_argument('--fields', type=int, default=10, help='Số field/record mỗi model/view')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Số lần chạy, lấy lần nhanh nhất')
+    parser.add_argument('--bots', default=','.join(BENCHMARKS),
+                        help=f'Các bot cần đo (mặc định: {",".join(BENCHMARKS)})')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='File JSON lưu kết quả')
+    parser.add_argument('--baseline', help='File JSON của lần chạy trước để so sánh')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Tỉ lệ chậm hơn baseline bị coi là regression (mặc định 0.10)')
+    parser.add_argument('--startup-budget', type=float, default=100.0, metavar='MS',
+                        help='Thời gian import tối đa (ms) khi khởi động mỗi lệnh của cli.py; '
+                             '0 để bỏ qua (mặc định 100)')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.bots.split(',') if name.strip()]
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f'Bot không hợp lệ: {name}')
+
+    generator = SyntheticModule(args.models, args.views, args.entries, args.fields, args.seed)
+    report = run_benchmarks(generator, names, args.repeat)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_results(report, json.load(f), args.threshold)
+
+    # Chi phí khởi động: chỉ import, không chạy bot
+    over_budget = []
+    if args.startup_budget:
+        report['startup_ms'] = {command: round(measure_startup(command, args.repeat), 3)
+                                for command in STARTUP_COMMANDS}
+        over_budget = [(command, ms) for command, ms in report['startup_ms'].items()
+                       if ms > args.startup_budget]
+
+    print_report(report)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'Đã lưu kết quả vào {args.output}')
+
+    for name, ratio in regressions:
+        print(f'Chậm hơn baseline: {name} (x{ratio:.2f})')
+    for command, milliseconds in over_budget:
+        print(f'Khởi động chậm: cli.py {command} import mất {milliseconds:.1f} ms '
+              f'(giới hạn {args.startup_budget:g} ms)')
+    return 1 if regressions or over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import hashlib
+import os
+from pathlib import Path
+
+# Thư mục cache của các bot, nằm ngoài module đang dịch để không để lại file lạ trong addon
+CACHE_DIR = Path(os.environ.get('ODOO_I18N_CACHE', Path.home() / '.cache' / 'odoo_i18n_bot'))
+
+
+def cache_path(kind, source_path, suffix=''):
+    """Đường dẫn file cache loại kind cho source_path (file hoặc thư mục module)
+
+    Khoá theo đường dẫn thật nên cùng một module/catalog luôn dùng chung một file cache,
+    dù được truyền bằng đường dẫn tương đối hay qua symlink. Thư mục cha được tạo sẵn.
+    """
+    real_path = os.path.realpath(source_path)
+    digest = hashlib.sha1(real_path.encode('utf-8')).hexdigest()[:16]
+    path = CACHE_DIR / kind / f'{os.path.basename(real_path)}-{digest}{suffix}'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,255 @@
+import difflib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from metrics import METRICS
+
+
+def temp_path_for(path):
+    """Tạo file tạm rỗng để ghi nội dung mới, đặt cạnh file thật (đi theo symlink); trả về đường dẫn
+
+    Tên do mkstemp sinh nên không đè lên file có sẵn của người dùng, và hai lần chạy
+    song song trên cùng một cây thư mục không dùng chung file tạm.
+    """
+    target = os.path.realpath(path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(target), prefix=f'.{os.path.basename(target)}.', suffix='.tmp'
+    )
+    os.close(fd)
+    return tmp_path
+
+
+def replace_file(tmp_path, path):
+    """Thay path bằng tmp_path một cách nguyên tử
+
+    Ghi vào file thật mà symlink trỏ tới (symlink giữ nguyên) và giữ quyền của file gốc.
+    """
+    target = os.path.realpath(path)
+    if os.path.exists(target):
+        shutil.copymode(target, tmp_path)
+    os.replace(tmp_path, target)
+
+
+class SpanEdit:
+    """Thay đoạn [start, end) của nội dung gốc bằng text"""
+
+    __slots__ = ('start', 'end', 'text')
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def to_dict(self):
+        return {'start': self.start, 'end': self.end, 'text': self.text}
+
+
+class FileChange:
+    """Các thay đổi dự kiến cho một file
+
+    mtime_ns/size ghi lại trạng thái file lúc lập kế hoạch để phát hiện file bị sửa
+    trước khi áp dụng. newline là chế độ đọc file ('' = giữ nguyên, None = chuẩn hoá)
+    để offset của các SpanEdit khớp khi áp dụng.
+    """
+
+    __slots__ = ('path', 'edits', 'mtime_ns', 'size', 'newline', 'notes')
+
+    def __init__(self, path, edits, newline=None, notes=None):
+        stat = os.stat(path)
+        self.path = str(path)
+        self.edits = sorted(edits, key=lambda edit: edit.start)
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.newline = newline
+        self.notes = list(notes or [])
+
+    @classmethod
+    def from_contents(cls, path, content, new_content, newline=None, notes=None):
+        """Lập thay đổi từ nội dung cũ và mới; trả về None nếu không có gì khác"""
+        if content == new_content:
+            return None
+        return cls(path, compute_edits(content, new_content), newline, notes)
+
+    def apply_to(self, content):
+        """Áp dụng các edit lên nội dung trong bộ nhớ"""
+        parts = []
+        position = 0
+        for edit in self.edits:
+            parts.append(content[position:edit.start])
+            parts.append(edit.text)
+            position = edit.end
+        parts.append(content[position:])
+        return ''.join(parts)
+
+    def read_original(self):
+        with open(self.path, 'r', encoding='utf-8', newline=self.newline) as f:
+            return f.read()
+
+    def is_stale(self):
+        """File đã bị sửa sau khi lập kế hoạch"""
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns != self.mtime_ns or stat.st_size != self.size
+
+    def apply(self):
+        """Ghi file mới vào file tạm rồi đổi tên (nguyên tử), đọc/ghi theo từng đoạn"""
+        if self.is_stale():
+            raise RuntimeError(f'File {self.path} đã thay đổi sau khi lập kế hoạch')
+        tmp_path = temp_path_for(self.path)
+        try:
+            with open(self.path, 'r', encoding='utf-8', newline=self.newline) as reader, \
+                    open(tmp_path, 'w', encoding='utf-8', newline=self.newline) as writer:
+                position = 0
+                for edit in self.edits:
+                    _copy(reader, writer, edit.start - position)
+                    reader.read(edit.end - edit.start)
+                    writer.write(edit.text)
+                    position = edit.end
+                _copy(reader, writer, None)
+            replace_file(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def unified_diff(self):
+        content = self.read_original()
+        return difflib.unified_diff(
+            content.splitlines(keepends=True),
+            self.apply_to(content).splitlines(keepends=True),
+            fromfile=f'a/{self.path}',
+            tofile=f'b/{self.path}',
+        )
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'mtime_ns': self.mtime_ns,
+            'size': self.size,
+            'notes': self.notes,
+            'edits': [edit.to_dict() for edit in self.edits],
+        }
+
+
+def _copy(reader, writer, count, chunk_size=1 << 16):
+    """Chép count ký tự (None = tới hết file) từ reader sang writer"""
+    while count is None or count > 0:
+        size = chunk_size if count is None else min(chunk_size, count)
+        chunk = reader.read(size)
+        if not chunk:
+            return
+        writer.write(chunk)
+        if count is not None:
+            count -= len(chunk)
+
+
+def _overlaps(edits):
+    edits = sorted(edits, key=lambda edit: (edit.start, edit.end))
+    return any(previous.end > edit.start or previous.start == edit.start
+               for previous, edit in zip(edits, edits[1:]))
+
+
+def compute_edits(content, new_content):
+    """So sánh theo dòng, trả về các SpanEdit biến content thành new_content"""
+    old_lines = content.splitlines(keepends=True)
+    new_lines = new_content.splitlines(keepends=True)
+    line_offsets = [0]
+    for line in old_lines:
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    edits = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            edits.append(SpanEdit(line_offsets[i1], line_offsets[i2], ''.join(new_lines[j1:j2])))
+    return edits
+
+
+class ChangePlan:
+    """Kế hoạch thay đổi của một lần chạy bot: file -> danh sách SpanEdit"""
+
+    def __init__(self):
+        # Khoá theo đường dẫn thật: symlink và file nó trỏ tới chỉ được sửa một lần
+        self.changes = {}
+
+    def add(self, change):
+        if change is not None and change.edits:
+            key = os.path.realpath(change.path)
+            current = self.changes.get(key)
+            if current is None or current.path == change.path:
+                self.changes[key] = change
+        return change
+
+    def merge(self, other):
+        """Gộp kế hoạch khác (lập trên cùng nội dung gốc) vào kế hoạch này
+
+        File có mặt ở cả hai được gộp edit nếu cùng chế độ đọc và không chồng lấn;
+        nếu không, giữ thay đổi đã có và trả về đường dẫn file đó trong danh sách xung đột.
+        """
+        conflicts = []
+        for change in other:
+            current = self.changes.get(os.path.realpath(change.path))
+            if current is None:
+                self.add(change)
+            elif current.newline != change.newline or _overlaps(current.edits + change.edits):
+                conflicts.append(change.path)
+            else:
+                current.edits = sorted(current.edits + change.edits, key=lambda edit: edit.start)
+                current.notes.extend(change.notes)
+        return conflicts
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __iter__(self):
+        return iter(self.changes[path] for path in sorted(self.changes))
+
+    def apply(self):
+        """Áp dụng tất cả thay đổi, mỗi file ghi nguyên tử; trả về danh sách file lỗi"""
+        failed = []
+        with METRICS.timer('write'):
+            for change in self:
+                try:
+                    change.apply()
+                    METRICS.count('files_written')
+                except Exception as e:
+                    failed.append((change.path, str(e)))
+        return failed
+
+    def write_diff(self, stream=None):
+        stream = stream or sys.stdout
+        for change in self:
+            stream.writelines(change.unified_diff())
+
+    def to_json(self):
+        return json.dumps([change.to_dict() for change in self], ensure_ascii=False, indent=2)
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+
+def add_plan_arguments(parser):
+    """Thêm các tuỳ chọn xem trước thay đổi dùng chung cho các script"""
+    parser.add_argument('--diff', action='store_true',
+                        help='Chỉ in unified diff các thay đổi, không ghi file')
+    parser.add_argument('--plan-json', metavar='FILE',
+                        help='Ghi kế hoạch thay đổi ra file JSON, không ghi file nguồn')
+    return parser
+
+
+def is_dry_run(args):
+    return bool(args.diff or args.plan_json)
+
+
+def report_plan(plan, args):
+    """In/ghi kế hoạch theo tuỳ chọn dòng lệnh; trả về mã thoát (1 nếu có thay đổi)"""
+    if args.diff:
+        plan.write_diff()
+    if args.plan_json:
+        plan.write_json(args.plan_json)
+    return 1 if plan else 0
@@ -0,0 +1,35 @@
+# Kích thước mỗi lần đọc (ký tự); bộ nhớ dùng khi quét một file ~ CHUNK_SIZE + overlap
+CHUNK_SIZE = 1 << 20
+
+
+def finditer_file(pattern, file_path, overlap, chunk_size=CHUNK_SIZE, newline=None):
+    """Như pattern.finditer(nội dung file) nhưng chỉ giữ một cửa sổ chunk_size + overlap ký tự
+
+    Trả về (offset, match): vị trí trong file của match là offset + match.start().
+    Cửa sổ sau giữ lại overlap ký tự cuối của cửa sổ trước để bắt các match nằm vắt qua
+    ranh giới; match dài hơn overlap mà rơi đúng ranh giới có thể bị bỏ sót.
+    Offset tính theo ký tự khi đọc với chế độ newline, khớp với SpanEdit/FileChange.
+    """
+    offset = 0
+    buffer = ''
+    with open(file_path, 'r', encoding='utf-8', newline=newline) as reader:
+        while True:
+            chunk = reader.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            # Chỉ nhận match bắt đầu trước limit: match (dài tối đa overlap) chắc chắn nằm trọn
+            limit = len(buffer) if eof else len(buffer) - overlap
+            position = 0
+            if limit > 0:
+                for match in pattern.finditer(buffer):
+                    if match.start() >= limit:
+                        break
+                    yield offset, match
+                    position = match.end()
+            if eof:
+                return
+            # Quét tiếp từ sau match cuối cùng hoặc từ đầu phần chồng lấn
+            cut = max(position, limit, 0)
+            buffer = buffer[cut:]
+            offset += cut
+
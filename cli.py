@@ -0,0 +1,48 @@
+import runpy
+import sys
+
+# Lệnh con -> (module chạy, mô tả). Module chỉ được import khi lệnh con của nó chạy,
+# nên các bot regex không phải trả chi phí import của bot dịch (googletrans, langdetect, ...).
+COMMANDS = {
+    'replace': ('run_bot', 'Thay text tiếng Việt trong code bằng msgid của catalog'),
+    'format': ('run_format_bot', 'Định dạng lại và dịch file PO'),
+    'validation': ('run_special_cases_bot', 'Bọc thông báo ValidationError bằng _()'),
+    'log-van-ban': ('run_i18n_bot', 'Bọc text tiếng Việt trong log_van_ban.py bằng _()'),
+    'name': ('translation_name_bot', 'Bọc các dict name/string bằng _()'),
+    'pipeline': ('run_pipeline', 'Chạy nhiều bước viết lại code trong một lần đọc file'),
+    'watch': ('run_watch', 'Theo dõi module, tự chạy các bước viết lại khi lưu file'),
+    'batch': ('run_batch', 'Chạy các bot trên nhiều module, nhiều ngôn ngữ'),
+    'coverage': ('run_coverage', 'Báo cáo độ phủ bản dịch của catalog so với code'),
+    'index': ('string_index', 'Cập nhật/tra cứu chỉ mục chuỗi của module'),
+    'bench': ('benchmark', 'Đo hiệu năng các bot trên module giả lập'),
+}
+
+
+def print_usage(stream=None):
+    stream = stream or sys.stdout
+    stream.write('Cách dùng: python cli.py <lệnh> [tuỳ chọn]\n\nCác lệnh:\n')
+    for name, (module_name, description) in COMMANDS.items():
+        stream.write(f'  {name:<14}{description}\n')
+    stream.write('\nXem tuỳ chọn của từng lệnh: python cli.py <lệnh> --help\n')
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print_usage()
+        return 0 if argv else 2
+    command = argv[0]
+    if command not in COMMANDS:
+        sys.stderr.write(f'Lệnh không hợp lệ: {command}\n\n')
+        print_usage(sys.stderr)
+        return 2
+
+    # Chạy module như khi gọi trực tiếp `python <module>.py ...`
+    module_name = COMMANDS[command][0]
+    sys.argv = [f'{module_name}.py', *argv[1:]]
+    runpy.run_module(module_name, run_name='__main__', alter_sys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+import mmap
+import os
+import re
+from pathlib import Path
+from stat import S_ISREG
+
+from replace_engine import build_trie_pattern
+
+# Luật bỏ qua mặc định (cú pháp .gitignore, tính từ thư mục module)
+DEFAULT_IGNORE = (
+    '.*/',            # .git, .hg, .venv, .idea, ...
+    '__pycache__/',
+    'node_modules/',
+    'static/lib/',    # thư viện JS/CSS bên thứ ba của module Odoo
+    '*.bak',
+    '*.pyc',
+    '*.tmp',
+)
+# File luật bỏ qua được đọc ở mọi cấp thư mục; .i18nignore dành riêng cho các bot
+IGNORE_FILE_NAMES = ('.gitignore', '.i18nignore')
+
+# Byte UTF-8 của chữ có dấu tiếng Việt: Latin-1/Latin Extended-A/B (á, ă, đ, ơ, ư, ĩ, ũ...),
+# Latin Extended Additional (ạ..ỹ) và dấu tổ hợp (văn bản dạng NFD)
+VIETNAMESE_BYTES = rb'[\xc3-\xc6][\x80-\xbf]|\xe1[\xba\xbb][\x80-\xbf]|\xcc[\x80-\xa3]'
+
+# File nhỏ hơn ngưỡng này được đọc thẳng, lớn hơn thì dùng mmap
+MMAP_THRESHOLD = 1 << 16
+
+
+def _translate_pattern(pattern):
+    """Chuyển một pattern dạng .gitignore (đã bỏ '!' và '/' cuối) thành regex trên đường dẫn tương đối"""
+    # Pattern có '/' ở đầu hoặc giữa được neo vào thư mục chứa file luật
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and pattern.find(']', i + 1) != -1:
+            end = pattern.find(']', i + 1)
+            chars = pattern[i + 1:end]
+            if chars.startswith('!'):
+                chars = '^' + chars[1:]
+            parts.append('[' + chars.replace('\\', '\\\\') + ']')
+            i = end + 1
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    prefix = '' if anchored else '(?:.*/)?'
+    return re.compile(prefix + ''.join(parts) + '$')
+
+
+class IgnoreRules:
+    """Tập luật bỏ qua dạng .gitignore gắn với thư mục base
+
+    Hỗ trợ comment, '!' (giữ lại), '/' cuối (chỉ thư mục), '/' đầu (neo), '*', '?', '**', [...].
+    Giống git, thư mục đã bị bỏ qua thì không duyệt vào nên '!' không giữ lại được file bên trong.
+    """
+
+    def __init__(self, base, patterns):
+        self.base = os.path.abspath(base)
+        self.rules = []
+        for pattern in patterns:
+            pattern = pattern.rstrip('\n').rstrip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            negate = pattern.startswith('!')
+            if negate:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            if pattern:
+                self.rules.append((_translate_pattern(pattern), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return cls(os.path.dirname(os.path.abspath(path)), f)
+
+    def match(self, path, is_dir):
+        """True nếu bị bỏ qua, False nếu được giữ lại bằng '!', None nếu không luật nào khớp"""
+        if not path.startswith(self.base + os.sep):
+            return None
+        relative = path[len(self.base) + 1:]
+        if os.sep != '/':
+            relative = relative.replace(os.sep, '/')
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative):
+                result = not negate
+        return result
+
+
+# Luật đã đọc: đường dẫn file luật -> ((mtime_ns, size), IgnoreRules); chỉ đọc lại khi file đổi
+_RULES_CACHE = {}
+
+
+def _load_rules(path, stat):
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _RULES_CACHE.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, IgnoreRules.from_file(path))
+        _RULES_CACHE[path] = cached
+    return cached[1]
+
+
+def _is_ignored(rule_sets, path, is_dir):
+    # Luật khớp sau cùng quyết định; file luật ở thư mục sâu hơn được xét sau
+    ignored = False
+    for rules in rule_sets:
+        result = rules.match(path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def _parent_rule_sets(root):
+    """Luật .gitignore của các thư mục cha, tới thư mục gốc của repo git chứa module"""
+    rule_sets = []
+    directory = os.path.dirname(root)
+    while True:
+        path = os.path.join(directory, '.gitignore')
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        if stat is not None and S_ISREG(stat.st_mode):
+            rule_sets.append(_load_rules(path, stat))
+        parent = os.path.dirname(directory)
+        if os.path.isdir(os.path.join(directory, '.git')) or parent == directory:
+            break
+        directory = parent
+    rule_sets.reverse()
+    return rule_sets
+
+
+def walk_files(root, extensions=None, ignore=(), use_ignore_files=True):
+    """Duyệt các file trong root bằng os.scandir, bỏ qua theo luật, thứ tự ổn định như os.walk đã sort
+
+    - extensions: chỉ lấy file có đuôi trong tập này (None = mọi file); lọc trên tên file
+      trước khi tạo Path
+    - ignore: luật bỏ qua thêm (cú pháp .gitignore, tính từ root), cộng với DEFAULT_IGNORE
+    - use_ignore_files: đọc .gitignore/.i18nignore trong root, các thư mục con và thư mục cha
+    Đường dẫn trả về bắt đầu bằng root như khi truyền vào (giống os.walk).
+    """
+    for entry in walk_entries(root, extensions, ignore, use_ignore_files):
+        yield Path(entry.path)
+
+
+def walk_entries(root, extensions=None, ignore=(), use_ignore_files=True):
+    """Như walk_files nhưng trả về os.DirEntry, để dùng lại entry.stat() thay vì gọi os.stat
+
+    File luật đã đọc được giữ lại giữa các lần duyệt, chỉ đọc lại khi mtime/size đổi.
+    """
+    root = os.fspath(root)
+    absolute_root = os.path.abspath(root)
+    rule_sets = _parent_rule_sets(absolute_root) if use_ignore_files else []
+    rule_sets.append(IgnoreRules(absolute_root, DEFAULT_IGNORE + tuple(ignore)))
+    extensions = frozenset(extensions) if extensions is not None else None
+    return _walk(root, absolute_root, rule_sets, extensions, use_ignore_files)
+
+
+def _walk(directory, absolute_directory, rule_sets, extensions, use_ignore_files):
+    try:
+        with os.scandir(directory) as iterator:
+            entries = list(iterator)
+    except OSError:
+        return
+    if use_ignore_files:
+        # File luật lấy từ kết quả scandir, không stat thêm cho thư mục không có file luật
+        rule_entries = {entry.name: entry for entry in entries if entry.name in IGNORE_FILE_NAMES}
+        for name in IGNORE_FILE_NAMES:
+            entry = rule_entries.get(name)
+            try:
+                if entry is not None and entry.is_file():
+                    path = os.path.join(absolute_directory, name)
+                    rule_sets = rule_sets + [_load_rules(path, entry.stat())]
+            except OSError:
+                continue
+
+    files = []
+    dirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if not is_dir and extensions is not None and os.path.splitext(entry.name)[1] not in extensions:
+            continue
+        # Giống os.walk mặc định: không đi theo symlink thư mục
+        if is_dir and entry.is_symlink():
+            continue
+        if _is_ignored(rule_sets, os.path.join(absolute_directory, entry.name), is_dir):
+            continue
+        (dirs if is_dir else files).append(entry)
+
+    yield from sorted(files, key=lambda entry: entry.name)
+    for entry in sorted(dirs, key=lambda entry: entry.name):
+        yield from _walk(entry.path, os.path.join(absolute_directory, entry.name), rule_sets,
+                         extensions, use_ignore_files)
+
+
+class BytePrefilter:
+    """Loại nhanh các file chắc chắn không khớp bằng cách tìm trên byte thô, không giải mã UTF-8
+
+    File có chứa ít nhất một chuỗi trong needles (hoặc khớp một regex byte trong patterns)
+    mới được bot đọc và xử lý. Không có needles/patterns nào thì nhận mọi file.
+    """
+
+    def __init__(self, needles=(), patterns=()):
+        parts = []
+        # Gộp các chuỗi thành regex dạng trie rồi mã hoá UTF-8 (trie chỉ gồm literal và nhóm)
+        trie = build_trie_pattern(needles)
+        if trie:
+            parts.append(trie.encode('utf-8'))
+        parts.extend(patterns)
+        self.pattern = re.compile(b'|'.join(parts)) if parts else None
+
+    def __bool__(self):
+        return self.pattern is not None
+
+    def __call__(self, path):
+        if self.pattern is None:
+            return True
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return False
+                if size < MMAP_THRESHOLD:
+                    return self.pattern.search(f.read()) is not None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return self.pattern.search(data) is not None
+        except (OSError, ValueError):
+            # Không đọc được: để bot xử lý và ghi lỗi như bình thường
+            return True
+
+    def filter(self, paths):
+        return [path for path in paths if self(path)]
@@ -0,0 +1,193 @@
+import csv
+import logging
+import re
+import unicodedata
+from pathlib import Path
+
+from patterns import PATTERNS
+from replace_engine import build_trie_pattern
+
+# File thuật ngữ riêng của module: i18n/glossary.csv, dòng đầu là mã ngôn ngữ (vi,en,...)
+GLOSSARY_FILE_NAME = 'glossary.csv'
+
+# Thuật ngữ quản lý văn bản dùng chung (vi, en); cụm dài được ưu tiên hơn cụm ngắn
+DEFAULT_TERMS = (
+    ('văn bản', 'document'),
+    ('văn bản đến', 'incoming document'),
+    ('văn bản đi', 'outgoing document'),
+    ('văn bản nội bộ', 'internal document'),
+    ('sổ văn bản', 'document register'),
+    ('sổ văn bản đến', 'incoming document register'),
+    ('sổ văn bản đi', 'outgoing document register'),
+    ('loại văn bản', 'document type'),
+    ('số ký hiệu', 'reference number'),
+    ('trích yếu', 'summary'),
+    ('cơ quan ban hành', 'issuing authority'),
+    ('ngày ban hành', 'issue date'),
+    ('ngày đến', 'arrival date'),
+    ('hạn xử lý', 'processing deadline'),
+    ('độ khẩn', 'urgency'),
+    ('độ mật', 'confidentiality level'),
+    ('phòng ban', 'department'),
+    ('người ký', 'signer'),
+    ('người xử lý', 'handler'),
+    ('nơi nhận', 'recipients'),
+    ('tệp đính kèm', 'attachments'),
+    ('dự thảo', 'draft'),
+)
+
+# Các token không được dịch: thẻ HTML, %s/%(name)s, {field}/{{ expr }}, số thứ tự 1. hoặc 1/2.
+_PROTECTED_PATTERN = PATTERNS.compile(
+    'glossary.protected',
+    r'<[^<>]+>'
+    r'|%\([^)]+\)[-#0 +]*\d*(?:\.\d+)?[a-zA-Z]'
+    r'|%[-#0+]*\d*(?:\.\d+)?[sdifrxXeEgGc%]'
+    r'|\{\{[^{}]*\}\}|\{[^{}\s]*\}'
+    r'|\d+(?:/\d+)?\.(?!\d)'
+)
+# Token bị che được thay bằng ⟦số thứ tự⟧; dịch vụ dịch có thể chèn thêm khoảng trắng
+_PLACEHOLDER = '⟦{}⟧'
+_PLACEHOLDER_PATTERN = PATTERNS.compile('glossary.placeholder', r'⟦\s*(\d+)\s*⟧')
+# Phần xen giữa các thuật ngữ khi dịch offline: chỉ gồm dấu câu, khoảng trắng và token bị che
+_GAP_PATTERN = PATTERNS.compile('glossary.gap', r'(?:⟦\d+⟧|[^\w])*')
+
+
+class MaskedText:
+    """Text đã che các token không được dịch, dùng để gửi đi dịch rồi khôi phục lại"""
+
+    __slots__ = ('text', 'tokens')
+
+    def __init__(self, text, tokens):
+        self.text = text
+        self.tokens = tokens
+
+    def unmask(self, translation):
+        """Trả các token về bản dịch, None nếu bản dịch làm mất hoặc thêm placeholder
+
+        Placeholder được trả theo số thứ tự; nếu dịch vụ dịch đánh số lại (đủ số lượng
+        nhưng số thứ tự sai hoặc lặp) thì trả token theo thứ tự xuất hiện.
+        """
+        if not self.tokens:
+            return translation
+        indexes = [int(match.group(1)) for match in _PLACEHOLDER_PATTERN.finditer(translation)]
+        if len(indexes) != len(self.tokens):
+            return None
+        if sorted(indexes) != list(range(len(self.tokens))):
+            indexes = iter(range(len(self.tokens)))
+            return _PLACEHOLDER_PATTERN.sub(lambda match: self.tokens[next(indexes)], translation)
+        return _PLACEHOLDER_PATTERN.sub(lambda match: self.tokens[int(match.group(1))], translation)
+
+    def keeps_tokens(self, translation):
+        """True nếu translation (dịch khi không che token) vẫn giữ đủ các token của text gốc"""
+        return all(translation.count(token) >= self.tokens.count(token) for token in set(self.tokens))
+
+
+def mask_protected(text):
+    """Che các token không được dịch trong text, trả về MaskedText"""
+    if '⟦' in text:
+        # Text đã có ký tự dùng làm placeholder: không che để tránh nhầm lẫn
+        return MaskedText(text, [])
+    tokens = []
+
+    def _mask(match):
+        tokens.append(match.group(0))
+        return _PLACEHOLDER.format(len(tokens) - 1)
+
+    return MaskedText(_PROTECTED_PATTERN.sub(_mask, text), tokens)
+
+
+def _match_case(source, translation):
+    """Giữ kiểu viết hoa của cụm gốc cho bản dịch (thuật ngữ được lưu dạng chữ thường)"""
+    if len(source) > 1 and source.isupper():
+        return translation.upper()
+    if source[:1].isupper():
+        return translation[:1].upper() + translation[1:]
+    return translation
+
+
+class Glossary:
+    """Bảng thuật ngữ cố định, dịch offline các text chỉ gồm thuật ngữ
+
+    Thuật ngữ được so khớp không phân biệt hoa thường, ưu tiên cụm dài nhất (regex dạng trie).
+    Text chỉ gồm các thuật ngữ ngăn cách bởi dấu câu và token không được dịch
+    (ví dụ "1. Sổ văn bản đến", "Văn bản đến/Văn bản đi") được dịch ngay, không gọi backend.
+    """
+
+    def __init__(self, rows=(), languages=('vi', 'en')):
+        # (src, dest) -> {thuật ngữ chữ thường: bản dịch}
+        self.terms = {}
+        self._patterns = {}
+        for row in rows:
+            self.add_row(dict(zip(languages, row)))
+
+    @classmethod
+    def for_module(cls, module_path, files=(), builtin=True):
+        """Bảng thuật ngữ mặc định + i18n/glossary.csv của module (nếu có) + các file thêm"""
+        glossary = cls(DEFAULT_TERMS if builtin else ())
+        module_file = Path(module_path) / 'i18n' / GLOSSARY_FILE_NAME
+        for path in ([module_file] if module_file.is_file() else []) + [Path(f) for f in files]:
+            glossary.load_csv(path)
+        return glossary
+
+    def load_csv(self, path):
+        """Đọc file CSV: dòng đầu là mã ngôn ngữ, mỗi dòng sau là một thuật ngữ ở các ngôn ngữ"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            languages = [code.strip() for code in next(reader, [])]
+            for row in reader:
+                self.add_row(dict(zip(languages, row)))
+        logging.info(f'Đã đọc bảng thuật ngữ {path}')
+
+    def add_row(self, row):
+        """Thêm một thuật ngữ dạng {mã ngôn ngữ: cụm từ} cho mọi cặp ngôn ngữ trong dòng"""
+        row = {lang: unicodedata.normalize('NFC', text.strip())
+               for lang, text in row.items() if text and text.strip()}
+        for src, term in row.items():
+            for dest, translation in row.items():
+                if src != dest:
+                    self.add(term, translation, src, dest)
+
+    def add(self, term, translation, src, dest):
+        # Thuật ngữ khai báo sau (file của module) ghi đè thuật ngữ mặc định
+        self.terms.setdefault((src, dest), {})[term.lower()] = translation
+        self._patterns.pop((src, dest), None)
+
+    def _pattern(self, src, dest):
+        if (src, dest) not in self._patterns:
+            trie = build_trie_pattern(self.terms.get((src, dest), {}))
+            self._patterns[(src, dest)] = (
+                re.compile(r'(?<!\w)' + trie + r'(?!\w)', re.IGNORECASE) if trie else None
+            )
+        return self._patterns[(src, dest)]
+
+    def translate(self, text, src, dest):
+        """Dịch offline nếu text chỉ gồm thuật ngữ (hoặc không có chữ nào), ngược lại trả về None"""
+        masked = mask_protected(unicodedata.normalize('NFC', text))
+        pattern = self._pattern(src, dest)
+        table = self.terms.get((src, dest), {})
+        parts = []
+        position = 0
+        for match in pattern.finditer(masked.text) if pattern is not None else ():
+            gap = masked.text[position:match.start()]
+            # Hai thuật ngữ chỉ cách nhau khoảng trắng là một cụm chưa có trong bảng
+            translation = table.get(match.group(0).lower())
+            if translation is None or not _GAP_PATTERN.fullmatch(gap) or (parts and not gap.strip()):
+                return None
+            parts.append(gap)
+            parts.append(_match_case(match.group(0), translation))
+            position = match.end()
+        gap = masked.text[position:]
+        if not _GAP_PATTERN.fullmatch(gap):
+            return None
+        parts.append(gap)
+        return masked.unmask(''.join(parts))
+
+
+def add_glossary_arguments(parser):
+    """Thêm các tuỳ chọn bảng thuật ngữ vào parser"""
+    parser.add_argument('--glossary', action='append', default=[], metavar='FILE',
+                        help='File CSV thuật ngữ thêm (dòng đầu là mã ngôn ngữ, ví dụ vi,en); '
+                             f'i18n/{GLOSSARY_FILE_NAME} của module luôn được đọc nếu có')
+    parser.add_argument('--no-builtin-glossary', action='store_true',
+                        help='Không dùng bảng thuật ngữ quản lý văn bản có sẵn')
+    return parser
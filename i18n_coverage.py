@@ -0,0 +1,214 @@
+import json
+import sys
+from pathlib import Path
+
+from metrics import METRICS
+from patterns import PATTERNS
+from po_snapshot import iter_catalog_entries
+from string_index import StringIndex
+from text_utils import normalize_text
+from xml_translator import ARCH_SCOPE
+
+# Hàm đánh dấu text cần dịch trong Python/JS
+TRANSLATE_FUNCTIONS = frozenset({'_', '_lt', '_t'})
+# Tham số field được Odoo xuất ra file PO
+FIELD_KWARGS = frozenset({'string', 'help'})
+# Thuộc tính XML được Odoo xuất ra file PO; text node chỉ tính khi nằm trong arch/template
+XML_ATTRIBUTES = frozenset({'string', 'placeholder', 'help'})
+# Field dịch được (translate=True) của các record dữ liệu hay gặp: (model, field)
+TRANSLATABLE_RECORD_FIELDS = frozenset({
+    ('ir.actions.act_window', 'name'), ('ir.actions.act_window', 'help'),
+    ('ir.actions.server', 'name'), ('ir.actions.client', 'name'),
+    ('ir.actions.report', 'name'), ('ir.actions.act_url', 'name'),
+    ('ir.ui.menu', 'name'),
+    ('res.groups', 'name'), ('res.groups', 'comment'),
+    ('ir.module.category', 'name'), ('ir.module.category', 'description'),
+    ('mail.template', 'subject'), ('mail.template', 'body_html'),
+    ('mail.message.subtype', 'name'), ('mail.message.subtype', 'description'),
+})
+# Field nhận nhãn ở đối số đầu tiên (Many2one/Selection... nhận model/danh sách nên không tính)
+LABEL_FIELDS = frozenset({
+    'Char', 'Text', 'Html', 'Integer', 'Float', 'Monetary', 'Boolean', 'Date', 'Datetime',
+    'Binary', 'Image',
+})
+
+# Tên model (dạng model_name_with_underscores) trong reference của PO
+_REFERENCE_MODEL_PATTERN = PATTERNS.compile(
+    'coverage.reference_model',
+    r'^model:ir\.model[\w.]*,\w+:\w+\.(?:model_(\w+)|field_(\w+?)__\w+|selection__(\w+?)__\w+)$'
+)
+
+
+def is_translatable(occurrence):
+    """Vị trí xuất hiện này có phải text hiển thị cần có trong catalog không"""
+    kind = occurrence.kind
+    if kind in ('text', 'attribute'):
+        # Giá trị <field name="model|res_model|..."> của record là dữ liệu kỹ thuật, chỉ field
+        # dịch được (tên action/menu, ...) và <menuitem name="..."> mới được xuất ra file PO
+        name, _, scope = (occurrence.context or '').partition('@')
+        if scope.startswith('field:'):
+            model, _, field = scope[len('field:'):].rpartition(':')
+            if (model, field) in TRANSLATABLE_RECORD_FIELDS:
+                return True
+        if kind == 'attribute':
+            return name in XML_ATTRIBUTES
+        return scope == ARCH_SCOPE
+    if kind == 'call':
+        return occurrence.context in TRANSLATE_FUNCTIONS or occurrence.context in LABEL_FIELDS
+    if kind == 'kwarg':
+        return occurrence.context in FIELD_KWARGS
+    return False
+
+
+def _reference_model(reference):
+    match = _REFERENCE_MODEL_PATTERN.match(reference)
+    if match is None:
+        return None
+    return match.group(1) or match.group(2) or match.group(3)
+
+
+class CoverageGroup:
+    """Tập text (đã chuẩn hoá) theo từng trạng thái của một file hoặc một model"""
+
+    __slots__ = ('translatable', 'missing', 'untranslated', 'obsolete')
+
+    def __init__(self):
+        self.translatable = set()
+        self.missing = set()
+        self.untranslated = set()
+        self.obsolete = set()
+
+    @property
+    def coverage(self):
+        """Tỉ lệ text cần dịch đã có bản dịch trong catalog"""
+        if not self.translatable:
+            return 1.0
+        done = len(self.translatable) - len(self.missing) - len(self.untranslated)
+        return done / len(self.translatable)
+
+    def to_dict(self):
+        return {
+            'translatable': len(self.translatable),
+            'missing': len(self.missing),
+            'untranslated': len(self.untranslated),
+            'obsolete': len(self.obsolete),
+            'coverage': round(self.coverage, 4),
+        }
+
+
+class CoverageReport:
+    def __init__(self):
+        self.total = CoverageGroup()
+        self.files = {}
+        self.models = {}
+
+    def file(self, path):
+        return self.files.setdefault(str(path), CoverageGroup())
+
+    def model(self, name):
+        return self.models.setdefault(name, CoverageGroup())
+
+    def to_dict(self):
+        return {
+            'total': self.total.to_dict(),
+            'missing': sorted(self.total.missing),
+            'untranslated': sorted(self.total.untranslated),
+            'obsolete': sorted(self.total.obsolete),
+            'files': {path: group.to_dict() for path, group in sorted(self.files.items())},
+            'models': {name: group.to_dict() for name, group in sorted(self.models.items())},
+        }
+
+
+class CoverageAnalyzer:
+    """So khớp catalog (mặc định vi_VN.po) với text trong code của module
+
+    - missing: text cần dịch trong code nhưng không có trong catalog (theo msgid hoặc msgstr)
+    - untranslated: có msgid trong catalog nhưng msgstr rỗng
+    - obsolete: phần tử catalog không còn xuất hiện trong code
+    Text trong code được lấy từ chỉ mục chuỗi (chỉ đọc lại file đã đổi), hai phía được
+    so khớp bằng tập hash của text đã chuẩn hoá.
+    """
+
+    def __init__(self, module_path, jobs=1, lang='vi_VN'):
+        self.module_path = Path(module_path)
+        self.jobs = jobs
+        self.po_file = self.module_path / 'i18n' / f'{lang}.po'
+
+    def analyze(self):
+        with METRICS.timer('read'):
+            # Báo cáo chỉ đọc: không ghi snapshot
+            entries = [entry for entry in iter_catalog_entries(self.po_file, write_snapshot=False)
+                       if entry.msgid]
+        msgids = {}
+        msgstrs = set()
+        for entry in entries:
+            msgids.setdefault(normalize_text(entry.msgid), entry)
+            if entry.msgstr:
+                msgstrs.add(normalize_text(entry.msgstr))
+
+        index = StringIndex(self.module_path)
+        try:
+            index.update(self.jobs)
+            file_models = index.file_models()
+            report = CoverageReport()
+            code_terms = set()
+            with METRICS.timer('match'):
+                for term, occurrence in index.iter_occurrences():
+                    code_terms.add(term)
+                    if is_translatable(occurrence):
+                        groups = [report.total, report.file(occurrence.path)]
+                        groups += [report.model(name) for name in file_models.get(occurrence.path, [])]
+                        self._classify(term, msgids, msgstrs, groups)
+        finally:
+            index.close()
+
+        # Reference của PO ghi tên model dạng gạch dưới: đổi về tên model trong code
+        model_names = {name.replace('.', '_'): name for names in file_models.values() for name in names}
+
+        # Phần tử catalog không còn trong code (so cả msgid lẫn msgstr chưa được thay)
+        for entry in entries:
+            if normalize_text(entry.msgid) in code_terms:
+                continue
+            if entry.msgstr and normalize_text(entry.msgstr) in code_terms:
+                continue
+            report.total.obsolete.add(entry.msgid)
+            for model in {_reference_model(reference) for reference in entry.references} - {None}:
+                report.model(model_names.get(model, model)).obsolete.add(entry.msgid)
+        return report
+
+    def _classify(self, term, msgids, msgstrs, groups):
+        entry = msgids.get(term)
+        for group in groups:
+            group.translatable.add(term)
+        if entry is None:
+            if term not in msgstrs:
+                for group in groups:
+                    group.missing.add(term)
+        elif not entry.msgstr and entry.msgid_plural is None:
+            for group in groups:
+                group.untranslated.add(term)
+
+
+def _row(name, group):
+    data = group.to_dict()
+    return (f"{name:<50}{data['translatable']:>10}{data['missing']:>10}"
+            f"{data['untranslated']:>10}{data['obsolete']:>10}{data['coverage'] * 100:>9.1f}%")
+
+
+def print_report(report, stream=None, limit=20):
+    """In bảng tổng hợp theo file và theo model (limit dòng có nhiều text thiếu nhất)"""
+    stream = stream or sys.stdout
+    header = f"{'':<50}{'Cần dịch':>10}{'Thiếu':>10}{'Chưa dịch':>10}{'Thừa':>10}{'Độ phủ':>10}"
+    for title, groups in (('File', report.files), ('Model', report.models)):
+        rows = sorted(groups.items(), key=lambda item: (-len(item[1].missing) - len(item[1].untranslated), item[0]))
+        stream.write(f'\n{title}\n{header}\n')
+        for name, group in rows[:limit]:
+            stream.write(_row(name[-50:], group) + '\n')
+        if len(rows) > limit:
+            stream.write(f'... và {len(rows) - limit} {title.lower()} khác\n')
+    stream.write('\n' + _row('Tổng', report.total) + '\n')
+
+
+def write_json(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
@@ -1,96 +1,106 @@
-import re
 from pathlib import Path
 import logging
+from change_plan import ChangePlan, FileChange
+from language_classifier import has_vietnamese_chars
+from metrics import METRICS, echo
+from odoo_import import add_odoo_import
+from patterns import PATTERNS
 
-logging.basicConfig(
-    filename='i18n_log_van_ban.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s'
+HTML_PATTERNS = (
+    PATTERNS.compile('log_van_ban.html_b', r'<b>(.*?)</b>'),  # Text trong thẻ b
+    PATTERNS.compile('log_van_ban.html_span', r'<span>(.*?)</span>'),  # Text trong thẻ span
+    PATTERNS.compile('log_van_ban.html_p_danger', r'<p class="text-danger">(.*?)</p>'),  # Text trong p có class
 )
 
+NOTIFY_PATTERNS = (
+    PATTERNS.compile('log_van_ban.title_single', r"title='(.*?)'"),  # Text trong title dấu nháy đơn
+    PATTERNS.compile('log_van_ban.title_double', r'title="(.*?)"'),  # Text trong title dấu nháy kép
+    PATTERNS.compile('log_van_ban.message_single', r"message='(.*?)'"),  # Text trong message
+    PATTERNS.compile('log_van_ban.message_double', r'message="(.*?)"'),  # Text trong message
+)
+
+MARKUP_PATTERNS = (
+    PATTERNS.compile('log_van_ban.markup_span', r'<span>(.*?):</span>'),  # Text trong span có dấu :
+    PATTERNS.compile('log_van_ban.markup_b', r'<b>(.*?):</b>'),  # Text trong b có dấu :
+)
+
+# Phần động {biểu thức} trong f-string
+_DYNAMIC_PATTERN = PATTERNS.compile('log_van_ban.dynamic', r'{.*?}')
+# Text đã được bọc _() ở lần chạy trước
+_WRAPPED_PREFIXES = ('_(', '{_(')
+
 class I18nLogVanBanBot:
-    def __init__(self, module_path):
+    def __init__(self, module_path, dry_run=False, file_path=None):
         self.module_path = Path(module_path)
-        self.log_van_ban_path = self.module_path / 'models' / 'action_van_ban_den' / 'log_van_ban.py'
-        
-        # Các pattern cần xử lý
-        self.html_patterns = [
-            r'<b>(.*?)</b>',  # Text trong thẻ b
-            r'<span>(.*?)</span>',  # Text trong thẻ span
-            r'<p class="text-danger">(.*?)</p>'  # Text trong p có class
-        ]
+        # dry_run: chỉ lập kế hoạch thay đổi, không ghi file
+        self.dry_run = dry_run
+        # file_path: file cần xử lý, mặc định là log_van_ban.py của module quan_ly_van_ban
+        self.log_van_ban_path = Path(file_path) if file_path else (
+            self.module_path / 'models' / 'action_van_ban_den' / 'log_van_ban.py')
         
-        self.notify_patterns = [
-            r"title='(.*?)'",  # Text trong title dấu nháy đơn
-            r'title="(.*?)"',  # Text trong title dấu nháy kép
-            r"message='(.*?)'",  # Text trong message
-            r'message="(.*?)"'  # Text trong message
-        ]
-        
-        self.markup_patterns = [
-            r'<span>(.*?):</span>',  # Text trong span có dấu :
-            r'<b>(.*?):</b>'  # Text trong b có dấu :
-        ]
+        # Các pattern cần xử lý (đã biên dịch sẵn khi import)
+        self.html_patterns = HTML_PATTERNS
+        self.notify_patterns = NOTIFY_PATTERNS
+        self.markup_patterns = MARKUP_PATTERNS
 
     def process_file(self):
-        """Xử lý file log_van_ban.py"""
+        """Xử lý file log_van_ban.py, trả về ChangePlan (rỗng nếu lỗi hoặc không đổi)"""
+        plan = ChangePlan()
         try:
-            with open(self.log_van_ban_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Thêm import _ nếu chưa có
-            content = self._add_odoo_import(content)
+            with METRICS.timer('read'):
+                with open(self.log_van_ban_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
 
             # Xử lý các pattern
-            content = self._process_direct_text(content)
-            content = self._process_notify_text(content)
-            content = self._process_markup_text(content)
+            with METRICS.timer('match'):
+                new_content = self.rewrite(content)
+
+            # Thêm import _ nếu chưa có
+            new_content = self._add_odoo_import(new_content)
 
-            # Ghi lại file
-            with open(self.log_van_ban_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            plan.add(FileChange.from_contents(self.log_van_ban_path, content, new_content))
+            if not self.dry_run:
+                for file_path, error in plan.apply():
+                    raise RuntimeError(error)
 
-            logging.info('Đã xử lý xong file log_van_ban.py')
-            print('Đã xử lý xong file log_van_ban.py')
+            logging.info(f'Đã xử lý xong file {self.log_van_ban_path}')
+            echo(f'Đã xử lý xong file {self.log_van_ban_path}')
 
         except Exception as e:
             logging.error(f'Lỗi khi xử lý file: {str(e)}')
             print(f'Lỗi khi xử lý file: {str(e)}')
+        return plan
+
+    def rewrite(self, content):
+        """Bọc các text tiếng Việt bằng _() (không xử lý import)"""
+        content = self._process_direct_text(content)
+        content = self._process_notify_text(content)
+        content = self._process_markup_text(content)
+        return content
 
     def _add_odoo_import(self, content):
         """Thêm import _ từ odoo nếu chưa có"""
-        if 'from odoo import _' not in content:
-            # Tìm dòng import từ odoo
-            if 'from odoo import' in content:
-                content = re.sub(
-                    r'from odoo import (.*?)\n',
-                    lambda m: f'from odoo import _, {m.group(1)}\n' if m.group(1) else 'from odoo import _\n',
-                    content
-                )
-            else:
-                # Thêm vào đầu file sau các comment
-                content = 'from odoo import _\n' + content
+        new_content = add_odoo_import(content)
+        if new_content != content:
             logging.info('Đã thêm import _ từ odoo')
-        return content
+        return new_content
 
     def _process_direct_text(self, content):
         """Xử lý text trực tiếp trong HTML tags"""
         for pattern in self.html_patterns:
-            content = re.sub(
-                pattern,
+            content = pattern.sub(
                 lambda m: m.group(0).replace(m.group(1), f'{{_("{m.group(1)}")}}') 
-                if self._is_vietnamese(m.group(1)) else m.group(0),
+                if self._needs_wrap(m.group(1)) else m.group(0),
                 content
             )
         return content
 
     def _process_notify_text(self, content):
-        """Xử lý text trong notify"""
+        """Xử lý text trong notify: title='...' thành title=_("...") (bỏ dấu nháy của chuỗi cũ)"""
         for pattern in self.notify_patterns:
-            content = re.sub(
-                pattern,
-                lambda m: m.group(0).replace(m.group(1), f'_("{m.group(1)}")') 
-                if self._is_vietnamese(m.group(1)) else m.group(0),
+            content = pattern.sub(
+                lambda m: m.group(0)[:m.start(1) - m.start(0) - 1] + f'_("{m.group(1)}")'
+                if self._needs_wrap(m.group(1)) else m.group(0),
                 content
             )
         return content
@@ -99,9 +109,9 @@ class I18nLogVanBanBot:
         """Xử lý text trong Markup"""
         # Tách riêng phần text tĩnh và phần động
         for pattern in self.markup_patterns:
-            content = re.sub(
-                pattern,
-                lambda m: self._split_dynamic_content(m.group(1)),
+            content = pattern.sub(
+                lambda m: self._split_dynamic_content(m.group(1))
+                if self._needs_wrap(m.group(1)) else m.group(0),
                 content
             )
         return content
@@ -109,10 +119,10 @@ class I18nLogVanBanBot:
     def _split_dynamic_content(self, text):
         """Tách phần text tĩnh và phần động"""
         # Tìm các biến động trong text (nằm trong {})
-        dynamic_parts = re.findall(r'{.*?}', text)
+        dynamic_parts = _DYNAMIC_PATTERN.findall(text)
         if dynamic_parts:
             # Tách text thành các phần
-            parts = re.split(r'{.*?}', text)
+            parts = _DYNAMIC_PATTERN.split(text)
             result = []
             # Xử lý từng phần text tĩnh
             for i, part in enumerate(parts):
@@ -128,8 +138,10 @@ class I18nLogVanBanBot:
             # Nếu không có phần động, xử lý cả text
             return f'{{_("{text}")}}' if self._is_vietnamese(text) else text
 
+    def _needs_wrap(self, text):
+        """Text tiếng Việt chưa được bọc _() (chạy lại bot không bọc thêm lần nữa)"""
+        return self._is_vietnamese(text) and not text.lstrip().startswith(_WRAPPED_PREFIXES)
+
     def _is_vietnamese(self, text):
         """Kiểm tra xem text có phải tiếng Việt không"""
-        vietnamese_chars = set('áàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ')
-        text_lower = text.lower()
-        return any(char in vietnamese_chars for char in text_lower)
+        return has_vietnamese_chars(text)
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from cache_paths import cache_path
+from change_plan import temp_path_for
+
+
+def file_hash(file_path):
+    """Tính hash nội dung file"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_key(entry):
+    """Khoá định danh một phần tử PO"""
+    return f'{entry.msgctxt or ""}\x04{entry.msgid}'
+
+
+def entry_hash(entry):
+    """Hash nội dung dịch của một phần tử PO"""
+    msgstr = entry.msgstr
+    if entry.msgstr_plural is not None:
+        msgstr = '\x00'.join(entry.msgstr_plural[i] for i in sorted(entry.msgstr_plural))
+    text = f'{entry.msgctxt or ""}\x04{entry.msgid}\x00{entry.msgid_plural or ""}\x00{msgstr or ""}'
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class IncrementalState:
+    """Ghi nhớ hash của file và phần tử PO đã xử lý để lần chạy sau bỏ qua phần không đổi
+
+    Với file, so mtime/size trước cho nhanh; chỉ khi khác mới đọc lại để so hash nội dung.
+    File trạng thái mặc định nằm trong thư mục cache (mỗi module một file, mỗi bot một phần riêng),
+    không đặt trong module.
+    """
+
+    def __init__(self, module_path, namespace, state_file=None):
+        self.module_path = Path(module_path)
+        self.namespace = namespace
+        self.state_file = Path(state_file) if state_file else cache_path('state', module_path, '.json')
+        self._data = self._load()
+        section = self._data.setdefault(namespace, {})
+        self.files = section.setdefault('files', {})
+        self.entries = section.setdefault('entries', {})
+        self._seen_hashes = {}
+
+    def _load(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _key(self, file_path):
+        return os.path.relpath(file_path, self.module_path)
+
+    def is_file_changed(self, file_path):
+        """True nếu file mới hoặc nội dung đã khác so với lần xử lý trước"""
+        key = self._key(file_path)
+        stat = os.stat(file_path)
+        record = self.files.get(key)
+        if record and record[0] == stat.st_mtime_ns and record[1] == stat.st_size:
+            return False
+        content_hash = file_hash(file_path)
+        self._seen_hashes[key] = (stat.st_mtime_ns, stat.st_size, content_hash)
+        if record and record[2] == content_hash:
+            # Chỉ mtime thay đổi (vd. checkout lại), cập nhật để lần sau khỏi đọc
+            self.files[key] = [stat.st_mtime_ns, stat.st_size, content_hash]
+            return False
+        return True
+
+    def changed_files(self, file_paths):
+        return [file_path for file_path in file_paths if self.is_file_changed(file_path)]
+
+    def record_file(self, file_path):
+        """Lưu trạng thái file sau khi bot đã xử lý (và có thể đã ghi lại)"""
+        key = self._key(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.files.pop(key, None)
+            return
+        seen = self._seen_hashes.get(key)
+        if seen and seen[0] == stat.st_mtime_ns and seen[1] == stat.st_size:
+            content_hash = seen[2]
+        else:
+            content_hash = file_hash(file_path)
+        self.files[key] = [stat.st_mtime_ns, stat.st_size, content_hash]
+
+    def record_files(self, file_paths):
+        for file_path in file_paths:
+            self.record_file(file_path)
+
+    def is_entry_changed(self, entry):
+        """True nếu phần tử PO mới hoặc đã thay đổi so với lần chạy trước"""
+        return self.entries.get(entry_key(entry)) != entry_hash(entry)
+
+    def changed_entries(self, entries):
+        return [entry for entry in entries if self.is_entry_changed(entry)]
+
+    def record_entries(self, entries):
+        """Thay toàn bộ danh sách phần tử đã ghi nhận bằng entries"""
+        self.entries.clear()
+        for entry in entries:
+            self.record_entry(entry)
+
+    def record_entry(self, entry):
+        self.entries[entry_key(entry)] = entry_hash(entry)
+
+    def save(self):
+        """Ghi file trạng thái (ghi file tạm rồi đổi tên)"""
+        # Đọc lại để không ghi đè phần của các bot khác chạy cùng lúc
+        data = self._load()
+        data[self.namespace] = self._data[self.namespace]
+        tmp_file = temp_path_for(self.state_file)
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp_file, self.state_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
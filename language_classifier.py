@@ -0,0 +1,41 @@
+import unicodedata
+from functools import lru_cache
+
+# Các nguyên âm có dấu và chữ đ của tiếng Việt (cả hoa và thường)
+_VIETNAMESE_LOWER = 'áàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ'
+VIETNAMESE_CHARS = frozenset(_VIETNAMESE_LOWER + _VIETNAMESE_LOWER.upper())
+
+
+def has_vietnamese_chars(text):
+    """Kiểm tra nhanh text có ký tự đặc trưng tiếng Việt không"""
+    return not VIETNAMESE_CHARS.isdisjoint(text)
+
+
+@lru_cache(maxsize=65536)
+def classify_language(text):
+    """Phân loại ngôn ngữ của text: 'vi', 'en' hoặc None nếu không xác định
+
+    Chỉ gọi langdetect cho text mơ hồ (có ký tự ngoài ASCII nhưng không có dấu tiếng Việt),
+    kết quả được nhớ lại nên mỗi text chỉ phân loại một lần.
+    """
+    if has_vietnamese_chars(text):
+        return 'vi'
+    if not any(char.isalpha() for char in text):
+        return None
+    if text.isascii():
+        return 'en'
+    # Text tiếng Việt dạng tổ hợp (NFD) chỉ nhận ra được sau khi chuẩn hoá
+    if has_vietnamese_chars(unicodedata.normalize('NFC', text)):
+        return 'vi'
+    return _detect(text)
+
+
+def _detect(text):
+    """Gọi langdetect với seed cố định để kết quả ổn định giữa các lần chạy"""
+    try:
+        from langdetect import DetectorFactory, detect
+        DetectorFactory.seed = 0
+        language = detect(text)
+    except Exception:
+        return None
+    return language if language in ('vi', 'en') else None
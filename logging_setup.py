@@ -0,0 +1,139 @@
+import atexit
+import json
+import logging
+import queue
+import time
+from datetime import datetime
+
+# Các thuộc tính có sẵn của LogRecord, không đưa vào phần dữ liệu thêm
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Mỗi bản ghi là một dòng JSON: time, level, message và các trường truyền qua extra"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BatchedFileHandler(logging.FileHandler):
+    """FileHandler chỉ flush sau mỗi batch_size bản ghi hoặc flush_interval giây
+
+    Chỉ được gọi từ luồng của QueueListener nên không làm chậm vòng xử lý chính.
+    Listener gọi flush_pending() mỗi khi hàng đợi rỗng, nên lô cuối không nằm lại
+    trong bộ nhớ khi chương trình đứng chờ (chế độ theo dõi) hoặc bị kill.
+    """
+
+    def __init__(self, filename, batch_size=500, flush_interval=1.0, encoding='utf-8'):
+        super().__init__(filename, encoding=encoding)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        self._pending += 1
+        if (self._pending >= self.batch_size or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        super().flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush_pending(self):
+        """Flush nếu còn bản ghi chưa ghi xuống file"""
+        if self._pending:
+            self.flush()
+
+
+def _draining_listener(log_queue, handler):
+    """QueueListener flush handler mỗi khi hàng đợi rỗng, trước khi chờ bản ghi mới"""
+    from logging.handlers import QueueListener
+
+    class DrainingQueueListener(QueueListener):
+        def dequeue(self, block):
+            try:
+                return self.queue.get(block=False)
+            except queue.Empty:
+                if not block:
+                    raise
+            for item in self.handlers:
+                item.flush_pending()
+            return self.queue.get(block=True)
+
+    return DrainingQueueListener(log_queue, handler)
+
+
+def setup_logging(log_file, level=logging.INFO, log_format='json', batch_size=500):
+    """Cấu hình logging một lần cho cả lần chạy (gọi từ các script chạy bot)
+
+    Các lệnh logging.* chỉ đẩy bản ghi vào hàng đợi; một luồng QueueListener ghi ra
+    log_file theo lô. log_format là 'json' (JSON lines) hoặc 'text' (định dạng cũ).
+    """
+    global _listener
+    # Import muộn: logging.handlers kéo theo socket/pickle, không cần khi chỉ in --help
+    from logging.handlers import QueueHandler
+    stop_logging()
+
+    handler = BatchedFileHandler(log_file, batch_size=batch_size)
+    if log_format == 'json':
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for old_handler in list(root.handlers):
+        root.removeHandler(old_handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = _draining_listener(log_queue, handler)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Ghi nốt các bản ghi còn trong hàng đợi và đóng file log"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def add_logging_arguments(parser, default_file):
+    """Thêm các tuỳ chọn log dùng chung cho các script"""
+    parser.add_argument('--log-file', default=default_file,
+                        help=f'File log (mặc định: {default_file})')
+    parser.add_argument('--log-format', choices=('json', 'text'), default='json',
+                        help='Định dạng log: json (mỗi dòng một JSON) hoặc text')
+    return parser
+
+
+def setup_logging_from_args(args):
+    return setup_logging(args.log_file, log_format=args.log_format)
@@ -0,0 +1,169 @@
+import contextlib
+import io
+import logging
+import sys
+import threading
+import time
+
+# Các giai đoạn chính, in theo thứ tự này trong bảng tổng kết
+STAGES = ('walk', 'read', 'compile', 'detect', 'match', 'translate', 'write')
+
+
+class Metrics:
+    """Bộ đếm và bộ đo thời gian theo giai đoạn của một lần chạy bot
+
+    - timers: giai đoạn -> [tổng số giây, số lần gọi]
+    - counters: tên -> giá trị (file đã quét, file thay đổi, số chỗ thay, ...)
+
+    Khi chạy nhiều tiến trình, thời gian của tiến trình con được cộng dồn nên tổng các
+    giai đoạn có thể lớn hơn thời gian thực (tương tự khi nhiều module chạy song song).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_time(self, stage, seconds, calls=1):
+        with self.lock:
+            timer = self.timers.setdefault(stage, [0.0, 0])
+            timer[0] += seconds
+            timer[1] += calls
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        """Đo thời gian một khối lệnh: with METRICS.timer('read'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Dữ liệu đo được ở dạng pickle được, để gửi từ tiến trình con về tiến trình cha"""
+        return {
+            'timers': {stage: list(timer) for stage, timer in self.timers.items()},
+            'counters': dict(self.counters),
+        }
+
+    def merge(self, snapshot):
+        for stage, (seconds, calls) in snapshot['timers'].items():
+            self.add_time(stage, seconds, calls)
+        for name, value in snapshot['counters'].items():
+            self.count(name, value)
+
+    def summary(self):
+        """Trả về các dòng của bảng tổng kết"""
+        elapsed = time.perf_counter() - self.started
+        stages = [stage for stage in STAGES if stage in self.timers]
+        stages += sorted(stage for stage in self.timers if stage not in STAGES)
+
+        lines = [f"{'Giai đoạn':<14}{'Số lần':>10}{'Giây':>12}{'% tổng':>9}"]
+        for stage in stages:
+            seconds, calls = self.timers[stage]
+            share = seconds / elapsed * 100 if elapsed else 0
+            lines.append(f'{stage:<14}{calls:>10}{seconds:>12.3f}{share:>8.1f}%')
+        lines.append(f"{'tổng':<14}{'':>10}{elapsed:>12.3f}")
+        if self.counters:
+            lines.append('')
+            for name in sorted(self.counters):
+                lines.append(f'{name:<30}{self.counters[name]:>12}')
+        return lines
+
+    def write_summary(self, stream=None):
+        stream = stream or sys.stdout
+        stream.write('\n' + '\n'.join(self.summary()) + '\n')
+
+
+# Bộ đo dùng chung của tiến trình hiện tại
+METRICS = Metrics()
+
+_quiet = False
+
+
+def set_quiet(quiet):
+    """Chế độ yên lặng: bỏ các dòng in/log cho từng file, từng phần tử"""
+    global _quiet
+    _quiet = bool(quiet)
+
+
+def is_quiet():
+    return _quiet
+
+
+def echo(message):
+    """In thông báo cho từng file/phần tử (bị bỏ qua ở chế độ yên lặng)"""
+    if not _quiet:
+        print(message)
+
+
+def log_item(message, **fields):
+    """Ghi log cho từng file/phần tử (bị bỏ qua ở chế độ yên lặng)
+
+    fields được ghi thành các trường riêng trong log JSON, ví dụ file=..., search=...
+    """
+    if not _quiet:
+        logging.info(message, extra=fields)
+
+
+class _NullProgress:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, count=1):
+        pass
+
+
+def progress(total, desc):
+    """Thanh tiến trình tqdm; chế độ yên lặng trả về bộ đếm rỗng và không import tqdm"""
+    if _quiet:
+        return _NullProgress()
+    from tqdm import tqdm
+    return tqdm(total=total, desc=desc)
+
+
+def add_metrics_arguments(parser):
+    """Thêm các tuỳ chọn đo đạc dùng chung cho các script"""
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='Không in/log từng file, từng phần tử')
+    parser.add_argument('--metrics', action='store_true',
+                        help='In bảng thời gian theo giai đoạn khi chạy xong')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Chạy dưới cProfile và lưu thống kê vào FILE')
+    return parser
+
+
+@contextlib.contextmanager
+def instrument(args):
+    """Bật chế độ yên lặng/đo đạc/cProfile theo tuỳ chọn dòng lệnh cho khối lệnh bên trong"""
+    set_quiet(getattr(args, 'quiet', False))
+    METRICS.reset()
+    profiler = None
+    if getattr(args, 'profile', None):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield METRICS
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            import pstats
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(20)
+            print(stream.getvalue())
+            print(f'Đã lưu thống kê cProfile vào {args.profile}')
+        if getattr(args, 'metrics', False):
+            METRICS.write_summary()
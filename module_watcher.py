@@ -0,0 +1,130 @@
+import logging
+import os
+import time
+from pathlib import Path
+
+from file_walker import walk_entries
+from metrics import METRICS, echo
+from rewrite_pipeline import PASS_NAMES, RewritePipeline, build_passes
+
+
+class ModuleWatcher:
+    """Chạy thường trú, áp dụng các bước viết lại lên file ngay sau khi được lưu
+
+    Catalog đã parse, bộ so khớp đã biên dịch, bộ lọc byte và danh sách file (kèm mtime/size)
+    được giữ trong bộ nhớ giữa các lần lưu. Mỗi interval giây module được quét lại
+    (chỉ stat, không đọc file); thay đổi được gom cho tới khi yên debounce giây rồi mới xử lý,
+    để một lần lưu nhiều file (hoặc editor ghi nhiều bước) chỉ chạy pipeline một lần.
+    File PO của catalog thay đổi thì dựng lại các bước và chạy lại trên toàn module.
+    """
+
+    def __init__(self, module_path, pass_names=PASS_NAMES, interval=0.2, debounce=0.05, dry_run=False,
+                 report=None):
+        self.module_path = Path(module_path)
+        self.pass_names = list(pass_names)
+        self.interval = interval
+        self.debounce = debounce
+        # dry_run: chỉ báo các file sẽ đổi, không ghi file
+        self.dry_run = dry_run
+        # report(plan): gọi sau mỗi lượt xử lý, ví dụ để in diff khi dry_run
+        self.report = report
+        self.pipeline = None
+        self.exclude_files = set()
+        # Đường dẫn -> (mtime_ns, size) của lần quét trước
+        self.snapshot = {}
+
+    def load(self):
+        """Dựng (lại) các bước từ catalog hiện tại"""
+        with METRICS.timer('load'):
+            passes, exclude_files = build_passes(self.pass_names, self.module_path, dry_run=self.dry_run)
+        self.pipeline = RewritePipeline(passes, dry_run=self.dry_run)
+        self.exclude_files = {str(path) for path in exclude_files}
+        # Biên dịch trước bộ lọc byte cho các tổ hợp bước đang có, lần lưu đầu không phải chờ
+        with METRICS.timer('load'):
+            for path in self.snapshot:
+                passes = self.pipeline.accepting_passes(path)
+                if passes:
+                    self.pipeline.prefilter_for(passes)
+
+    def is_relevant(self, path):
+        """File cần theo dõi: file PO của catalog hoặc file có bước nhận xử lý"""
+        return path in self.exclude_files or bool(self.pipeline.accepting_passes(path))
+
+    def scan(self):
+        """Quét module, trả về dict {đường dẫn: (mtime_ns, size)}"""
+        stats = {}
+        # Dùng lại stat của DirEntry; luật .gitignore được giữ lại giữa các lần quét
+        for entry in walk_entries(self.module_path):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            stats[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def poll(self):
+        """Quét lại module, trả về danh sách file mới hoặc đã đổi từ lần quét trước"""
+        stats = self.scan()
+        changed = [path for path, stat in stats.items()
+                   if self.snapshot.get(path) != stat and self.is_relevant(path)]
+        self.snapshot = stats
+        return changed
+
+    def wait_for_changes(self):
+        """Chờ tới khi có file đổi rồi gom thêm cho tới khi yên debounce giây"""
+        changed = []
+        while not changed:
+            time.sleep(self.interval)
+            changed = self.poll()
+        while True:
+            time.sleep(self.debounce)
+            more = self.poll()
+            if not more:
+                return list(dict.fromkeys(changed))
+            changed.extend(more)
+
+    def process(self, changed):
+        """Chạy pipeline trên các file đã đổi, trả về ChangePlan"""
+        if any(path in self.exclude_files for path in changed):
+            # Catalog đổi: bộ so khớp mới có thể áp dụng cho mọi file trong module
+            echo('Catalog thay đổi, nạp lại các bước')
+            self.load()
+            changed = list(self.snapshot)
+        file_paths = self.pipeline.select_files([Path(path) for path in changed], self.exclude_files)
+        plan = self.pipeline.run(file_paths)
+        if not self.dry_run:
+            # Bỏ qua thay đổi do chính bot ghi ra ở lần quét sau
+            for change in plan:
+                try:
+                    stat = os.stat(change.path)
+                except OSError:
+                    continue
+                self.snapshot[str(change.path)] = (stat.st_mtime_ns, stat.st_size)
+        return plan
+
+    def watch(self, initial=False, max_rounds=None):
+        """Vòng lặp theo dõi; initial: chạy một lượt trên toàn module trước khi theo dõi"""
+        self.snapshot = self.scan()
+        self.load()
+        echo(f'Đang theo dõi {self.module_path} ({len(self.snapshot)} file), Ctrl+C để dừng')
+        if initial:
+            self.process(list(self.snapshot))
+        rounds = 0
+        try:
+            while max_rounds is None or rounds < max_rounds:
+                changed = self.wait_for_changes()
+                start = time.perf_counter()
+                try:
+                    plan = self.process(changed)
+                except Exception as e:
+                    logging.error(f'Lỗi khi xử lý thay đổi: {str(e)}')
+                    continue
+                finally:
+                    rounds += 1
+                METRICS.count('watch_rounds')
+                if self.report is not None and plan:
+                    self.report(plan)
+                echo(f'{len(changed)} file thay đổi, sửa {len(plan)} file '
+                     f'trong {(time.perf_counter() - start) * 1000:.0f} ms')
+        except KeyboardInterrupt:
+            echo('Dừng theo dõi')
@@ -0,0 +1,50 @@
+import re
+
+from patterns import PATTERNS
+
+# Dòng import từ odoo ở đầu dòng, có thể dùng ngoặc đơn nhiều dòng
+_ODOO_IMPORT_PATTERN = PATTERNS.compile(
+    'odoo_import.from_odoo', r'^from odoo import[ \t]+(?:(\()([^)]*)\)|([^\n]*))', re.MULTILINE
+)
+
+
+def has_odoo_import(content):
+    """Kiểm tra file đã import _ từ odoo chưa"""
+    for match in _ODOO_IMPORT_PATTERN.finditer(content):
+        if match.group(1):
+            names = match.group(2)
+        else:
+            # Bỏ comment cuối dòng
+            names = match.group(3).split('#')[0]
+        if any(name.split()[:1] == ['_'] for name in names.split(',')):
+            return True
+    return False
+
+
+def add_odoo_import(content):
+    """Thêm import _ từ odoo nếu chưa có (dùng chung cho mọi bot)
+
+    - Đã có `from odoo import ..., _` thì giữ nguyên
+    - Có dòng `from odoo import ...` thì chèn `_` vào dòng đầu tiên
+    - Chưa có thì thêm `from odoo import _` sau các dòng comment đầu file
+    """
+    if has_odoo_import(content):
+        return content
+
+    match = _ODOO_IMPORT_PATTERN.search(content)
+    if match:
+        if match.group(1):
+            insert_at = match.end(1)
+            if match.group(2).startswith('\n'):
+                # Import nhiều dòng: thêm _ thành một dòng riêng
+                return content[:insert_at] + '\n    _,' + content[insert_at:]
+            return content[:insert_at] + '_, ' + content[insert_at:]
+        insert_at = match.start(3)
+        return content[:insert_at] + '_, ' + content[insert_at:]
+
+    # Giữ shebang / coding / comment đầu file ở trên cùng
+    lines = content.splitlines(keepends=True)
+    index = 0
+    while index < len(lines) and lines[index].startswith('#'):
+        index += 1
+    return ''.join(lines[:index]) + 'from odoo import _\n' + ''.join(lines[index:])
@@ -0,0 +1,88 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from metrics import METRICS
+
+
+class PatternRegistry:
+    """Nơi đăng ký mọi regex tĩnh của các bot, biên dịch một lần khi import module
+
+    Tên pattern có dạng '<module>.<mục đích>' để dễ tra cứu và thống kê.
+    """
+
+    def __init__(self):
+        self.patterns = {}
+
+    def compile(self, name, pattern, flags=0):
+        """Biên dịch và đăng ký pattern; đăng ký lại cùng tên sẽ trả về bản đã có"""
+        compiled = self.patterns.get(name)
+        if compiled is None:
+            compiled = self.patterns[name] = re.compile(pattern, flags)
+        elif compiled.pattern != pattern:
+            raise ValueError(f'Pattern {name} đã được đăng ký với nội dung khác')
+        return compiled
+
+    def get(self, name):
+        return self.patterns[name]
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+class MatcherCache:
+    """Cache các bộ so khớp động (dựng từ catalog) theo khoá phiên bản catalog
+
+    Giữ tối đa maxsize bộ so khớp, bỏ bộ ít dùng gần đây nhất khi đầy.
+    An toàn khi nhiều thread (nhiều module chạy song song) dùng chung.
+    """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.matchers = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def get(self, key, builder):
+        """Trả về bộ so khớp cho key, gọi builder() để dựng nếu chưa có"""
+        with self.lock:
+            matcher = self.matchers.get(key)
+            if matcher is not None:
+                self.matchers.move_to_end(key)
+                self.hits += 1
+                METRICS.count('matcher_cache_hits')
+                return matcher
+
+            self.misses += 1
+            METRICS.count('matcher_cache_misses')
+            with METRICS.timer('compile'):
+                matcher = builder()
+            self.matchers[key] = matcher
+            while len(self.matchers) > self.maxsize:
+                self.matchers.popitem(last=False)
+            return matcher
+
+    def clear(self):
+        with self.lock:
+            self.matchers.clear()
+
+    def stats(self):
+        return {'size': len(self.matchers), 'hits': self.hits, 'misses': self.misses}
+
+
+def catalog_version(pairs):
+    """Khoá phiên bản của danh sách cặp (msgstr, msgid): đổi khi catalog đổi"""
+    digest = hashlib.sha1()
+    for search_text, replace_text in pairs:
+        digest.update(search_text.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(replace_text.encode('utf-8'))
+        digest.update(b'\1')
+    return digest.hexdigest()
+
+
+# Registry và cache dùng chung trong tiến trình
+PATTERNS = PatternRegistry()
+MATCHERS = MatcherCache()
@@ -0,0 +1,320 @@
+import os
+
+from change_plan import FileChange, SpanEdit, replace_file, temp_path_for
+from metrics import METRICS
+from patterns import PATTERNS
+
+# Các ký tự escape hợp lệ trong chuỗi PO
+_UNESCAPE_MAP = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+_ESCAPE_MAP = {value: '\\' + key for key, value in _UNESCAPE_MAP.items()}
+_UNESCAPE_PATTERN = PATTERNS.compile('po.unescape', r'\\(.)')
+_ESCAPE_PATTERN = PATTERNS.compile('po.escape', r'[\n\t\r"\\]')
+_KEYWORD_PATTERN = PATTERNS.compile(
+    'po.keyword', r'(msgctxt|msgid_plural|msgid|msgstr(?:\[(\d+)\])?)\s+"(.*)"\s*$'
+)
+
+
+def po_unescape(text):
+    """Chuyển chuỗi dạng escape trong file PO về text thật"""
+    if '\\' not in text:
+        return text
+    return _UNESCAPE_PATTERN.sub(lambda m: _UNESCAPE_MAP.get(m.group(1), m.group(0)), text)
+
+
+def po_escape(text):
+    """Escape text để ghi vào file PO"""
+    return _ESCAPE_PATTERN.sub(lambda m: _ESCAPE_MAP[m.group(0)], text)
+
+
+class POEntry:
+    """Một phần tử dịch trong file PO"""
+
+    __slots__ = (
+        'comments', 'references', 'flags', 'msgctxt', 'msgid', 'msgid_plural',
+        'msgstr', 'msgstr_plural', 'raw_lines', 'line_number', 'dirty',
+    )
+
+    def __init__(self, line_number=0):
+        self.comments = []
+        self.references = []
+        self.flags = []
+        self.msgctxt = None
+        self.msgid = None
+        self.msgid_plural = None
+        self.msgstr = None
+        self.msgstr_plural = None
+        self.raw_lines = []
+        self.line_number = line_number
+        self.dirty = False
+
+    @property
+    def is_header(self):
+        return self.msgid == '' and self.msgctxt is None
+
+    @property
+    def module(self):
+        """Tên module lấy từ dòng '#. module:'"""
+        for comment in self.comments:
+            if comment.startswith('#. module:'):
+                return comment[len('#. module:'):].strip()
+        return ''
+
+    def update(self, **fields):
+        """Cập nhật các trường msgid/msgstr... và đánh dấu cần ghi lại"""
+        for name, value in fields.items():
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                self.dirty = True
+
+    def serialize(self):
+        """Sinh lại các dòng của phần tử (giữ nguyên dòng gốc nếu không đổi)"""
+        if not self.dirty:
+            return self.raw_lines
+
+        lines = [comment + '\n' for comment in self.comments]
+        if self.msgctxt is not None:
+            lines.extend(_format_field('msgctxt', self.msgctxt))
+        if self.msgid is not None:
+            lines.extend(_format_field('msgid', self.msgid))
+        if self.msgid_plural is not None:
+            lines.extend(_format_field('msgid_plural', self.msgid_plural))
+        if self.msgstr_plural is not None:
+            for index in sorted(self.msgstr_plural):
+                lines.extend(_format_field(f'msgstr[{index}]', self.msgstr_plural[index]))
+        elif self.msgstr is not None:
+            lines.extend(_format_field('msgstr', self.msgstr))
+
+        # Giữ lại các dòng trống ngăn cách phía sau phần tử
+        trailing = len(self.raw_lines)
+        while trailing and not self.raw_lines[trailing - 1].strip():
+            trailing -= 1
+        lines.extend(self.raw_lines[trailing:])
+        return lines
+
+
+def _format_field(keyword, value):
+    """Định dạng một trường, tách nhiều dòng nếu text có xuống dòng"""
+    escaped = po_escape(value)
+    if '\n' not in value[:-1]:
+        return [f'{keyword} "{escaped}"\n']
+    lines = [f'{keyword} ""\n']
+    for part in value.splitlines(keepends=True):
+        lines.append(f'"{po_escape(part)}"\n')
+    return lines
+
+
+def iter_entries(po_file, keep_raw=True):
+    """Đọc dần file PO và trả về từng POEntry (không nạp cả file vào bộ nhớ)
+
+    keep_raw=False: không giữ raw_lines, dùng cho các lần đọc chỉ cần nội dung dịch.
+    """
+    entry = POEntry(1)
+    field = None
+    plural_index = None
+    seen_message = False
+    ended = False
+
+    with open(po_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            stripped = line.strip()
+
+            if not stripped:
+                if keep_raw:
+                    entry.raw_lines.append(line)
+                if seen_message:
+                    ended = True
+                field = None
+                continue
+
+            # Dòng trống, comment hoặc msgid mới sau msgstr đều bắt đầu phần tử mới
+            if ended or (seen_message and (
+                    stripped.startswith('#') or
+                    (stripped.startswith(('msgctxt ', 'msgid ')) and
+                     (entry.msgstr is not None or entry.msgstr_plural is not None)))):
+                yield entry
+                entry = POEntry(line_number)
+                seen_message = False
+                ended = False
+
+            if keep_raw:
+                entry.raw_lines.append(line)
+
+            if stripped.startswith('#'):
+                field = None
+                entry.comments.append(stripped)
+                if stripped.startswith('#:'):
+                    entry.references.extend(stripped[2:].split())
+                elif stripped.startswith('#,'):
+                    entry.flags.extend(flag.strip() for flag in stripped[2:].split(','))
+                continue
+
+            if stripped.startswith('"'):
+                # Dòng tiếp nối của trường trước đó
+                if field is not None:
+                    _append_field(entry, field, plural_index, po_unescape(stripped[1:-1]))
+                continue
+
+            match = _KEYWORD_PATTERN.match(stripped)
+            if not match:
+                continue
+
+            keyword, index, value = match.groups()
+            value = po_unescape(value)
+            seen_message = True
+            if keyword.startswith('msgstr') and index is not None:
+                field = 'msgstr_plural'
+                plural_index = int(index)
+                if entry.msgstr_plural is None:
+                    entry.msgstr_plural = {}
+                entry.msgstr_plural[plural_index] = value
+            else:
+                field = keyword
+                plural_index = None
+                setattr(entry, keyword, value)
+
+    if entry.raw_lines or entry.msgid is not None or entry.comments:
+        yield entry
+
+
+def rewrite_entries(po_file, update, dry_run=False):
+    """Đọc lại file PO theo từng phần tử, gọi update(entry) rồi ghi ra file mới theo luồng
+
+    Chỉ phần tử có dirty mới được sinh lại; bộ nhớ chỉ giữ text của các phần tử đã đổi.
+    Snapshot của catalog (po_snapshot) được ghi lại luôn cho nội dung mới.
+    Trả về FileChange của các phần tử đã đổi (None nếu không đổi). dry_run: không ghi file.
+    """
+    from po_snapshot import open_snapshot_writer
+
+    edits = []
+    position = 0
+    line_number = 1
+    tmp_file = None if dry_run else temp_path_for(po_file)
+    writer = None if dry_run else open(tmp_file, 'w', encoding='utf-8')
+    snapshot = None if dry_run else open_snapshot_writer(po_file)
+    try:
+        for entry in iter_entries(po_file):
+            length = sum(len(line) for line in entry.raw_lines)
+            update(entry)
+            lines = entry.serialize()
+            if entry.dirty:
+                edits.append(SpanEdit(position, position + length, ''.join(lines)))
+            if writer is not None:
+                writer.writelines(lines)
+            if snapshot is not None:
+                # Số dòng bắt đầu của phần tử trong file mới
+                entry.line_number = line_number
+                snapshot.add(entry)
+            position += length
+            line_number += len(lines)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_file)
+        if snapshot is not None:
+            snapshot.abort()
+        raise
+
+    if writer is None:
+        return FileChange(po_file, edits) if edits else None
+    writer.close()
+    change = None
+    if edits:
+        # Lập FileChange trước khi thay file để mtime/size là của file gốc
+        change = FileChange(po_file, edits)
+        replace_file(tmp_file, po_file)
+    else:
+        os.remove(tmp_file)
+    if snapshot is not None:
+        snapshot.close()
+    return change
+
+
+def _append_field(entry, field, plural_index, value):
+    """Nối phần tiếp theo của một trường nhiều dòng"""
+    if field == 'msgstr_plural':
+        entry.msgstr_plural[plural_index] += value
+    else:
+        setattr(entry, field, getattr(entry, field) + value)
+
+
+class POCatalog:
+    """Catalog PO có chỉ mục theo msgid và theo reference"""
+
+    def __init__(self, po_file, entries=None):
+        self.po_file = po_file
+        self.entries = list(iter_entries(po_file) if entries is None else entries)
+        self._by_msgid = {}
+        self._by_reference = {}
+        for entry in self.entries:
+            self._index(entry)
+
+    @classmethod
+    def load(cls, po_file):
+        return cls(po_file)
+
+    def _index(self, entry):
+        if entry.msgid is None or entry.is_header:
+            return
+        self._by_msgid.setdefault((entry.msgctxt, entry.msgid), entry)
+        for reference in entry.references:
+            self._by_reference.setdefault(reference, []).append(entry)
+
+    def __iter__(self):
+        """Duyệt các phần tử dịch (bỏ qua header)"""
+        return (entry for entry in self.entries if entry.msgid is not None and not entry.is_header)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, msgid, msgctxt=None):
+        """Tra cứu phần tử theo msgid"""
+        return self._by_msgid.get((msgctxt, msgid))
+
+    def find_by_reference(self, reference):
+        """Tra cứu các phần tử theo reference, ví dụ 'model:ir.model.fields,...'"""
+        return self._by_reference.get(reference, [])
+
+    def reindex(self):
+        """Dựng lại chỉ mục sau khi msgid thay đổi"""
+        self._by_msgid = {}
+        self._by_reference = {}
+        for entry in self.entries:
+            self._index(entry)
+
+    @property
+    def changed(self):
+        return any(entry.dirty for entry in self.entries)
+
+    def change_plan(self):
+        """Lập FileChange cho các phần tử đã thay đổi (không ghi file), None nếu không đổi
+
+        Offset mỗi phần tử được cộng dồn từ raw_lines nên chỉ thay đúng đoạn của phần tử đó.
+        """
+        edits = []
+        position = 0
+        for entry in self.entries:
+            length = sum(len(line) for line in entry.raw_lines)
+            if entry.dirty:
+                edits.append(SpanEdit(position, position + length, ''.join(entry.serialize())))
+            position += length
+        if not edits:
+            return None
+        return FileChange(self.po_file, edits)
+
+    def save(self, po_file=None):
+        """Ghi catalog, chỉ sinh lại những phần tử đã thay đổi"""
+        po_file = po_file or self.po_file
+        tmp_file = temp_path_for(po_file)
+        try:
+            with METRICS.timer('write'):
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    for entry in self.entries:
+                        f.writelines(entry.serialize())
+                replace_file(tmp_file, po_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        for entry in self.entries:
+            if entry.dirty:
+                entry.raw_lines = entry.serialize()
+                entry.dirty = False
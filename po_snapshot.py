@@ -0,0 +1,159 @@
+import logging
+import marshal
+import os
+import struct
+import sys
+from pathlib import Path
+
+from cache_paths import cache_path
+from change_plan import temp_path_for
+from incremental_state import file_hash
+from metrics import METRICS
+from po_catalog import POEntry, iter_entries
+
+# Đầu file: magic, phiên bản marshal, phiên bản Python, mtime_ns/size/sha1 của file PO, số phần tử
+_MAGIC = b'ODPOSNP1'
+_HEADER = struct.Struct('<8sIBBqq40sI')
+# Mỗi khối: độ dài (byte) rồi tới dữ liệu marshal của danh sách phần tử
+_BLOCK_LENGTH = struct.Struct('<I')
+# Số phần tử trong mỗi khối marshal: đọc/ghi theo khối để bộ nhớ không phụ thuộc kích thước catalog
+BLOCK_SIZE = 1000
+
+
+def snapshot_path(po_file):
+    """File snapshot trong thư mục cache (ngoài module), khoá theo đường dẫn thật của file PO"""
+    return cache_path('snapshots', po_file, '.snapshot')
+
+
+def _entry_tuple(entry):
+    return (entry.line_number, entry.msgctxt, entry.msgid, entry.msgid_plural, entry.msgstr,
+            entry.msgstr_plural, entry.comments, entry.references, entry.flags)
+
+
+def _entry_from_tuple(values):
+    # Bỏ qua __init__ vì mọi trường đều được gán lại
+    entry = object.__new__(POEntry)
+    (entry.line_number, entry.msgctxt, entry.msgid, entry.msgid_plural, entry.msgstr,
+     entry.msgstr_plural, entry.comments, entry.references, entry.flags) = values
+    entry.raw_lines = []
+    entry.dirty = False
+    return entry
+
+
+class SnapshotWriter:
+    """Ghi snapshot theo từng khối trong lúc duyệt catalog, chỉ thay file khi gọi close()"""
+
+    def __init__(self, po_file):
+        self.po_file = Path(po_file)
+        self.path = snapshot_path(po_file)
+        self.tmp_path = temp_path_for(self.path)
+        self.count = 0
+        self.block = []
+        self.file = open(self.tmp_path, 'wb')
+        self.file.write(b'\0' * _HEADER.size)
+
+    def add(self, entry):
+        self.block.append(_entry_tuple(entry))
+        self.count += 1
+        if len(self.block) >= BLOCK_SIZE:
+            self._flush_block()
+
+    def _flush_block(self):
+        if self.block:
+            data = marshal.dumps(self.block)
+            self.file.write(_BLOCK_LENGTH.pack(len(data)))
+            self.file.write(data)
+            self.block = []
+
+    def close(self):
+        """Hoàn tất snapshot cho nội dung hiện tại của file PO"""
+        self._flush_block()
+        stat = os.stat(self.po_file)
+        self.file.seek(0)
+        self.file.write(_header(stat, file_hash(self.po_file), self.count))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def open_snapshot_writer(po_file):
+    """Tạo SnapshotWriter, None nếu không ghi được (thư mục chỉ đọc...)"""
+    try:
+        return SnapshotWriter(po_file)
+    except OSError as e:
+        logging.warning(f'Không ghi được snapshot cho {po_file}: {str(e)}')
+        return None
+
+
+def _header(stat, digest, count):
+    return _HEADER.pack(_MAGIC, marshal.version, sys.version_info[0], sys.version_info[1],
+                        stat.st_mtime_ns, stat.st_size, digest.encode('ascii'), count)
+
+
+def _open_fresh(po_file, refresh=True):
+    """Mở snapshot nếu còn khớp với file PO (đã đọc qua phần đầu), None nếu không dùng được
+
+    So mtime/size trước; nếu khác thì so hash nội dung (file chỉ bị touch vẫn dùng được
+    và, nếu refresh, phần đầu được cập nhật lại mtime/size).
+    """
+    try:
+        f = open(snapshot_path(po_file), 'r+b' if refresh else 'rb')
+    except OSError:
+        return None
+    try:
+        magic, marshal_version, major, minor, mtime_ns, size, digest, count = _HEADER.unpack(
+            f.read(_HEADER.size))
+        if (magic != _MAGIC or marshal_version != marshal.version or
+                (major, minor) != sys.version_info[:2]):
+            f.close()
+            return None
+        stat = os.stat(po_file)
+        if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+            current = file_hash(po_file)
+            if current.encode('ascii') != digest:
+                f.close()
+                return None
+            if refresh:
+                f.seek(0)
+                f.write(_header(stat, current, count))
+        return f
+    except (OSError, struct.error):
+        f.close()
+        return None
+
+
+def iter_catalog_entries(po_file, write_snapshot=True):
+    """Duyệt các phần tử của file PO (không có raw_lines), ưu tiên đọc từ snapshot
+
+    Snapshot còn khớp: chỉ unmarshal các khối, không parse text. Ngược lại parse file PO
+    như iter_entries(keep_raw=False) và ghi lại snapshot khi đã duyệt hết.
+    write_snapshot=False (dry-run, báo cáo): chỉ đọc snapshot có sẵn, không ghi gì ra đĩa.
+    """
+    f = _open_fresh(po_file, refresh=write_snapshot)
+    if f is not None:
+        METRICS.count('snapshot_hits')
+        with f:
+            while True:
+                length = f.read(_BLOCK_LENGTH.size)
+                if not length:
+                    return
+                for values in marshal.loads(f.read(_BLOCK_LENGTH.unpack(length)[0])):
+                    yield _entry_from_tuple(values)
+
+    METRICS.count('snapshot_misses')
+    writer = open_snapshot_writer(po_file) if write_snapshot else None
+    try:
+        for entry in iter_entries(po_file, keep_raw=False):
+            if writer is not None:
+                writer.add(entry)
+            yield entry
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,197 @@
+import ast
+import io
+import token
+import tokenize
+
+# Ngữ cảnh mặc định chứa text cần dịch
+EXCEPTION_NAMES = ('ValidationError', 'UserError')
+DICT_KEYS = ('name',)
+KWARG_NAMES = ('title', 'message')
+
+_SKIP_TOKENS = {tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT, tokenize.NEWLINE}
+# Python 3.12+ tách f-string thành nhiều token
+_FSTRING_START = getattr(token, 'FSTRING_START', None)
+_FSTRING_END = getattr(token, 'FSTRING_END', None)
+
+
+class StringSpan:
+    """Vị trí chính xác của một chuỗi literal cần dịch trong source
+
+    - start/end: offset ký tự trong nội dung file (end không bao gồm)
+    - kind: 'exception', 'dict' hoặc 'kwarg'
+    - context: tên exception, key của dict hoặc tên tham số
+    - text: giá trị chuỗi (None với f-string)
+    """
+
+    __slots__ = ('start', 'end', 'kind', 'context', 'text', 'is_fstring')
+
+    def __init__(self, start, end, kind, context, text, is_fstring):
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.context = context
+        self.text = text
+        self.is_fstring = is_fstring
+
+    def __repr__(self):
+        return f'StringSpan({self.start}, {self.end}, {self.kind!r}, {self.context!r}, {self.text!r})'
+
+
+def _line_offsets(content):
+    """Offset bắt đầu của từng dòng (dòng đánh số từ 1)"""
+    offsets = [0, 0]
+    position = 0
+    # Tách dòng giống hệt tokenize (chỉ theo '\n')
+    for line in io.StringIO(content):
+        position += len(line)
+        offsets.append(position)
+    return offsets
+
+
+def _significant_tokens(content):
+    readline = io.StringIO(content).readline
+    return [tok for tok in tokenize.generate_tokens(readline) if tok.type not in _SKIP_TOKENS]
+
+
+def _is_string_start(tok):
+    return tok.type == tokenize.STRING or (_FSTRING_START is not None and tok.type == _FSTRING_START)
+
+
+def _string_group_end(tokens, index):
+    """Trả về chỉ số token ngay sau nhóm chuỗi liền nhau bắt đầu tại index ('a' 'b' f'c')"""
+    while index < len(tokens) and _is_string_start(tokens[index]):
+        if tokens[index].type == tokenize.STRING:
+            index += 1
+            continue
+        # Bỏ qua toàn bộ f-string (có thể lồng nhau) tới FSTRING_END tương ứng
+        depth = 0
+        while index < len(tokens):
+            if tokens[index].type == _FSTRING_START:
+                depth += 1
+            elif tokens[index].type == _FSTRING_END:
+                depth -= 1
+                if depth == 0:
+                    index += 1
+                    break
+            index += 1
+    return index
+
+
+def _is_fstring_token(tok):
+    if tok.type != tokenize.STRING:
+        return True
+    prefix = tok.string[:len(tok.string) - len(tok.string.lstrip('rRbBfFuU'))]
+    return 'f' in prefix.lower()
+
+
+def _literal_value(tok):
+    text = tok.string
+    # Chuỗi đơn giản (không prefix, không escape, không nháy ba) thì cắt trực tiếp
+    if text[:1] in ('"', "'") and '\\' not in text and text[:3] not in ('"""', "'''"):
+        return text[1:-1]
+    try:
+        value = ast.literal_eval(tok.string)
+    except (ValueError, SyntaxError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+def _make_span(offsets, tokens, start_index, end_index, kind, context):
+    first = tokens[start_index]
+    last = tokens[end_index - 1]
+    start = offsets[first.start[0]] + first.start[1]
+    end = offsets[last.end[0]] + last.end[1]
+    group = tokens[start_index:end_index]
+    is_fstring = any(_is_fstring_token(tok) for tok in group)
+    text = None
+    if not is_fstring:
+        values = [_literal_value(tok) for tok in group]
+        if all(value is not None for value in values):
+            text = ''.join(values)
+    return StringSpan(start, end, kind, context, text, is_fstring)
+
+
+def extract_strings(content, exception_names=EXCEPTION_NAMES, dict_keys=DICT_KEYS,
+                    kwarg_names=KWARG_NAMES):
+    """Quét tuyến tính source Python, trả về các StringSpan cần dịch theo thứ tự xuất hiện
+
+    Chuỗi đã được bọc bằng _() / _lt() không được trả về.
+    Ném tokenize.TokenError / SyntaxError nếu source không hợp lệ.
+    """
+    tokens = _significant_tokens(content)
+    offsets = _line_offsets(content)
+    exception_names = set(exception_names)
+    dict_keys = set(dict_keys)
+    kwarg_names = set(kwarg_names)
+    spans = []
+    count = len(tokens)
+
+    index = 0
+    while index < count - 2:
+        tok = tokens[index]
+        next_tok = tokens[index + 1]
+        kind = context = None
+
+        if tok.type == tokenize.NAME and next_tok.string == '(' and tok.string in exception_names:
+            # ValidationError('...') hoặc exceptions.UserError('...')
+            kind, context = 'exception', tok.string
+        elif tok.type == tokenize.NAME and next_tok.string == '=' and tok.string in kwarg_names:
+            kind, context = 'kwarg', tok.string
+        elif tok.type == tokenize.STRING and next_tok.string == ':' and _literal_value(tok) in dict_keys:
+            kind, context = 'dict', _literal_value(tok)
+
+        if kind is not None and _is_string_start(tokens[index + 2]):
+            end_index = _string_group_end(tokens, index + 2)
+            spans.append(_make_span(offsets, tokens, index + 2, end_index, kind, context))
+            index = end_index
+            continue
+        index += 1
+
+    return spans
+
+
+def wrap_spans(content, spans, function='_'):
+    """Bọc các span bằng _(...) trong một lần ghép chuỗi"""
+    parts = []
+    position = 0
+    for span in sorted(spans, key=lambda span: span.start):
+        if span.start < position:
+            continue
+        parts.append(content[position:span.start])
+        parts.append(f'{function}({content[span.start:span.end]})')
+        position = span.end
+    parts.append(content[position:])
+    return ''.join(parts)
+
+
+def iter_literals(content):
+    """Trả về StringSpan cho mọi chuỗi literal trong source Python, kèm ngữ cảnh gần nhất
+
+    - kind 'call': đối số đầu của lời gọi, context là tên hàm (_, ValidationError, Char, ...)
+    - kind 'kwarg': giá trị tham số hoặc phép gán, context là tên (string, help, ...)
+    - kind 'dict': giá trị trong dict, context là key
+    - kind 'literal': các chuỗi còn lại
+    Ném tokenize.TokenError / SyntaxError nếu source không hợp lệ.
+    """
+    tokens = _significant_tokens(content)
+    offsets = _line_offsets(content)
+    count = len(tokens)
+
+    index = 0
+    while index < count:
+        if not _is_string_start(tokens[index]):
+            index += 1
+            continue
+        prev = tokens[index - 1] if index >= 1 else None
+        before = tokens[index - 2] if index >= 2 else None
+        kind, context = 'literal', None
+        if prev is not None and before is not None:
+            if prev.string == '(' and before.type == tokenize.NAME:
+                kind, context = 'call', before.string
+            elif prev.string == '=' and before.type == tokenize.NAME:
+                kind, context = 'kwarg', before.string
+            elif prev.string == ':' and before.type == tokenize.STRING:
+                kind, context = 'dict', _literal_value(before)
+        end_index = _string_group_end(tokens, index)
+        yield _make_span(offsets, tokens, index, end_index, kind, context)
+        index = end_index
@@ -0,0 +1,136 @@
+import re
+
+from chunked_io import CHUNK_SIZE, finditer_file
+
+# Khoảng trắng tối đa quanh cụm từ trong <bold> được tính vào độ dài match khi quét theo cửa sổ
+_BOLD_WHITESPACE = 128
+
+
+def build_trie_pattern(terms):
+    """Gộp danh sách cụm từ thành một regex dạng trie (ưu tiên cụm dài nhất)"""
+    trie = {}
+    for term in terms:
+        if not term:
+            continue
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+    if not trie:
+        return None
+    return _trie_to_pattern(trie)
+
+
+def _trie_to_pattern(node):
+    """Chuyển một nút trie thành chuỗi regex"""
+    # Nén các nhánh chỉ có một con thành chuỗi literal để giảm độ sâu lồng nhau
+    branches = []
+    has_end = '' in node
+    for char in sorted(key for key in node if key):
+        literal = char
+        child = node[char]
+        while len(child) == 1 and '' not in child:
+            next_char = next(iter(child))
+            literal += next_char
+            child = child[next_char]
+        if child == {'': True}:
+            branches.append(re.escape(literal))
+        else:
+            branches.append(re.escape(literal) + _trie_to_pattern(child))
+
+    if not branches:
+        return ''
+    if len(branches) == 1 and not has_end:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    # Nút kết thúc đặt sau cùng để regex thử cụm dài hơn trước
+    return pattern + '?' if has_end else pattern
+
+
+class ReplaceEngine:
+    """Thay thế đồng thời tất cả cặp msgstr -> msgid trong một lần quét nội dung
+
+    Mọi cụm từ được gộp vào một regex duy nhất; nên dựng qua patterns.MATCHERS
+    để dùng lại bộ đã biên dịch khi catalog không đổi.
+    """
+
+    def __init__(self, pairs):
+        # Giữ cặp đầu tiên cho mỗi msgstr, giống thứ tự xử lý block trước đây
+        self.replacements = {}
+        for search_text, replace_text in pairs:
+            if search_text and replace_text:
+                self.replacements.setdefault(search_text, replace_text)
+
+        trie = build_trie_pattern(self.replacements)
+        if trie is None:
+            self.pattern = None
+            self.max_match_length = 0
+            return
+        # Độ dài match dài nhất (trừ khoảng trắng quá dài trong <bold>), dùng làm phần chồng lấn
+        self.max_match_length = (max(len(search_text) for search_text in self.replacements) +
+                                 len('<bold></bold>') + _BOLD_WHITESPACE)
+
+        self.pattern = re.compile(
+            r'(?P<quote>["\'])(?P<quoted>' + trie + r')(?P=quote)'
+            r'|<bold>\s*(?P<bold>' + trie + r')\s*</bold>'
+            r'|>(?P<xml>' + trie + r')<'
+        )
+
+    def __bool__(self):
+        return self.pattern is not None
+
+    def apply(self, content):
+        """Trả về (nội dung mới, danh sách (msgstr, msgid) đã thay thế)"""
+        if self.pattern is None:
+            return content, []
+
+        replaced = []
+
+        def _substitute(match):
+            result, search_text, replace_text = self._replacement(match)
+            replaced.append((search_text, replace_text))
+            return result
+
+        new_content = self.pattern.sub(_substitute, content)
+        return new_content, replaced
+
+    def iter_edits(self, content):
+        """Trả về (start, end, text mới, msgstr, msgid) cho từng chỗ cần thay, không dựng nội dung mới"""
+        if self.pattern is None:
+            return
+        for match in self.pattern.finditer(content):
+            result, search_text, replace_text = self._replacement(match)
+            yield match.start(), match.end(), result, search_text, replace_text
+
+    def iter_file_edits(self, file_path, chunk_size=CHUNK_SIZE):
+        """Như iter_edits nhưng đọc file theo từng cửa sổ, bộ nhớ không phụ thuộc kích thước file
+
+        Bỏ qua các chỗ mà text mới trùng với text cũ. Offset theo ký tự (đọc với newline=None).
+        """
+        if self.pattern is None:
+            return
+        for offset, match in finditer_file(self.pattern, file_path, self.max_match_length, chunk_size):
+            result, search_text, replace_text = self._replacement(match)
+            if result != match.group(0):
+                yield offset + match.start(), offset + match.end(), result, search_text, replace_text
+
+    def _replacement(self, match):
+        """Tính text thay thế cho một match: (text mới, msgstr, msgid)"""
+        kind = match.lastgroup
+        if kind == 'quoted':
+            search_text = match.group('quoted')
+            replace_text = self.replacements[search_text]
+            quote = match.group('quote')
+            # Giữ nguyên logic cũ: dùng nháy kép nếu bản dịch chứa nháy đơn
+            if quote == "'" and "'" in replace_text:
+                quote = '"'
+            result = f'{quote}{replace_text}{quote}'
+        elif kind == 'bold':
+            search_text = match.group('bold')
+            replace_text = self.replacements[search_text]
+            result = f'<bold>{replace_text}</bold>'
+        else:
+            search_text = match.group('xml')
+            replace_text = self.replacements[search_text]
+            result = f'>{replace_text}<'
+        return result, search_text, replace_text
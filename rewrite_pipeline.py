@@ -0,0 +1,241 @@
+import logging
+from pathlib import Path
+
+from change_plan import ChangePlan, FileChange
+from file_walker import VIETNAMESE_BYTES, BytePrefilter, walk_files
+from i18n_log_van_ban_bot import I18nLogVanBanBot
+from metrics import METRICS, echo, log_item
+from odoo_import import add_odoo_import
+from po_catalog import po_unescape
+from python_strings import EXCEPTION_NAMES
+from special_cases_bot import wrap_validation_messages
+from translation_name_bot import NAME_NEEDLES, process_name_translations
+from translation_replace_bot import catalog_prefilter, xml_translate_function
+from worker_pool import imap_tasks
+from xml_translator import rewrite_content as rewrite_xml_content
+
+
+# Các bước của pipeline theo thứ tự mặc định
+PASS_NAMES = ('validation', 'name', 'log_van_ban', 'replace')
+
+
+class RewritePass:
+    """Một bước viết lại nội dung file trong pipeline
+
+    - name: tên bước, dùng cho log và tuỳ chọn --passes
+    - extensions: các đuôi file bước này xử lý
+    - needs_import: bước này sinh ra _() nên cần import _ từ odoo
+    - needles/byte_patterns: file phải chứa một chuỗi (hoặc khớp một regex byte) trong đây thì
+      bước này mới có thể thay đổi; để trống nếu không lọc trước được
+    """
+
+    name = ''
+    extensions = ('.py',)
+    needs_import = False
+    needles = ()
+    byte_patterns = ()
+
+    def accepts(self, file_path):
+        return Path(file_path).suffix in self.extensions
+
+    def can_prefilter(self):
+        return bool(self.needles or self.byte_patterns)
+
+    def rewrite(self, content, file_path=None):
+        """Trả về nội dung mới (không đọc/ghi file)"""
+        raise NotImplementedError
+
+
+class ValidationErrorPass(RewritePass):
+    """Bọc message của raise ValidationError(...) bằng _()"""
+
+    name = 'validation'
+    needs_import = True
+    needles = EXCEPTION_NAMES
+
+    def rewrite(self, content, file_path=None):
+        return wrap_validation_messages(content)
+
+
+class NameDictPass(RewritePass):
+    """Bọc giá trị 'name': '...' bằng _()"""
+
+    name = 'name'
+    needs_import = True
+    needles = NAME_NEEDLES
+
+    def accepts(self, file_path):
+        file_path = Path(file_path)
+        # Giống translation_name_bot: bỏ qua __manifest__.py và thư mục i18n
+        return (file_path.suffix == '.py' and
+                file_path.name != '__manifest__.py' and
+                'i18n' not in file_path.parent.parts)
+
+    def rewrite(self, content, file_path=None):
+        if not any(needle in content for needle in NAME_NEEDLES):
+            return content
+        return process_name_translations(content)
+
+
+class CatalogReplacePass(RewritePass):
+    """Thay msgstr bằng msgid của catalog trong code và view"""
+
+    name = 'replace'
+    extensions = ('.py', '.xml', '.csv', '.txt', '.html', '.js', '.css')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.xml_translate = xml_translate_function(engine)
+        prefilter = catalog_prefilter(po_unescape(text) for text in engine.replacements)
+        self.byte_patterns = (prefilter.pattern.pattern,) if prefilter else ()
+
+    def rewrite(self, content, file_path=None):
+        if file_path is not None and Path(file_path).suffix == '.xml':
+            # XML: chỉ thay text node và thuộc tính hiển thị
+            return rewrite_xml_content(content, self.xml_translate)[0]
+        return self.engine.apply(content)[0]
+
+
+class LogVanBanPass(RewritePass):
+    """Bọc text tiếng Việt trong HTML/notify/Markup của log_van_ban.py"""
+
+    name = 'log_van_ban'
+    needs_import = True
+    # Chỉ text có dấu tiếng Việt mới được bọc
+    byte_patterns = (VIETNAMESE_BYTES,)
+
+    def __init__(self, file_names=('log_van_ban.py',)):
+        self.file_names = set(file_names)
+        self.bot = I18nLogVanBanBot('.')
+
+    def accepts(self, file_path):
+        return Path(file_path).name in self.file_names
+
+    def rewrite(self, content, file_path=None):
+        return self.bot.rewrite(content)
+
+
+def build_passes(names, module_path, dry_run=False):
+    """Tạo các bước theo tên, trả về (danh sách bước, các file không xử lý như file PO của catalog)
+
+    dry_run: không ghi gì ra đĩa khi đọc catalog (kể cả snapshot).
+    """
+    passes = []
+    exclude_files = []
+    for name in names:
+        if name == 'validation':
+            passes.append(ValidationErrorPass())
+        elif name == 'name':
+            passes.append(NameDictPass())
+        elif name == 'log_van_ban':
+            passes.append(LogVanBanPass())
+        elif name == 'replace':
+            from translation_replace_bot import TranslationReplaceBot
+            replace_bot = TranslationReplaceBot(module_path, dry_run=dry_run)
+            passes.append(CatalogReplacePass(replace_bot._build_engine(replace_bot.parse_po_file())))
+            exclude_files.append(replace_bot.po_file)
+        else:
+            raise ValueError(f'Bước không hợp lệ: {name}')
+    return passes, exclude_files
+
+
+class RewritePipeline:
+    """Đọc mỗi file một lần, chạy lần lượt các bước trong bộ nhớ,
+    sửa import _ một lần duy nhất rồi ghi file tối đa một lần"""
+
+    def __init__(self, passes, jobs=1, dry_run=False):
+        self.passes = list(passes)
+        self.jobs = jobs
+        # dry_run: chỉ lập kế hoạch thay đổi, không ghi file
+        self.dry_run = dry_run
+        self._prefilters = {}
+
+    def rewrite_content(self, file_path, content):
+        """Chạy các bước trên nội dung, trả về (nội dung mới, tên các bước đã thay đổi)"""
+        changed_passes = []
+        needs_import = False
+        for rewrite_pass in self.passes:
+            if not rewrite_pass.accepts(file_path):
+                continue
+            new_content = rewrite_pass.rewrite(content, file_path)
+            if new_content != content:
+                changed_passes.append(rewrite_pass.name)
+                needs_import = needs_import or rewrite_pass.needs_import
+                content = new_content
+
+        # Bước sửa import dùng chung, chỉ chạy khi có bước sinh ra _()
+        if needs_import and Path(file_path).suffix == '.py':
+            content = add_odoo_import(content)
+        return content, changed_passes
+
+    def process_file(self, file_path):
+        """Xử lý một file (không ghi), trả về FileChange hoặc None nếu không đổi"""
+        METRICS.count('files_scanned')
+        with METRICS.timer('read'):
+            with open(file_path, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+
+        with METRICS.timer('match'):
+            new_content, changed_passes = self.rewrite_content(file_path, content)
+        return FileChange.from_contents(file_path, content, new_content, newline='',
+                                        notes=changed_passes)
+
+    def collect_files(self, module_path, exclude_files=()):
+        """Lấy các file mà ít nhất một bước xử lý, theo thứ tự ổn định"""
+        with METRICS.timer('walk'):
+            return self.select_files(walk_files(module_path), exclude_files)
+
+    def select_files(self, file_paths, exclude_files=()):
+        """Giữ lại các file có bước nhận xử lý và qua được bộ lọc byte của các bước đó"""
+        exclude_files = {str(path) for path in exclude_files}
+        selected = []
+        for file_path in file_paths:
+            if str(file_path) in exclude_files:
+                continue
+            passes = self.accepting_passes(file_path)
+            if not passes:
+                continue
+            if self.prefilter_for(passes)(file_path):
+                selected.append(file_path)
+            else:
+                METRICS.count('files_prefiltered')
+        return selected
+
+    def accepting_passes(self, file_path):
+        return tuple(rewrite_pass for rewrite_pass in self.passes if rewrite_pass.accepts(file_path))
+
+    def prefilter_for(self, passes):
+        """Bộ lọc byte gộp của các bước nhận cùng một file, dựng một lần cho mỗi tổ hợp bước"""
+        if passes not in self._prefilters:
+            self._prefilters[passes] = self._prefilter(passes)
+        return self._prefilters[passes]
+
+    def _prefilter(self, passes):
+        """Gộp bộ lọc byte của các bước; không lọc nếu có bước không lọc trước được"""
+        if not all(rewrite_pass.can_prefilter() for rewrite_pass in passes):
+            return BytePrefilter()
+        needles = [needle for rewrite_pass in passes for needle in rewrite_pass.needles]
+        byte_patterns = [pattern for rewrite_pass in passes for pattern in rewrite_pass.byte_patterns]
+        return BytePrefilter(needles, byte_patterns)
+
+    def run(self, file_paths):
+        """Chạy pipeline trên danh sách file, trả về ChangePlan
+
+        Các file được lập kế hoạch song song, sau đó tiến trình chính ghi lần lượt
+        (bỏ qua khi dry_run).
+        """
+        plan = ChangePlan()
+        for file_path, change, error in imap_tasks(self.process_file, file_paths, self.jobs):
+            if error:
+                logging.error(f'Lỗi khi xử lý file {file_path}: {error}')
+            elif change is not None:
+                plan.add(change)
+                METRICS.count('files_changed')
+                echo(f"Đã xử lý file: {file_path} ({', '.join(change.notes)})")
+                log_item(f'Đã xử lý file: {file_path} ({", ".join(change.notes)})',
+                         file=str(file_path), passes=change.notes)
+
+        if not self.dry_run:
+            for file_path, error in plan.apply():
+                logging.error(f'Lỗi khi ghi file {file_path}: {error}')
+        return plan
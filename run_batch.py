@@ -0,0 +1,81 @@
+import argparse
+import sys
+from batch_runner import STEPS, BatchRunner, discover_modules
+from change_plan import add_plan_arguments, is_dry_run, report_plan
+from glossary import add_glossary_arguments
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
+from worker_pool import add_jobs_argument
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+
+if __name__ == '__main__':
+    # Mặc định là thư mục chứa các module (cha của module chứa tools)
+    ADDONS_PATH = '../../'
+
+    parser = add_jobs_argument(argparse.ArgumentParser())
+    parser.add_argument('addons_path', nargs='*', default=[ADDONS_PATH],
+                        help='Addons path hoặc thư mục module (có thể truyền nhiều, '
+                             'ngăn cách bằng dấu phẩy như --addons-path của Odoo)')
+    parser.add_argument('--modules', help='Chỉ chạy các module này (ngăn cách bằng dấu phẩy)')
+    parser.add_argument('--steps', default=','.join(STEPS),
+                        help=f'Các bước chạy, theo thứ tự (mặc định: {",".join(STEPS)})')
+    parser.add_argument('--languages', help='Chỉ dịch các ngôn ngữ này, ví dụ vi_VN,fr (mặc định: mọi file i18n/*.po)')
+    parser.add_argument('--source-lang', default='vi_VN',
+                        help='Ngôn ngữ viết trong code, catalog dùng cho bước replace (mặc định: vi_VN)')
+    parser.add_argument('--module-jobs', type=int, default=4,
+                        help='Số module xử lý song song (mặc định 4)')
+    parser.add_argument('--memory', default=str(DEFAULT_MEMORY_PATH),
+                        help='File bộ nhớ dịch dùng chung giữa các module')
+    parser.add_argument('--memory-size', type=int, default=200000,
+                        help='Số bản ghi tối đa trong bộ nhớ dịch')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Không dùng bộ nhớ dịch')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Số request dịch chạy song song (asyncio)')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Số request tối đa mỗi giây tới dịch vụ dịch')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Chỉ xử lý các file/phần tử thay đổi từ lần chạy trước')
+    parser.add_argument('--use-index', action='store_true',
+                        help='Bước replace dùng chỉ mục chuỗi để chỉ quét các file có chứa msgstr')
+    add_glossary_arguments(parser)
+    add_plan_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'batch_runner.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+
+    steps = _split(args.steps)
+    for step in steps:
+        if step not in STEPS:
+            parser.error(f'Bước không hợp lệ: {step}')
+    addons_paths = [path for value in args.addons_path for path in _split(value)]
+    modules = discover_modules(addons_paths, set(_split(args.modules)) if args.modules else None)
+    if not modules:
+        parser.error('Không tìm thấy module Odoo nào')
+
+    memory = None
+    if 'format' in steps and not args.no_memory:
+        memory = TranslationMemory(args.memory, args.memory_size)
+
+    with instrument(args):
+        runner = BatchRunner(modules, steps=steps, languages=_split(args.languages),
+                             source_lang=args.source_lang, jobs=args.jobs,
+                             module_jobs=args.module_jobs, memory=memory,
+                             concurrency=args.concurrency, rate=args.rate,
+                             incremental=args.incremental, dry_run=is_dry_run(args),
+                             use_index=args.use_index, glossary_files=args.glossary,
+                             builtin_glossary=not args.no_builtin_glossary)
+        plan, results = runner.run()
+        failed = [result for result in results if result.errors]
+        for result in failed:
+            for step, error in result.errors:
+                print(f'Lỗi ở module {result.module.name}, bước {step}: {error}')
+        if is_dry_run(args):
+            sys.exit(report_plan(plan, args) or (2 if failed else 0))
+        sys.exit(2 if failed else 0)
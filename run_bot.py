@@ -1,8 +1,29 @@
+import argparse
+import sys
+from change_plan import add_plan_arguments, is_dry_run, report_plan
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
 from translation_replace_bot import TranslationReplaceBot
+from worker_pool import add_jobs_argument
 
 if __name__ == '__main__':
     # Street dẫn tới module của bạn
     MODULE_PATH = '../'  # Điều chỉnh đường dẫn nếu cần
     
-    bot = TranslationReplaceBot(MODULE_PATH)
-    bot.find_and_replace() 
\ No newline at end of file
+    parser = add_jobs_argument(argparse.ArgumentParser())
+    parser.add_argument('--incremental', action='store_true',
+                        help='Chỉ xử lý các file thay đổi từ lần chạy trước')
+    parser.add_argument('--use-index', action='store_true',
+                        help='Dùng chỉ mục chuỗi để chỉ quét các file có chứa msgstr')
+    add_plan_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'translation_replace.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    
+    with instrument(args):
+        bot = TranslationReplaceBot(MODULE_PATH, jobs=args.jobs, incremental=args.incremental,
+                                    dry_run=is_dry_run(args), use_index=args.use_index)
+        plan = bot.find_and_replace()
+        if is_dry_run(args):
+            sys.exit(report_plan(plan, args))
@@ -0,0 +1,38 @@
+import argparse
+import sys
+from i18n_coverage import CoverageAnalyzer, print_report, write_json
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
+from worker_pool import add_jobs_argument
+
+CHECKS = ('missing', 'untranslated', 'obsolete')
+
+if __name__ == '__main__':
+    # Đường dẫn tới module
+    MODULE_PATH = '../'
+    
+    parser = add_jobs_argument(argparse.ArgumentParser(description='Độ phủ bản dịch của catalog so với code'))
+    parser.add_argument('--json', metavar='FILE', help='Ghi báo cáo chi tiết ra file JSON')
+    parser.add_argument('--limit', type=int, default=20, help='Số dòng tối đa mỗi bảng')
+    parser.add_argument('--fail-on', default='',
+                        help=f'Thoát với mã 1 nếu có text thuộc các loại này ({",".join(CHECKS)})')
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'i18n_coverage.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    
+    checks = [check.strip() for check in args.fail_on.split(',') if check.strip()]
+    for check in checks:
+        if check not in CHECKS:
+            parser.error(f'Loại không hợp lệ: {check}')
+    
+    with instrument(args):
+        report = CoverageAnalyzer(MODULE_PATH, jobs=args.jobs).analyze()
+        print_report(report, limit=args.limit)
+        if args.json:
+            write_json(report, args.json)
+    
+    failed = [check for check in checks if getattr(report.total, check)]
+    if failed:
+        print(f"Không đạt: {', '.join(f'{check}={len(getattr(report.total, check))}' for check in failed)}")
+        sys.exit(1)
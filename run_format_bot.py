@@ -1,8 +1,44 @@
+import argparse
+import sys
+from change_plan import add_plan_arguments, is_dry_run, report_plan
+from glossary import Glossary, add_glossary_arguments
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
 from translation_format_bot import TranslationFormatBot
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
 
 if __name__ == '__main__':
     # Đường dẫn tới module
     MODULE_PATH = '../'
     
-    bot = TranslationFormatBot(MODULE_PATH)
-    bot.format_and_translate() 
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--memory', default=str(DEFAULT_MEMORY_PATH),
+                        help='File bộ nhớ dịch dùng chung giữa các module')
+    parser.add_argument('--memory-size', type=int, default=200000,
+                        help='Số bản ghi tối đa trong bộ nhớ dịch')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Không dùng bộ nhớ dịch')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Số request dịch chạy song song (asyncio)')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Số request tối đa mỗi giây tới dịch vụ dịch')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Chỉ dịch các phần tử mới hoặc đã sửa từ lần chạy trước')
+    add_glossary_arguments(parser)
+    add_plan_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'translation_format.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    
+    memory = None if args.no_memory else TranslationMemory(args.memory, args.memory_size)
+    glossary = Glossary.for_module(MODULE_PATH, args.glossary, builtin=not args.no_builtin_glossary)
+    
+    with instrument(args):
+        bot = TranslationFormatBot(MODULE_PATH, memory=memory,
+                                   concurrency=args.concurrency, rate=args.rate,
+                                   incremental=args.incremental, dry_run=is_dry_run(args),
+                                   glossary=glossary)
+        plan = bot.format_and_translate()
+        if is_dry_run(args):
+            sys.exit(report_plan(plan, args))
@@ -1,15 +1,29 @@
 # quan_ly_van_ban/tools/run_i18n_bot.py
 
+import argparse
+import sys
 from pathlib import Path
+from change_plan import add_plan_arguments, is_dry_run, report_plan
 from i18n_log_van_ban_bot import I18nLogVanBanBot
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
 
 def main():
+    parser = add_metrics_arguments(add_plan_arguments(argparse.ArgumentParser()))
+    add_logging_arguments(parser, 'i18n_log_van_ban.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    
     # Lấy đường dẫn tới module quan_ly_van_ban
     module_path = Path(__file__).parent.parent
     
     # Khởi tạo và chạy bot
-    bot = I18nLogVanBanBot(module_path)
-    bot.process_file()
+    bot = I18nLogVanBanBot(module_path, dry_run=is_dry_run(args))
+    with instrument(args):
+        plan = bot.process_file()
+    if is_dry_run(args):
+        return report_plan(plan, args)
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
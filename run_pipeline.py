@@ -0,0 +1,32 @@
+import argparse
+import sys
+from change_plan import add_plan_arguments, is_dry_run, report_plan
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
+from rewrite_pipeline import PASS_NAMES, RewritePipeline, build_passes
+from worker_pool import add_jobs_argument
+
+if __name__ == '__main__':
+    # Đường dẫn tới module
+    MODULE_PATH = '../'
+    
+    parser = add_jobs_argument(argparse.ArgumentParser())
+    parser.add_argument('--passes', default=','.join(PASS_NAMES),
+                        help=f'Các bước chạy, theo thứ tự (mặc định: {",".join(PASS_NAMES)})')
+    add_plan_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'rewrite_pipeline.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    
+    try:
+        passes, exclude_files = build_passes(
+            [name.strip() for name in args.passes.split(',')], MODULE_PATH, dry_run=is_dry_run(args))
+    except ValueError as e:
+        parser.error(str(e))
+    
+    with instrument(args):
+        pipeline = RewritePipeline(passes, jobs=args.jobs, dry_run=is_dry_run(args))
+        plan = pipeline.run(pipeline.collect_files(MODULE_PATH, exclude_files))
+        if is_dry_run(args):
+            sys.exit(report_plan(plan, args))
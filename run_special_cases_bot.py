@@ -1,8 +1,27 @@
+import argparse
+import sys
+from change_plan import add_plan_arguments, is_dry_run, report_plan
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
 from special_cases_bot import ValidationMessageBot
+from worker_pool import add_jobs_argument
 
 if __name__ == '__main__':
     # Đường dẫn tới module
     MODULE_PATH = '../'
     
-    bot = ValidationMessageBot(MODULE_PATH)
-    bot.process_files() 
\ No newline at end of file
+    parser = add_jobs_argument(argparse.ArgumentParser())
+    parser.add_argument('--incremental', action='store_true',
+                        help='Chỉ xử lý các file thay đổi từ lần chạy trước')
+    add_plan_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'validation_message.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    
+    with instrument(args):
+        bot = ValidationMessageBot(MODULE_PATH, jobs=args.jobs, incremental=args.incremental,
+                                   dry_run=is_dry_run(args))
+        plan = bot.process_files()
+        if is_dry_run(args):
+            sys.exit(report_plan(plan, args))
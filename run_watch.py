@@ -0,0 +1,36 @@
+import argparse
+from change_plan import add_plan_arguments, is_dry_run, report_plan
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import add_metrics_arguments, instrument
+from module_watcher import ModuleWatcher
+from rewrite_pipeline import PASS_NAMES
+
+if __name__ == '__main__':
+    # Đường dẫn tới module
+    MODULE_PATH = '../'
+    
+    parser = argparse.ArgumentParser(description='Theo dõi module và áp dụng các bước viết lại khi lưu file')
+    parser.add_argument('--passes', default=','.join(PASS_NAMES),
+                        help=f'Các bước chạy, theo thứ tự (mặc định: {",".join(PASS_NAMES)})')
+    parser.add_argument('--interval', type=float, default=0.2,
+                        help='Số giây giữa hai lần quét module (mặc định 0.2)')
+    parser.add_argument('--debounce', type=float, default=0.05,
+                        help='Chờ yên bao nhiêu giây sau thay đổi cuối cùng mới xử lý (mặc định 0.05)')
+    parser.add_argument('--initial', action='store_true',
+                        help='Chạy một lượt trên toàn module trước khi bắt đầu theo dõi')
+    add_plan_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'module_watcher.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    
+    pass_names = [name.strip() for name in args.passes.split(',')]
+    for name in pass_names:
+        if name not in PASS_NAMES:
+            parser.error(f'Bước không hợp lệ: {name}')
+    
+    with instrument(args):
+        report = (lambda plan: report_plan(plan, args)) if is_dry_run(args) else None
+        watcher = ModuleWatcher(MODULE_PATH, pass_names, interval=args.interval, debounce=args.debounce,
+                                dry_run=is_dry_run(args), report=report)
+        watcher.watch(initial=args.initial)
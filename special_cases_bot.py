@@ -1,89 +1,133 @@
 import re
 from pathlib import Path
 import logging
-import ast
-from lib2to3.fixer_base import BaseFix
-from lib2to3.refactor import RefactoringTool
+import tokenize
+from change_plan import ChangePlan, FileChange
+from file_walker import BytePrefilter, walk_files
+from incremental_state import IncrementalState
+from metrics import METRICS, echo, log_item
+from odoo_import import add_odoo_import
+from patterns import PATTERNS
+from python_strings import EXCEPTION_NAMES, extract_strings, wrap_spans
+from worker_pool import imap_tasks
+
+# File không nhắc tới ValidationError/UserError thì không cần đọc
+EXCEPTION_PREFILTER = BytePrefilter(EXCEPTION_NAMES)
 
-# Thiết lập logging
-logging.basicConfig(
-    filename='validation_message.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s'
-)
 
 class ValidationMessageBot:
-    def __init__(self, module_path):
+    def __init__(self, module_path, jobs=1, incremental=False, dry_run=False):
         self.module_path = Path(module_path)
+        self.jobs = jobs
+        self.incremental = incremental
+        # dry_run: chỉ lập kế hoạch thay đổi, không ghi file
+        self.dry_run = dry_run
         
     def process_files(self):
-        """Xử lý tất cả các file Python trong module"""
-        python_files = self.module_path.rglob('*.py')
+        """Xử lý tất cả các file Python trong module, trả về ChangePlan"""
+        with METRICS.timer('walk'):
+            python_files = list(walk_files(self.module_path, {'.py'}))
+        # Chỉ đọc các file có nhắc tới ValidationError/UserError (lọc trên byte)
+        with METRICS.timer('prefilter'):
+            candidates = EXCEPTION_PREFILTER.filter(python_files)
+        METRICS.count('files_prefiltered', len(python_files) - len(candidates))
+        python_files = candidates
+        
+        # Chế độ incremental: chỉ xử lý file mới hoặc đã thay đổi từ lần chạy trước
+        state = None
+        if self.incremental:
+            state = IncrementalState(self.module_path, 'validation_message')
+            python_files = state.changed_files(python_files)
         
-        print("\nBắt đầu xử lý các file Python...")
-        for file_path in python_files:
-            try:
-                self._process_file(file_path)
-            except Exception as e:
-                logging.error(f'Lỗi khi xử lý file {file_path}: {str(e)}')
+        plan = ChangePlan()
+        failed = set()
+        echo("\nBắt đầu xử lý các file Python...")
+        for file_path, change, error in imap_tasks(self._process_file, python_files, self.jobs):
+            if error:
+                logging.error(f'Lỗi khi xử lý file {file_path}: {error}')
+                failed.add(file_path)
+            elif change is not None:
+                plan.add(change)
+                METRICS.count('files_changed')
+                echo(f"Đã xử lý file: {file_path}")
+                log_item(f'Đã xử lý file: {file_path}', file=str(file_path))
+                
+        if self.dry_run:
+            return plan
+            
+        for file_path, error in plan.apply():
+            logging.error(f'Lỗi khi ghi file {file_path}: {error}')
+            failed.add(file_path)
+                
+        if state is not None:
+            # File lỗi không được ghi nhận để lần sau xử lý lại
+            state.record_files([f for f in python_files if f not in failed])
+            state.save()
+        return plan
                 
     def _process_file(self, file_path):
-        """Xử lý một file Python"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        """Xử lý một file Python, trả về FileChange (None nếu không cần sửa)"""
+        METRICS.count('files_scanned')
+        with METRICS.timer('read'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
             
-        # Kiểm tra xem file có ValidationError không
-        if 'ValidationError' not in content:
-            return
+        with METRICS.timer('match'):
+            new_content = wrap_validation_messages(content)
             
-        # Tìm các ValidationError message
-        validation_pattern = r'raise\s+ValidationError\((.*?)\)'
-        matches = re.finditer(validation_pattern, content, re.DOTALL)
-        
-        if not matches:
-            return
+        if new_content == content:
+            return None
             
-        # Kiểm tra và thêm import _
-        import_added = False
-        new_content = content
+        # Thêm import _ nếu chưa có
+        new_content = add_odoo_import(new_content)
+        return FileChange.from_contents(file_path, content, new_content)
+
+
+def wrap_validation_messages(content):
+    """Bọc message của các ValidationError/UserError bằng _() (không xử lý import)"""
+    # Kiểm tra xem file có ValidationError/UserError không
+    if not any(name in content for name in EXCEPTION_NAMES):
+        return content
         
-        for match in matches:
-            message = match.group(1)
-            
-            # Bỏ qua nếu đã có _() hoặc _lt()
-            if '_(' in message or '_lt(' in message:
-                continue
-                
-            # Thêm import _ nếu chưa có
-            if not import_added:
-                if 'from odoo import' in content:
-                    if 'from odoo import _' not in content:
-                        new_content = re.sub(
-                            r'from odoo import (.*?)\n',
-                            lambda m: f'from odoo import _, {m.group(1)}\n' if m.group(1) else 'from odoo import _\n',
-                            new_content
-                        )
-                else:
-                    new_content = 'from odoo import _\n' + new_content
-                import_added = True
+    # Tìm chính xác vị trí các chuỗi message bằng tokenizer
+    try:
+        spans = extract_strings(content, dict_keys=(), kwarg_names=())
+    except (tokenize.TokenError, SyntaxError):
+        # File chưa hợp lệ cú pháp: dùng cách tìm bằng regex như cũ
+        return _wrap_validation_messages_regex(content)
+        
+    return wrap_spans(content, spans)
+
+
+_VALIDATION_PATTERN = PATTERNS.compile(
+    'validation.raise_message', r'raise\s+ValidationError\((.*?)\)', re.DOTALL
+)
+
+
+def _wrap_validation_messages_regex(content):
+    """Cách cũ: tìm ValidationError message bằng regex"""
+    matches = _VALIDATION_PATTERN.finditer(content)
+    
+    new_content = content
+    for match in matches:
+        message = match.group(1)
+        
+        # Bỏ qua nếu đã có _() hoặc _lt()
+        if '_(' in message or '_lt(' in message:
+            continue
             
-            # Xử lý message
-            if message.startswith('f'):
-                # f-string
-                new_message = f'_(f{message[1:]})'
-            else:
-                # Normal string
-                new_message = f'_({message})'
-                
-            # Thay thế trong content
-            new_content = new_content.replace(
-                f'raise ValidationError({message})',
-                f'raise ValidationError({new_message})'
-            )
+        # Xử lý message
+        if message.startswith('f'):
+            # f-string
+            new_message = f'_(f{message[1:]})'
+        else:
+            # Normal string
+            new_message = f'_({message})'
             
-        # Ghi file nếu có thay đổi
-        if new_content != content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            print(f"Đã xử lý file: {file_path}")
-            logging.info(f'Đã xử lý file: {file_path}') 
\ No newline at end of file
+        # Thay thế trong content
+        new_content = new_content.replace(
+            f'raise ValidationError({message})',
+            f'raise ValidationError({new_message})'
+        )
+        
+    return new_content
@@ -0,0 +1,325 @@
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import sys
+import tokenize
+from pathlib import Path
+
+from cache_paths import cache_path
+from file_walker import walk_files
+from metrics import METRICS
+from patterns import PATTERNS
+from po_catalog import po_unescape
+from python_strings import iter_literals
+from text_utils import normalize_text
+from worker_pool import add_jobs_argument, imap_tasks
+from xml_translator import plan_file as plan_xml_file
+
+# Tăng khi cách trích chuỗi đổi để chỉ mục cũ được dựng lại
+INDEX_VERSION = 3
+INDEXED_EXTENSIONS = frozenset({'.py', '.xml', '.js', '.csv'})
+SKIPPED_DIRS = frozenset({'__pycache__', 'node_modules', 'i18n'})
+
+_JS_STRING_PATTERN = PATTERNS.compile('index.js_string', r'''(["'])((?:\\.|(?!\1)[^\\\n])*)\1''')
+_JS_CALL_PATTERN = PATTERNS.compile('index.js_call', r'([A-Za-z_$][\w$]*)\s*\(\s*$')
+# Text giữa hai thẻ HTML nằm trong một chuỗi: '<p>Văn bản</p>'
+_HTML_TEXT_PATTERN = PATTERNS.compile('index.html_text', r'>([^<>]*[^\s<>][^<>]*)<')
+# Tên model khai báo trong file Python
+_MODEL_NAME_PATTERN = PATTERNS.compile(
+    'index.model_name', r'^\s+_(?:name|inherit)\s*=\s*[\'"]([\w.]+)[\'"]', re.MULTILINE
+)
+
+
+class Occurrence:
+    """Một lần xuất hiện của chuỗi trong code
+
+    - path: đường dẫn file
+    - start/end: offset ký tự của literal/text node trong file
+    - kind: 'call', 'kwarg', 'dict', 'literal' (Python/JS), 'text', 'attribute' (XML),
+      'html' (text giữa các thẻ trong một chuỗi), 'csv'
+    - context: tên hàm, tham số, key, thẻ, thuộc tính hoặc cột tuỳ theo kind; với XML kèm
+      scope của text sau '@' (ví dụ 'form@arch', 'field@field:ir.ui.view:model'), xem XmlEdit.scope
+    """
+
+    __slots__ = ('path', 'start', 'end', 'kind', 'context')
+
+    def __init__(self, path, start, end, kind, context):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.context = context
+
+    def __repr__(self):
+        return f'Occurrence({self.path!r}, {self.start}, {self.end}, {self.kind!r}, {self.context!r})'
+
+
+def _has_letters(text):
+    return any(char.isalpha() for char in text)
+
+
+def _with_html_texts(rows, value, start, end, context):
+    """Thêm các text node HTML nằm trong một chuỗi (cùng vị trí với chuỗi đó)"""
+    if '<' in value:
+        for match in _HTML_TEXT_PATTERN.finditer(value):
+            rows.append((match.group(1), start, end, 'html', context))
+
+
+def _extract_python(content):
+    rows = []
+    try:
+        spans = list(iter_literals(content))
+    except (tokenize.TokenError, SyntaxError):
+        return rows
+    for span in spans:
+        if span.text is None:
+            continue
+        rows.append((span.text, span.start, span.end, span.kind, span.context))
+        _with_html_texts(rows, span.text, span.start, span.end, span.context)
+    return rows
+
+
+def _extract_javascript(content):
+    rows = []
+    for match in _JS_STRING_PATTERN.finditer(content):
+        value = po_unescape(match.group(2).replace("\\'", "'"))
+        call = _JS_CALL_PATTERN.search(content, max(0, match.start() - 64), match.start())
+        kind, context = ('call', call.group(1)) if call else ('literal', None)
+        rows.append((value, match.start(), match.end(), kind, context))
+        _with_html_texts(rows, value, match.start(), match.end(), context)
+    return rows
+
+
+def _extract_xml(file_path):
+    # translate=None: chỉ liệt kê text node/thuộc tính dịch được, offset theo file gốc
+    rows = []
+    for edit in plan_xml_file(file_path, None):
+        context = f'{edit.name}@{edit.scope}' if edit.scope else edit.name
+        rows.append((edit.old, edit.start, edit.end, edit.kind, context))
+    return rows
+
+
+def _extract_csv(content):
+    rows = []
+    line_offsets = [0]
+    for line in content.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+    reader = csv.reader(content.splitlines(keepends=True))
+    header = None
+    start_line = 0
+    for row in reader:
+        start = line_offsets[min(start_line, len(line_offsets) - 1)]
+        end = line_offsets[min(reader.line_num, len(line_offsets) - 1)]
+        start_line = reader.line_num
+        if header is None:
+            header = row
+            continue
+        for column, value in enumerate(row):
+            name = header[column] if column < len(header) else None
+            rows.append((value, start, end, 'csv', name))
+    return rows
+
+
+def extract_file(file_path):
+    """Trích các chuỗi của một file, trả về (danh sách (term, start, end, kind, context), models)
+
+    term là text đã chuẩn hoá (NFC, gộp khoảng trắng); chuỗi không có chữ cái bị bỏ qua.
+    """
+    suffix = Path(file_path).suffix
+    models = []
+    if suffix == '.xml':
+        rows = _extract_xml(file_path)
+    else:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+        if suffix == '.py':
+            rows = _extract_python(content)
+            models = sorted(set(_MODEL_NAME_PATTERN.findall(content)))
+        elif suffix == '.js':
+            rows = _extract_javascript(content)
+        else:
+            rows = _extract_csv(content)
+
+    result = []
+    for value, start, end, kind, context in rows:
+        if not _has_letters(value):
+            continue
+        result.append((normalize_text(value), start, end, kind, context))
+    return result, models
+
+
+class StringIndex:
+    """Chỉ mục ngược lưu trên đĩa (SQLite): chuỗi đã chuẩn hoá -> các vị trí xuất hiện trong module
+
+    update() chỉ trích lại các file mới hoặc đã đổi (so mtime/size) nên chạy lại rất nhanh.
+    Đường dẫn lưu tương đối so với module_path; file chỉ mục mặc định nằm trong thư mục cache.
+    """
+
+    def __init__(self, module_path, index_file=None):
+        self.module_path = Path(module_path)
+        self.index_file = Path(index_file) if index_file else cache_path('index', module_path, '.sqlite3')
+        self.connection = sqlite3.connect(str(self.index_file), timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        (version,) = self.connection.execute('PRAGMA user_version').fetchone()
+        if version != INDEX_VERSION:
+            self.connection.execute('DROP TABLE IF EXISTS occurrences')
+            self.connection.execute('DROP TABLE IF EXISTS files')
+            self.connection.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,'
+            ' models TEXT NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS occurrences ('
+            ' term TEXT NOT NULL, path TEXT NOT NULL, start INTEGER NOT NULL,'
+            ' end INTEGER NOT NULL, kind TEXT NOT NULL, context TEXT)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS occurrences_term ON occurrences (term)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS occurrences_path ON occurrences (path)')
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def iter_files(self):
+        """Các file cần đánh chỉ mục, theo thứ tự ổn định"""
+        ignore = tuple(f'{directory}/' for directory in SKIPPED_DIRS)
+        return walk_files(self.module_path, INDEXED_EXTENSIONS, ignore=ignore)
+
+    def _key(self, file_path):
+        return os.path.relpath(file_path, self.module_path)
+
+    def _path(self, key):
+        return self.module_path / key
+
+    def update(self, jobs=1):
+        """Cập nhật chỉ mục theo các file đã đổi, trả về (số file trích lại, số file đã xoá)"""
+        known = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.connection.execute('SELECT path, mtime_ns, size FROM files')
+        }
+        current = {}
+        changed = []
+        with METRICS.timer('walk'):
+            for file_path in self.iter_files():
+                key = self._key(file_path)
+                stat = os.stat(file_path)
+                current[key] = (stat.st_mtime_ns, stat.st_size)
+                if known.get(key) != current[key]:
+                    changed.append(file_path)
+        removed = [key for key in known if key not in current]
+
+        with self.connection:
+            for key in removed:
+                self._delete(key)
+            for file_path, result, error in imap_tasks(extract_file, changed, jobs):
+                key = self._key(file_path)
+                self._delete(key)
+                if error:
+                    # File lỗi vẫn được ghi nhận để không đọc lại cho tới khi file đổi
+                    result = ([], [])
+                rows, models = result
+                self.connection.executemany(
+                    'INSERT INTO occurrences (term, path, start, end, kind, context) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(term, key, start, end, kind, context) for term, start, end, kind, context in rows]
+                )
+                mtime_ns, size = current[key]
+                self.connection.execute(
+                    'INSERT INTO files (path, mtime_ns, size, models) VALUES (?, ?, ?, ?)',
+                    (key, mtime_ns, size, ','.join(models))
+                )
+        METRICS.count('index_files_updated', len(changed))
+        return len(changed), len(removed)
+
+    def rebuild(self, jobs=1):
+        """Xoá và dựng lại toàn bộ chỉ mục"""
+        with self.connection:
+            self.connection.execute('DELETE FROM occurrences')
+            self.connection.execute('DELETE FROM files')
+        return self.update(jobs)
+
+    def _delete(self, key):
+        self.connection.execute('DELETE FROM occurrences WHERE path = ?', (key,))
+        self.connection.execute('DELETE FROM files WHERE path = ?', (key,))
+
+    def _select(self, columns, terms):
+        # SQLite giới hạn số tham số trong một câu lệnh
+        terms = list(terms)
+        for start in range(0, len(terms), 500):
+            chunk = terms[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            yield from self.connection.execute(
+                f'SELECT {columns} FROM occurrences WHERE term IN ({placeholders})', chunk
+            )
+
+    def lookup(self, text):
+        """Các vị trí xuất hiện của text (so sánh sau khi chuẩn hoá)"""
+        return self.lookup_many([text]).get(text, [])
+
+    def lookup_many(self, texts):
+        """Tra cứu nhiều text một lúc, trả về dict {text: [Occurrence]} cho các text có trong code"""
+        keys = {}
+        for text in texts:
+            keys.setdefault(normalize_text(text), []).append(text)
+        found = {}
+        rows = self._select('term, path, start, end, kind, context', keys)
+        for term, path, start, end, kind, context in rows:
+            occurrence = Occurrence(self._path(path), start, end, kind, context)
+            for text in keys[term]:
+                found.setdefault(text, []).append(occurrence)
+        return found
+
+    def files_containing(self, texts):
+        """Tập file (Path) có chứa ít nhất một text trong texts"""
+        keys = {normalize_text(text) for text in texts}
+        return {self._path(path) for (path,) in self._select('DISTINCT path', keys)}
+
+    def iter_occurrences(self):
+        """Duyệt mọi (term, Occurrence) trong chỉ mục"""
+        rows = self.connection.execute(
+            'SELECT term, path, start, end, kind, context FROM occurrences ORDER BY path, start'
+        )
+        for term, path, start, end, kind, context in rows:
+            yield term, Occurrence(self._path(path), start, end, kind, context)
+
+    def file_models(self):
+        """dict {file: [tên model khai báo trong file]}"""
+        return {
+            self._path(path): models.split(',') if models else []
+            for path, models in self.connection.execute('SELECT path, models FROM files')
+        }
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM occurrences').fetchone()[0]
+
+
+def main():
+    """Dựng/cập nhật chỉ mục chuỗi của module và tra cứu"""
+    parser = add_jobs_argument(argparse.ArgumentParser(description='Chỉ mục chuỗi trong code của module'))
+    parser.add_argument('--module', default='../', help='Đường dẫn module (mặc định: ../)')
+    parser.add_argument('--rebuild', action='store_true', help='Dựng lại chỉ mục từ đầu')
+    parser.add_argument('--lookup', action='append', default=[], metavar='TEXT',
+                        help='Tìm vị trí xuất hiện của TEXT (dùng nhiều lần được)')
+    args = parser.parse_args()
+
+    index = StringIndex(args.module)
+    try:
+        updated, removed = index.rebuild(args.jobs) if args.rebuild else index.update(args.jobs)
+        print(f'Đã cập nhật {updated} file, xoá {removed} file; chỉ mục có {len(index)} chuỗi')
+        found = index.lookup_many(args.lookup)
+        for text in args.lookup:
+            occurrences = found.get(text, [])
+            print(f'\n"{text}": {len(occurrences)} lần')
+            for occurrence in occurrences:
+                print(f'  {occurrence.path}:{occurrence.start} {occurrence.kind} {occurrence.context or ""}')
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
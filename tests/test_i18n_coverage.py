@@ -0,0 +1,76 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import cache_paths  # noqa: E402
+from i18n_coverage import CoverageAnalyzer  # noqa: E402
+
+VIEW_XML = '''<?xml version="1.0" encoding="utf-8"?>
+<odoo>
+    <record id="view_van_ban_den_form" model="ir.ui.view">
+        <field name="name">van.ban.den.form</field>
+        <field name="model">van.ban.den</field>
+        <field name="priority">16</field>
+        <field name="arch" type="xml">
+            <form string="Văn bản đến">
+                <sheet>
+                    <label for="so_ky_hieu" string="Số ký hiệu"/>
+                    <field name="so_ky_hieu" placeholder="Nhập số ký hiệu"/>
+                    <div class="o_note">Văn bản chưa được xử lý</div>
+                </sheet>
+            </form>
+        </field>
+    </record>
+    <record id="action_van_ban_den" model="ir.actions.act_window">
+        <field name="name">Danh sách văn bản</field>
+        <field name="res_model">van.ban.den</field>
+        <field name="view_mode">tree,form</field>
+    </record>
+    <menuitem id="menu_van_ban_den" name="Văn bản đến" action="action_van_ban_den"/>
+    <menuitem id="menu_so_van_ban" name="Sổ văn bản" parent="menu_van_ban_den"/>
+    <template id="van_ban_report">
+        <div><span>Người ký</span></div>
+    </template>
+</odoo>
+'''
+
+PO = '''msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+#. module: van_ban
+#: model_terms:ir.ui.view,arch_db:van_ban.view_van_ban_den_form
+msgid "Văn bản đến"
+msgstr "Incoming document"
+'''
+
+
+def _make_module(module_path):
+    (module_path / 'views').mkdir(parents=True)
+    (module_path / 'i18n').mkdir()
+    (module_path / 'views' / 'van_ban_den_views.xml').write_text(VIEW_XML, encoding='utf-8')
+    (module_path / 'i18n' / 'vi_VN.po').write_text(PO, encoding='utf-8')
+    return module_path
+
+
+def test_view_record_counts_only_translatable_contexts(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_paths, 'CACHE_DIR', tmp_path / 'cache')
+    module_path = _make_module(tmp_path / 'van_ban')
+    report = CoverageAnalyzer(module_path).analyze()
+
+    # Giá trị kỹ thuật của record không phải text cần dịch
+    for value in ('van.ban.den.form', 'van.ban.den', 'tree,form'):
+        assert value not in report.total.translatable
+
+    # Tên action và menu được Odoo xuất ra file PO
+    assert report.total.translatable == {
+        'Văn bản đến', 'Số ký hiệu', 'Nhập số ký hiệu', 'Văn bản chưa được xử lý', 'Người ký',
+        'Danh sách văn bản', 'Sổ văn bản',
+    }
+    assert report.total.missing == {
+        'Số ký hiệu', 'Nhập số ký hiệu', 'Văn bản chưa được xử lý', 'Người ký',
+        'Danh sách văn bản', 'Sổ văn bản',
+    }
+    # Chỉ mục chuỗi nằm trong thư mục cache, không để lại file trong module
+    assert sorted(path.name for path in module_path.iterdir()) == ['i18n', 'views']
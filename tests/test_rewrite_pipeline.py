@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rewrite_pipeline import LogVanBanPass, RewritePipeline, build_passes  # noqa: E402
+
+LOG_VAN_BAN = '''from markupsafe import Markup
+
+
+def log(record):
+    record.message_post(body=Markup(f'<b>Người ký:</b> {record.name}'))
+    record.message_post(body=Markup('<span>Người ký</span>'))
+    record.message_post(body=Markup('<p class="text-danger">Văn bản quá hạn</p>'))
+    record.notify(title='Thông báo', message="Đã chuyển văn bản")
+'''
+
+
+def test_log_van_ban_pass_is_idempotent():
+    rewrite = LogVanBanPass().rewrite
+    once = rewrite(LOG_VAN_BAN)
+    assert once != LOG_VAN_BAN
+    assert "<span>{_(\"Người ký\")}</span>" in once
+    assert 'title=_("Thông báo")' in once
+    assert rewrite(once) == once
+
+
+def test_pipeline_second_run_changes_nothing(tmp_path):
+    module_path = tmp_path / 'van_ban'
+    file_path = module_path / 'models' / 'action_van_ban_den' / 'log_van_ban.py'
+    file_path.parent.mkdir(parents=True)
+    file_path.write_text(LOG_VAN_BAN, encoding='utf-8')
+
+    def run():
+        passes, exclude_files = build_passes(['validation', 'name', 'log_van_ban'], module_path)
+        pipeline = RewritePipeline(passes)
+        return pipeline.run(pipeline.collect_files(module_path, exclude_files))
+
+    assert len(run()) == 1
+    once = file_path.read_text(encoding='utf-8')
+    assert not run()
+    assert file_path.read_text(encoding='utf-8') == once
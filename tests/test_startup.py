@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from cli import COMMANDS  # noqa: E402
+
+# Giới hạn thời gian import (ms) của lệnh rỗng / --help
+STARTUP_BUDGET_MS = 100
+# Thư viện nặng chỉ được import khi lệnh thực sự chạy, với mọi lệnh
+DEFERRED_MODULES = frozenset({
+    'googletrans', 'langdetect', 'tqdm', 'lib2to3', 'logging.handlers', 'async_translator',
+})
+# Module mà translation_replace_bot chỉ import trong hàm dùng tới
+REPLACE_DEFERRED_MODULES = DEFERRED_MODULES | {
+    'file_walker', 'po_snapshot', 'xml_translator', 'string_index',
+}
+
+
+def _import_times(args, repeat=3):
+    """Chạy python -X importtime, trả về (tổng ms của lần nhanh nhất, tập module đã import)"""
+    best = None
+    modules = set()
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', *args],
+                                capture_output=True, text=True, cwd=ROOT)
+        assert result.returncode == 0, result.stderr[-2000:]
+        total = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            modules.add(parts[2].strip())
+            # Import cấp ngoài cùng có đúng một khoảng trắng trước tên module
+            if not parts[2].startswith('  '):
+                total += int(parts[1])
+        best = total / 1000 if best is None else min(best, total / 1000)
+    return best, modules
+
+
+def test_replace_bot_import_is_cheap():
+    milliseconds, modules = _import_times(['-c', 'import translation_replace_bot'])
+    assert milliseconds < STARTUP_BUDGET_MS
+    assert not modules & REPLACE_DEFERRED_MODULES
+
+
+@pytest.mark.parametrize('command', sorted(COMMANDS))
+def test_cli_help_within_budget(command):
+    milliseconds, modules = _import_times(['cli.py', command, '--help'])
+    assert milliseconds < STARTUP_BUDGET_MS
+    assert not modules & (REPLACE_DEFERRED_MODULES if command == 'replace' else DEFERRED_MODULES)
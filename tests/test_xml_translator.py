@@ -0,0 +1,45 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from xml_translator import iter_tokens, rewrite_content  # noqa: E402
+
+
+class CountingReader(io.StringIO):
+    """StringIO ghi lại số ký tự đã đọc"""
+
+    def __init__(self, content):
+        super().__init__(content)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed += len(data)
+        return data
+
+
+def test_lone_bracket_does_not_buffer_the_tail():
+    content = '<odoo><p>a < b</p>' + '<p>Văn bản đến</p>\n' * 200000 + '</odoo>'
+    reader = CountingReader(content)
+    tokens = iter_tokens(reader, chunk_size=1024)
+    seen = []
+    for token in tokens:
+        seen.append(token)
+        if token[2] == '<':
+            break
+    # '<' lạc được trả ngay, không phải đọc hết file
+    assert seen[-1] == ('text', content.index('< b'), '<')
+    assert reader.consumed < 10 * 1024
+
+    rest = [token for token in tokens]
+    assert ''.join(raw for _, _, raw in seen + rest) == content
+    assert ('tag', content.rindex('</odoo>'), '</odoo>') in rest
+
+
+def test_lone_bracket_keeps_translating_after_it():
+    content = '<odoo><p>a < b</p><p>Văn bản đến</p></odoo>'
+    new_content, edits = rewrite_content(content, lambda text: 'Incoming' if text == 'Văn bản đến' else None)
+    assert new_content == '<odoo><p>a < b</p><p>Incoming</p></odoo>'
+    assert len(edits) == 1
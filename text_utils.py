@@ -0,0 +1,10 @@
+import unicodedata
+
+from patterns import PATTERNS
+
+_WHITESPACE_PATTERN = PATTERNS.compile('text.whitespace', r'\s+')
+
+
+def normalize_text(text):
+    """Chuẩn hoá text làm khoá tra cứu: Unicode NFC, gộp khoảng trắng"""
+    return _WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFC', text)).strip()
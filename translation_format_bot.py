@@ -1,178 +1,225 @@
-import re
 from pathlib import Path
 import logging
-from tqdm import tqdm
-from googletrans import Translator
-import time
-from langdetect import detect
+from change_plan import ChangePlan
+from glossary import Glossary, mask_protected
+from incremental_state import IncrementalState
+from language_classifier import classify_language
+from metrics import METRICS, echo, log_item, progress
+from po_catalog import rewrite_entries
+from po_snapshot import iter_catalog_entries
+from translation_memory import CachedTranslatorBackend
+from translator_backend import BatchTranslator, GoogleTranslatorBackend
 
-# Thiết lập logging
-logging.basicConfig(
-    filename='translation_format.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s'
-)
 
 class TranslationFormatBot:
-    def __init__(self, module_path):
+    def __init__(self, module_path, translator=None, batch_size=50, batch_chars=4000, memory=None,
+                 concurrency=1, rate=None, retries=3, incremental=False, dry_run=False,
+                 lang='vi_VN', glossary=None):
         self.module_path = Path(module_path)
-        self.po_file = self.module_path / 'i18n' / 'vi_VN.po'
-        self.translator = Translator()
+        # lang: catalog cần dịch (i18n/<lang>.po), dest_lang là mã ngôn ngữ gửi cho dịch vụ dịch
+        self.lang = lang
+        self.dest_lang = lang.split('_')[0]
+        self.incremental = incremental
+        # dry_run: chỉ lập kế hoạch thay đổi file PO, không ghi file
+        self.dry_run = dry_run
+        self.po_file = self.module_path / 'i18n' / f'{lang}.po'
+        # glossary: bảng thuật ngữ dịch offline, mặc định gồm thuật ngữ chung và i18n/glossary.csv
+        self.glossary = glossary if glossary is not None else Glossary.for_module(self.module_path)
+        # translator là một TranslatorBackend, mặc định dùng Google Translate
+        self.translator = translator or GoogleTranslatorBackend()
+        # memory là TranslationMemory dùng chung, text đã dịch không gọi lại backend
+        self.memory = memory
+        if memory is not None:
+            self.translator = CachedTranslatorBackend(self.translator, memory)
+        # concurrency > 1: giữ nhiều request song song bằng asyncio, có retry và giới hạn tốc độ
+        if concurrency > 1 or rate:
+            from async_translator import AsyncBatchTranslator
+            self.batch_translator = AsyncBatchTranslator(
+                self.translator, batch_size, batch_chars,
+                concurrency=concurrency, retries=retries, rate=rate
+            )
+        else:
+            self.batch_translator = BatchTranslator(self.translator, batch_size, batch_chars)
         
     def format_and_translate(self):
-        """Định dạng lại và dịch file PO"""
-        # Đọc toàn bộ file
-        with open(self.po_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        """Định dạng lại và dịch file PO, trả về ChangePlan của file PO"""
+        # Bộ nhớ dịch có thể dùng chung giữa nhiều bot, chỉ tính phần của lần chạy này
+        if self.memory is not None:
+            memory_hits, memory_misses = self.memory.hits, self.memory.misses
             
-        # Phân tích thành các block dịch
-        blocks = []
-        current_block = []
+        # Chế độ incremental: chỉ xét các phần tử mới hoặc đã sửa từ lần chạy trước
+        state = None
+        if self.incremental:
+            namespace = 'translation_format' if self.lang == 'vi_VN' else f'translation_format.{self.lang}'
+            state = IncrementalState(self.module_path, namespace)
         
-        for line in lines:
-            if line.startswith('#. module:'):
-                if current_block:
-                    blocks.append(current_block)
-                current_block = [line]
-            else:
-                current_block.append(line)
-                
-        if current_block:
-            blocks.append(current_block)
+        # Lượt 1: đọc catalog theo luồng, chỉ giữ lại các phần tử cần dịch
+        counts = {'entries': 0, 'candidates': 0}
+        with METRICS.timer('detect'):
+            to_english, to_vietnamese = self._collect_untranslated(self._iter_candidates(state, counts))
+        METRICS.count('entries', counts['entries'])
             
-        # Xử lý từng block
-        print(f"\nTổng số phần tử dịch: {len(blocks)}")
+        echo(f"\nTổng số phần tử dịch: {counts['entries']}")
+        if state is not None:
+            echo(f"Phần tử thay đổi: {counts['candidates']}")
         
-        with tqdm(total=len(blocks), desc="Đang xử lý") as pbar:
-            for idx, block in enumerate(blocks, 1):
-                try:
-                    self._process_block(block)
-                except Exception as e:
-                    logging.error(f'Lỗi khi xử lý block {idx}: {str(e)}')
-                pbar.update(1)
-                time.sleep(0.01)
+        # Dịch theo lô, ghi nhớ bản dịch theo dòng bắt đầu của phần tử
+        updates = {}
+        total = len({e.msgid for e in to_english}) + len({e.msgid for e in to_vietnamese})
+        with progress(total, "Đang xử lý") as pbar:
+            translations, rejected = self._translate_entries(to_english, 'vi', 'en', pbar)
+            for entry in to_english:
+                if translations.get(entry.msgid):
+                    updates[entry.line_number] = (self._apply_english, translations[entry.msgid])
                 
-        # Ghi lại file
-        with open(self.po_file, 'w', encoding='utf-8') as f:
-            for block in blocks:
-                f.writelines(block)
+            translations, more_rejected = self._translate_entries(to_vietnamese, 'en', self.dest_lang, pbar)
+            rejected |= more_rejected
+            for entry in to_vietnamese:
+                if translations.get(entry.msgid):
+                    updates[entry.line_number] = (self._apply_vietnamese, translations[entry.msgid])
                 
-    def _process_block(self, block):
-        """Xử lý một block dịch"""
-        msgid = None
-        msgstr = None
-        msgid_line_idx = None
-        msgstr_line_idx = None
-        
-        # Tìm vị trí và nội dung msgid và msgstr
-        for i, line in enumerate(block):
-            if line.startswith('msgid '):
-                msgid = self._extract_message(line)
-                msgid_line_idx = i
-            elif line.startswith('msgstr '):
-                msgstr = self._extract_message(line)
-                msgstr_line_idx = i
+        if self.memory is not None:
+            memory_hits = self.memory.hits - memory_hits
+            memory_misses = self.memory.misses - memory_misses
+            METRICS.count('memory_hits', memory_hits)
+            METRICS.count('memory_misses', memory_misses)
+            logging.info(f'Bộ nhớ dịch: {memory_hits} lần trúng, {memory_misses} lần trượt')
                 
-        if msgid is None or msgid == '':
-            return
+        # Phần tử dịch lỗi không được ghi nhận để lần sau thử lại; phần tử mà bản dịch luôn làm
+        # mất token thì vẫn ghi nhận để không gửi lại mỗi lần chạy (cho tới khi phần tử được sửa)
+        pending = {entry.line_number for entry in to_english + to_vietnamese
+                   if entry.msgid not in rejected} - set(updates)
+        del to_english, to_vietnamese
+        record = state is not None and not self.dry_run
+        if record:
+            state.entries.clear()
             
-        try:
-            # Trường hợp 1: msgid là tiếng Việt -> dịch sang Anh
-            if self._is_vietnamese(msgid):
-                translation = self._translate_to_english(msgid)
-                if translation:
-                    # Chuyển msgid cũ xuống msgstr
-                    block[msgstr_line_idx] = f'msgstr "{msgid}"\n'
-                    # Đặt bản dịch làm msgid mới
-                    block[msgid_line_idx] = f'msgid "{translation}"\n'
-                    print(f"\nĐã dịch VI->EN: {msgid} -> {translation}")
-                    logging.info(f'Đã dịch VI->EN: {msgid} -> {translation}')
-            
-            # Trường hợp 2: msgid là tiếng Anh và msgstr rỗng -> dịch sang Việt
-            elif msgstr == '' and self._is_english(msgid):
-                translation = self._translate_to_vietnamese(msgid)
-                if translation:
-                    # Chỉ cập nhật msgstr
-                    block[msgstr_line_idx] = f'msgstr "{translation}"\n'
-                    print(f"\nĐã dịch EN->VI: {msgid} -> {translation}")
-                    logging.info(f'Đã dịch EN->VI: {msgid} -> {translation}')
+        def update(entry):
+            if entry.line_number in updates:
+                apply, translation = updates[entry.line_number]
+                apply(entry, translation)
+            if record and entry.msgid is not None and not entry.is_header and entry.line_number not in pending:
+                state.record_entry(entry)
                 
-        except Exception as e:
-            logging.error(f'Lỗi khi xử lý block với msgid "{msgid}": {str(e)}')
-
-    def _extract_message(self, line):
-        """Trích xuất nội dung message từ dòng msgid/msgstr"""
-        match = re.match(r'msg(?:id|str) "(.*)"', line)
-        return match.group(1) if match else ''
+        # Lượt 2: ghi lại file theo luồng, chỉ sinh lại các phần tử đã thay đổi
+        plan = ChangePlan()
+        with METRICS.timer('write'):
+            plan.add(rewrite_entries(self.po_file, update, dry_run=self.dry_run))
+        if record:
+            state.save()
+        return plan
         
-    def _is_vietnamese(self, text):
-        """Kiểm tra xem text có phải tiếng Việt không"""
-        try:
-            return detect(text) == 'vi'
-        except:
-            return False
+    def _iter_candidates(self, state, counts):
+        """Duyệt các phần tử dịch của catalog (qua snapshot, không có raw_lines), bỏ phần tử không đổi nếu có state"""
+        for entry in iter_catalog_entries(self.po_file, write_snapshot=not self.dry_run):
+            if entry.msgid is None or entry.is_header:
+                continue
+            counts['entries'] += 1
+            if state is None or state.is_entry_changed(entry):
+                counts['candidates'] += 1
+                yield entry
             
-    def _is_english(self, text):
-        """Kiểm tra xem text có phải tiếng Anh không"""
-        try:
-            return detect(text) == 'en'
-        except:
-            return False
+    def _collect_untranslated(self, entries):
+        """Phân loại phần tử: msgid tiếng Việt cần dịch sang Anh, msgid tiếng Anh chưa có msgstr
 
-    def _translate_to_english(self, text):
-        """Dịch text sang tiếng Anh, giữ nguyên format đặc biệt"""
-        try:
-            # Giữ lại các ký tự đặc biệt và số
-            special_format = []
-            pattern = r'(\d+/\d+\.|\d+\.)'
+        Chỉ catalog tiếng Việt mới đưa msgid tiếng Việt xuống msgstr; catalog ngôn ngữ khác
+        chỉ dịch các msgid tiếng Anh chưa có bản dịch.
+        """
+        to_english = []
+        to_vietnamese = []
+        for idx, entry in enumerate(entries, 1):
+            # Bỏ qua phần tử số nhiều, chưa hỗ trợ dịch tự động
+            if not entry.msgid or entry.msgid_plural is not None:
+                continue
+            try:
+                if self._is_vietnamese(entry.msgid):
+                    if self.dest_lang == 'vi':
+                        to_english.append(entry)
+                elif entry.msgstr == '' and self._is_english(entry.msgid):
+                    to_vietnamese.append(entry)
+            except Exception as e:
+                logging.error(f'Lỗi khi xử lý block {idx}: {str(e)}')
+        return to_english, to_vietnamese
+        
+    def _translate_entries(self, entries, src, dest, pbar=None):
+        """Dịch msgid của các phần tử, trả về (dict {msgid: bản dịch}, tập msgid bị loại)
+
+        Text chỉ gồm thuật ngữ được dịch offline bằng glossary; text còn lại được che các token
+        không được dịch (số thứ tự, %s, {field}, thẻ HTML) rồi mới gửi đi dịch theo lô.
+        Bản dịch làm mất placeholder được dịch lại một lần không che token; nếu vẫn mất token
+        thì msgid nằm trong tập bị loại.
+        """
+        results = {}
+        rejected = set()
+        masked = {}
+        for text in dict.fromkeys(entry.msgid for entry in entries):
+            translation = self.glossary.translate(text, src, dest)
+            if translation:
+                results[text] = translation
+            else:
+                masked[text] = mask_protected(text)
+        METRICS.count('glossary_hits', len(results))
+        if pbar is not None:
+            pbar.update(len(results))
             
-            # Tách và lưu format đặc biệt
-            parts = re.split(pattern, text)
-            for i, part in enumerate(parts):
-                if re.match(pattern, part):
-                    special_format.append((i, part))
-                    
-            # Dịch phần text
-            translation = self.translator.translate(text, src='vi', dest='en').text
+        masked_texts = [masked_text.text for masked_text in masked.values()]
+        progress = (lambda count: pbar.update(count)) if pbar is not None else None
+        with METRICS.timer('translate'):
+            translations = self.batch_translator.translate_all(masked_texts, src, dest, progress)
+        if pbar is not None:
+            # Các text giống nhau sau khi che token chỉ được gửi đi một lần
+            pbar.update(len(masked_texts) - len(set(masked_texts)))
             
-            # Khôi phục format đặc biệt
-            for idx, format_str in special_format:
-                parts = translation.split()
-                if idx < len(parts):
-                    parts[idx] = format_str
-                translation = ' '.join(parts)
-                
-            return translation
+        retry = {}
+        for text, masked_text in masked.items():
+            translation = translations.get(masked_text.text)
+            if not translation:
+                continue
+            translation = masked_text.unmask(translation)
+            if translation is None:
+                retry[text] = masked_text
+                continue
+            results[text] = translation
             
-        except Exception as e:
-            logging.error(f'Lỗi khi dịch "{text}": {str(e)}')
-            return None 
+        if retry:
+            # Dịch lại không che token, chỉ nhận bản dịch còn giữ nguyên các token
+            with METRICS.timer('translate'):
+                translations = self.batch_translator.translate_all(list(retry), src, dest)
+            for text, masked_text in retry.items():
+                translation = translations.get(text)
+                if translation and masked_text.keeps_tokens(translation):
+                    results[text] = translation
+                    continue
+                METRICS.count('unmask_failed')
+                logging.warning(f'Bản dịch của "{text}" làm mất token định dạng, bỏ qua')
+                rejected.add(text)
+        METRICS.count('translated', len(results))
+        return results, rejected
+        
+    def _apply_english(self, entry, translation):
+        """Chuyển msgid tiếng Việt xuống msgstr, đặt bản dịch làm msgid mới"""
+        if not translation:
+            return
+        msgid = entry.msgid
+        entry.update(msgid=translation, msgstr=msgid)
+        echo(f"\nĐã dịch VI->EN: {msgid} -> {translation}")
+        log_item(f'Đã dịch VI->EN: {msgid} -> {translation}',
+                 direction='vi-en', source=msgid, translation=translation)
+        
+    def _apply_vietnamese(self, entry, translation):
+        """Chỉ cập nhật msgstr cho msgid tiếng Anh"""
+        if not translation:
+            return
+        entry.update(msgstr=translation)
+        direction = f'EN->{self.dest_lang.upper()}'
+        echo(f"\nĐã dịch {direction}: {entry.msgid} -> {translation}")
+        log_item(f'Đã dịch {direction}: {entry.msgid} -> {translation}',
+                 direction=f'en-{self.dest_lang}', source=entry.msgid, translation=translation)
 
-    def _translate_to_vietnamese(self, text):
-        """Dịch text sang tiếng Việt, giữ nguyên format đặc biệt"""
-        try:
-            # Giữ lại các ký tự đặc biệt và số
-            special_format = []
-            pattern = r'(\d+/\d+\.|\d+\.)'
-            
-            # Tách và lưu format đặc biệt
-            parts = re.split(pattern, text)
-            for i, part in enumerate(parts):
-                if re.match(pattern, part):
-                    special_format.append((i, part))
-                    
-            # Dịch phần text
-            translation = self.translator.translate(text, src='en', dest='vi').text
-            
-            # Khôi phục format đặc biệt
-            for idx, format_str in special_format:
-                parts = translation.split()
-                if idx < len(parts):
-                    parts[idx] = format_str
-                translation = ' '.join(parts)
-                
-            return translation
+    def _is_vietnamese(self, text):
+        """Kiểm tra xem text có phải tiếng Việt không"""
+        return classify_language(text) == 'vi'
             
-        except Exception as e:
-            logging.error(f'Lỗi khi dịch "{text}": {str(e)}')
-            return None 
\ No newline at end of file
+    def _is_english(self, text):
+        """Kiểm tra xem text có phải tiếng Anh không"""
+        return classify_language(text) == 'en'
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+from translator_backend import TranslatorBackend
+
+# File dùng chung cho mọi module Odoo trên máy
+DEFAULT_MEMORY_PATH = Path(os.environ.get(
+    'ODOO_I18N_MEMORY',
+    Path.home() / '.cache' / 'odoo_i18n_bot' / 'translation_memory.sqlite3'
+))
+
+
+def memory_key(text):
+    """Khoá của bộ nhớ dịch: Unicode NFC, bỏ khoảng trắng đầu/cuối, giữ nguyên khoảng trắng bên trong
+
+    Khoảng trắng đầu/cuối không thuộc về bản dịch được lưu, mà lấy lại từ text của lần tra cứu
+    (xem restore_whitespace), nên "Foo" và "Foo\n" dùng chung một bản ghi.
+    """
+    return unicodedata.normalize('NFC', text).strip()
+
+
+def restore_whitespace(text, translation):
+    """Đặt khoảng trắng đầu/cuối của text quanh bản dịch (msgfmt yêu cầu msgid/msgstr khớp '\n' đầu/cuối)"""
+    stripped = text.strip()
+    if not stripped:
+        return translation
+    start = text.index(stripped)
+    return text[:start] + translation.strip() + text[start + len(stripped):]
+
+
+class TranslationMemory:
+    """Bộ nhớ dịch lưu trên đĩa (SQLite), khoá theo (ngôn ngữ nguồn, ngôn ngữ đích, text)
+
+    Khi số bản ghi vượt max_entries, các bản ghi lâu không dùng nhất bị xoá (LRU).
+    """
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH, max_entries=200000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # timeout + WAL để nhiều tiến trình/module dùng chung một file,
+        # lock để các thread của chế độ dịch bất đồng bộ dùng chung kết nối
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS memory ('
+            ' src TEXT NOT NULL, dest TEXT NOT NULL, key TEXT NOT NULL,'
+            ' translation TEXT NOT NULL, last_used REAL NOT NULL,'
+            ' PRIMARY KEY (src, dest, key))'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)')
+        self.connection.commit()
+
+    def get_many(self, texts, src, dest):
+        """Tra cứu nhiều text một lúc, trả về dict {text: bản dịch} cho các text đã có"""
+        keys = {}
+        for text in texts:
+            keys.setdefault(memory_key(text), []).append(text)
+
+        with self.lock:
+            found = self._select(keys, src, dest)
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def _select(self, keys, src, dest):
+        found = {}
+        key_list = list(keys)
+        # SQLite giới hạn số tham số trong một câu lệnh
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.connection.execute(
+                f'SELECT key, translation FROM memory WHERE src = ? AND dest = ? AND key IN ({placeholders})',
+                [src, dest, *chunk]
+            )
+            for key, translation in rows:
+                for text in keys[key]:
+                    found[text] = restore_whitespace(text, translation)
+
+        if found:
+            now = time.time()
+            self.connection.executemany(
+                'UPDATE memory SET last_used = ? WHERE src = ? AND dest = ? AND key = ?',
+                [(now, src, dest, memory_key(text)) for text in found]
+            )
+            self.connection.commit()
+        return found
+
+    def get(self, text, src, dest):
+        return self.get_many([text], src, dest).get(text)
+
+    def put_many(self, translations, src, dest):
+        """Lưu dict {text: bản dịch} rồi dọn bớt nếu vượt giới hạn"""
+        if not translations:
+            return
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO memory (src, dest, key, translation, last_used) VALUES (?, ?, ?, ?, ?)',
+                [(src, dest, memory_key(text), translation.strip(), now)
+                 for text, translation in translations.items() if translation and translation.strip()]
+            )
+            self.connection.commit()
+            self.evict()
+
+    def put(self, text, translation, src, dest):
+        self.put_many({text: translation}, src, dest)
+
+    def evict(self):
+        """Xoá các bản ghi ít dùng nhất khi vượt quá max_entries"""
+        if not self.max_entries:
+            return 0
+        with self.lock:
+            overflow = len(self) - self.max_entries
+            if overflow <= 0:
+                return 0
+            self.connection.execute(
+                'DELETE FROM memory WHERE rowid IN '
+                '(SELECT rowid FROM memory ORDER BY last_used LIMIT ?)',
+                (overflow,)
+            )
+            self.connection.commit()
+        return overflow
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+class CachedTranslatorBackend(TranslatorBackend):
+    """Đặt bộ nhớ dịch trước một backend: chỉ gửi đi những text chưa có trong cache"""
+
+    def __init__(self, backend, memory):
+        self.backend = backend
+        self.memory = memory
+
+    def translate_batch(self, texts, src, dest):
+        texts = list(texts)
+        cached = self.memory.get_many(texts, src, dest)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+
+        if missing:
+            results = self.backend.translate_batch(missing, src, dest)
+            translated = dict(zip(missing, results))
+            self.memory.put_many(translated, src, dest)
+            cached.update(translated)
+
+        return [cached.get(text) for text in texts]
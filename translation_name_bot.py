@@ -1,61 +1,129 @@
 import os
-import re
+import sys
+import argparse
+import logging
+import tokenize
+from change_plan import ChangePlan, FileChange, add_plan_arguments, is_dry_run, report_plan
+from file_walker import BytePrefilter, walk_files
+from incremental_state import IncrementalState
+from logging_setup import add_logging_arguments, setup_logging_from_args
+from metrics import METRICS, add_metrics_arguments, echo, instrument
+from odoo_import import add_odoo_import
+from patterns import PATTERNS
+from python_strings import extract_strings, wrap_spans
+from worker_pool import add_jobs_argument, imap_tasks
 
 def check_and_add_import(content):
     """Kiểm tra và thêm import _ nếu chưa có"""
-    if "from odoo import" in content:
-        if ", _" not in content and "import _" not in content:
-            content = content.replace("from odoo import", "from odoo import _, ")
-    return content
+    return add_odoo_import(content)
 
 def process_name_translations(content):
     """Xử lý các cụm 'name': 'text' thành 'name': _('text')"""
-    patterns = [
-        r"'name':\s*'([^']+)'",  # 'name': 'text'
-        r'"name":\s*"([^"]+)"',  # "name": "text"
-        r"'name':\s*\"([^\"]+)\"",  # 'name': "text"
-        r'"name":\s*\'([^\']+)\'',  # "name": 'text'
-    ]
-    
-    for pattern in patterns:
-        content = re.sub(pattern, lambda m: f"'name': _('{m.group(1)}')", content)
+    try:
+        spans = extract_strings(content, exception_names=(), kwarg_names=())
+    except (tokenize.TokenError, SyntaxError):
+        # File chưa hợp lệ cú pháp: dùng regex như cũ
+        return _process_name_translations_regex(content)
+    # Chỉ bọc chuỗi thường khác rỗng, giống các pattern cũ
+    return wrap_spans(content, [span for span in spans if span.text])
+
+_NAME_PATTERNS = (
+    PATTERNS.compile('name.single_single', r"'name':\s*'([^']+)'"),  # 'name': 'text'
+    PATTERNS.compile('name.double_double', r'"name":\s*"([^"]+)"'),  # "name": "text"
+    PATTERNS.compile('name.single_double', r"'name':\s*\"([^\"]+)\""),  # 'name': "text"
+    PATTERNS.compile('name.double_single', r'"name":\s*\'([^\']+)\''),  # "name": 'text'
+)
+
+# File không chứa khoá 'name' thì không cần đọc (lọc trên byte, trước khi giải mã)
+NAME_NEEDLES = ("'name':", '"name":')
+NAME_PREFILTER = BytePrefilter(NAME_NEEDLES)
+
+def _process_name_translations_regex(content):
+    """Cách cũ: tìm các cụm 'name': 'text' bằng regex"""
+    for pattern in _NAME_PATTERNS:
+        content = pattern.sub(lambda m: f"'name': _('{m.group(1)}')", content)
     
     return content
 
 def process_file(file_path):
-    """Xử lý một file"""
-    try:
+    """Xử lý một file, trả về FileChange (None nếu không cần sửa)"""
+    METRICS.count('files_scanned')
+    with METRICS.timer('read'):
         with open(file_path, 'r', encoding='utf-8') as file:
             content = file.read()
-            
-        if "'name':" in content or '"name":' in content:
-            # Thêm import _ nếu cần
-            content = check_and_add_import(content)
-            # Xử lý các cụm name
-            content = process_name_translations(content)
-            
-            # Ghi lại file
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(content)
-            print(f"Processed: {file_path}")
-            
-    except Exception as e:
-        print(f"Error processing {file_path}: {str(e)}")
+        
+    if not any(needle in content for needle in NAME_NEEDLES):
+        return None
+        
+    # Xử lý các cụm name
+    with METRICS.timer('match'):
+        new_content = process_name_translations(content)
+    
+    if new_content == content:
+        return None
+        
+    # Thêm import _ nếu cần
+    new_content = check_and_add_import(new_content)
+    return FileChange.from_contents(file_path, content, new_content)
+
+def collect_files(module_path):
+    """Lấy danh sách file .py cần xử lý theo thứ tự ổn định"""
+    # Bỏ qua __manifest__.py, các file trong thư mục i18n và file không có 'name':
+    file_paths = walk_files(module_path, {'.py'}, ignore=('i18n/', '__manifest__.py'))
+    return [str(file_path) for file_path in file_paths if NAME_PREFILTER(file_path)]
 
 def main():
     """Hàm chính để quét và xử lý các file"""
+    parser = add_jobs_argument(argparse.ArgumentParser(description="Bọc các giá trị 'name' bằng _()"))
+    parser.add_argument('--incremental', action='store_true',
+                        help='Chỉ xử lý các file thay đổi từ lần chạy trước')
+    add_plan_arguments(parser)
+    add_metrics_arguments(parser)
+    add_logging_arguments(parser, 'translation_name.log')
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+    with instrument(args):
+        return run(args)
+
+def run(args):
+    """Chạy bot với các tuỳ chọn đã parse, trả về mã thoát"""
     # Đường dẫn tới thư mục module
     module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     
     # Quét tất cả các file .py trong module
-    for root, dirs, files in os.walk(module_path):
-        for file in files:
-            # Bỏ qua __manifest__.py và các file trong thư mục i18n
-            if (file.endswith('.py') and 
-                file != '__manifest__.py' and 
-                'i18n' not in root):
-                file_path = os.path.join(root, file)
-                process_file(file_path)
+    with METRICS.timer('walk'):
+        file_paths = collect_files(module_path)
+    state = None
+    if args.incremental:
+        state = IncrementalState(module_path, 'translation_name')
+        file_paths = state.changed_files(file_paths)
+        
+    plan = ChangePlan()
+    failed = set()
+    for file_path, change, error in imap_tasks(process_file, file_paths, args.jobs):
+        if error:
+            print(f"Error processing {file_path}: {error}")
+            logging.error(f'Lỗi khi xử lý file {file_path}: {error}')
+            failed.add(file_path)
+        elif change is not None:
+            plan.add(change)
+            METRICS.count('files_changed')
+            echo(f"Processed: {file_path}")
+            
+    # Chế độ xem trước: chỉ in diff / ghi JSON, không sửa file
+    if is_dry_run(args):
+        return report_plan(plan, args)
+        
+    for file_path, error in plan.apply():
+        print(f"Error writing {file_path}: {error}")
+        logging.error(f'Lỗi khi ghi file {file_path}: {error}')
+        failed.add(file_path)
+            
+    if state is not None:
+        # File lỗi không được ghi nhận để lần sau xử lý lại
+        state.record_files([f for f in file_paths if f not in failed])
+        state.save()
+    return 0
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -1,139 +1,201 @@
-import os
-import re
 from pathlib import Path
 import logging
-from tqdm import tqdm
-import time
+from functools import partial
+from change_plan import ChangePlan, FileChange, SpanEdit
+from incremental_state import IncrementalState
+from metrics import METRICS, echo, log_item, progress
+from patterns import MATCHERS, catalog_version
+from po_catalog import po_escape, po_unescape
+from replace_engine import ReplaceEngine
+from worker_pool import imap_tasks
+
+# Tham chiếu entity khác 5 entity cơ bản (&#7879;, &nbsp;, ...)
+OTHER_ENTITY_BYTES = rb'&(?!(?:amp|lt|gt|quot|apos);)[#a-zA-Z]'
 
-# Thiết lập logging
-logging.basicConfig(
-    filename='translation_replace.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s'
-)
 
 class TranslationReplaceBot:
-    def __init__(self, module_path):
+    def __init__(self, module_path, jobs=1, incremental=False, dry_run=False, use_index=False,
+                 lang='vi_VN'):
         self.module_path = Path(module_path)
-        self.po_file = self.module_path / 'i18n' / 'vi_VN.po'
+        self.jobs = jobs
+        self.incremental = incremental
+        # use_index: dùng chỉ mục chuỗi để chỉ quét các file có chứa msgstr cần thay
+        self.use_index = use_index
+        # dry_run: chỉ lập kế hoạch thay đổi, không ghi file
+        self.dry_run = dry_run
+        # lang: ngôn ngữ viết trong code, msgstr của catalog này được thay bằng msgid
+        self.po_file = self.module_path / 'i18n' / f'{lang}.po'
         self.exclude_files = {str(self.po_file)}
         # Chỉ xử lý các file text
         self.allowed_extensions = {'.py', '.xml', '.csv', '.txt', '.html', '.js', '.css'}
         
     def parse_po_file(self):
-        """Đọc và parse file PO thành các phần tử dịch"""
-        current_block = {'module': '', 'model_terms': '', 'msgid': '', 'msgstr': ''}
-        translation_blocks = []
-        
-        with open(self.po_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        for line in lines[141:]:  # Bắt đầu từ dòng 141
-            line = line.strip()
-            if line.startswith('#. module:'):
-                if current_block['msgid'] and current_block['msgstr']:
-                    translation_blocks.append(dict(current_block))
-                current_block = {'module': line, 'model_terms': '', 'msgid': '', 'msgstr': ''}
-            elif line.startswith('#: model'):
-                current_block['model_terms'] = line
-            elif line.startswith('msgid '):
-                current_block['msgid'] = self._extract_message(line)
-            elif line.startswith('msgstr '):
-                current_block['msgstr'] = self._extract_message(line)
-                
-        if current_block['msgid'] and current_block['msgstr']:
-            translation_blocks.append(dict(current_block))
-                
-        return translation_blocks
-
-    def _extract_message(self, line):
-        """Trích xuất nội dung message từ dòng msgid/msgstr"""
-        match = re.match(r'msg(?:id|str) "(.*)"', line)
-        return match.group(1) if match else ''
+        """Đọc và parse file PO thành các phần tử dịch đã có bản dịch"""
+        from po_snapshot import iter_catalog_entries
+        with METRICS.timer('read'):
+            return [
+                entry for entry in iter_catalog_entries(self.po_file, write_snapshot=not self.dry_run)
+                if entry.msgid and entry.msgstr and entry.msgid_plural is None
+            ]
 
     def find_and_replace(self):
-        """Tìm và thay thế các cụm từ trong toàn bộ module"""
+        """Tìm và thay thế các cụm từ trong toàn bộ module, trả về ChangePlan"""
         translation_blocks = self.parse_po_file()
         total_blocks = len(translation_blocks)
         
-        print(f"\nTổng số phần tử dịch: {total_blocks}")
+        echo(f"\nTổng số phần tử dịch: {total_blocks}")
+        
+        # Gộp tất cả cặp msgstr -> msgid thành một bộ so khớp duy nhất
+        engine = self._build_engine(translation_blocks)
+            
+        # Mỗi file chỉ được đọc một lần và ghi tối đa một lần
+        with METRICS.timer('walk'):
+            files = list(self._get_module_files())
+        
+        index = self._open_index()
+        plan = ChangePlan()
+        if not self.incremental:
+            if engine:
+                self._replace_files(self._prefilter(files, translation_blocks, index), engine, plan)
+            self._apply_plan(plan)
+            return plan
+            
+        # Chế độ incremental: file đã đổi chạy với toàn bộ catalog,
+        # file không đổi chỉ cần kiểm tra các phần tử mới/đã sửa trong catalog
+        state = IncrementalState(self.module_path, 'translation_replace')
+        changed_files = state.changed_files(files)
+        changed_set = set(changed_files)
+        delta_entries = state.changed_entries(translation_blocks)
+        delta_engine = self._build_engine(delta_entries)
+        
+        echo(f"File thay đổi: {len(changed_files)}/{len(files)}")
+        failed = set()
+        if engine:
+            failed.update(self._replace_files(
+                self._prefilter(changed_files, translation_blocks, index), engine, plan))
+        if delta_engine:
+            unchanged_files = [f for f in files if f not in changed_set]
+            failed.update(self._replace_files(
+                self._prefilter(unchanged_files, delta_entries, index), delta_engine, plan))
+        failed.update(self._apply_plan(plan))
+            
+        if not self.dry_run:
+            # File lỗi không được ghi nhận để lần sau xử lý lại
+            state.record_files([f for f in files if f not in failed])
+            state.record_entries(translation_blocks)
+            state.save()
+        return plan
+        
+    def _open_index(self):
+        """Cập nhật và trả về chỉ mục chuỗi của module (None nếu không dùng)"""
+        if not self.use_index:
+            return None
+        from string_index import StringIndex
+        index = StringIndex(self.module_path)
+        updated, removed = index.update(self.jobs)
+        echo(f"Chỉ mục chuỗi: cập nhật {updated} file, xoá {removed} file")
+        return index
         
-        with tqdm(total=total_blocks, desc="Process") as pbar:
-            for idx, block in enumerate(translation_blocks, 1):
-                msgstr = block['msgstr']
-                msgid = block['msgid']
-                
-                if not msgstr or not msgid:
-                    logging.warning(f'Bỏ qua block không đầy đủ: {block}')
-                    pbar.update(1)
-                    continue
-                
-                # Hiển thị thông tin chi tiết
-                print(f"\nĐang xử lý phần tử {idx}/{total_blocks}")
-                print(f"msgstr: {msgstr}")
-                print(f"msgid: {msgid}")
-                
-                # Tìm tất cả file trong module (trừ file loại trừ)
-                for file_path in self._get_module_files():
-                    try:
-                        self._replace_in_file(file_path, msgstr, msgid)
-                    except Exception as e:
-                        logging.error(f'Lỗi khi xử lý file {file_path}: {str(e)}')
-                
+    def _prefilter(self, files, entries, index):
+        """Bỏ các file chắc chắn không chứa msgstr nào trong entries (theo chỉ mục, rồi theo byte)"""
+        if index is not None:
+            from string_index import INDEXED_EXTENSIONS
+            with METRICS.timer('match'):
+                candidates = index.files_containing(entry.msgstr for entry in entries)
+            # File không được đánh chỉ mục (.html, .txt, ...) vẫn được quét như cũ
+            files = [f for f in files if f.suffix not in INDEXED_EXTENSIONS or f in candidates]
+        prefilter = catalog_prefilter(entry.msgstr for entry in entries)
+        with METRICS.timer('prefilter'):
+            candidates = prefilter.filter(files)
+        METRICS.count('files_prefiltered', len(files) - len(candidates))
+        return candidates
+        
+    def _apply_plan(self, plan):
+        """Ghi các thay đổi đã lập (trừ khi dry_run), trả về danh sách file ghi lỗi"""
+        if self.dry_run:
+            return []
+        failed = []
+        for file_path, error in plan.apply():
+            logging.error(f'Lỗi khi ghi file {file_path}: {error}')
+            failed.append(file_path)
+        return failed
+        
+    def _build_engine(self, entries):
+        """Tạo bộ so khớp từ các phần tử dịch, dùng lại bộ đã biên dịch nếu catalog không đổi"""
+        # Text trong code giữ dạng escape giống như trong file PO
+        pairs = [(po_escape(entry.msgstr), po_escape(entry.msgid)) for entry in entries]
+        return MATCHERS.get(('replace', catalog_version(pairs)), lambda: ReplaceEngine(pairs))
+        
+    def _replace_files(self, files, engine, plan):
+        """Chạy bộ so khớp trên danh sách file, gom thay đổi vào plan và ghi log ở tiến trình cha
+
+        Trả về danh sách file xử lý lỗi.
+        """
+        replace_file = partial(self._replace_in_file, engine=engine)
+        failed = []
+        with progress(len(files), "Process") as pbar:
+            for file_path, change, error in imap_tasks(replace_file, files, self.jobs):
+                if error:
+                    logging.error(f'Lỗi khi xử lý file {file_path}: {error}')
+                    failed.append(file_path)
+                elif change is not None:
+                    plan.add(change)
+                    METRICS.count('files_changed')
+                    METRICS.count('replacements', len(change.edits))
+                    for note in change.notes:
+                        log_item(f'Đã thay thế {note} trong {file_path}', file=str(file_path))
+                    echo(f"Đã thay thế trong file: {file_path}")
                 pbar.update(1)
-                time.sleep(0.01)  # Để progress bar hiển thị mượt hơn
+        return failed
 
     def _get_module_files(self):
-        """Lấy danh sách tất cả file trong module (trừ những file loại trừ)"""
-        for root, _, files in os.walk(self.module_path):
-            for file in files:
-                file_path = Path(root) / file
-                # Chỉ xử lý các file có phần mở rộng cho phép
-                if (file_path.suffix in self.allowed_extensions and 
-                    str(file_path) not in self.exclude_files and
-                    not str(file_path).endswith('.bak')):
-                    yield file_path
-
-    def _replace_in_file(self, file_path, search_text, replace_text):
-        """Thay thế text trong một file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+        """Lấy danh sách tất cả file trong module (trừ những file loại trừ và bị bỏ qua)"""
+        from file_walker import walk_files
+        for file_path in walk_files(self.module_path, self.allowed_extensions):
+            if str(file_path) not in self.exclude_files:
+                yield file_path
 
-            # Tìm kiếm chính xác cụm từ trong dấu nháy đơn hoặc nháy kép
-            pattern = r'["\']' + re.escape(search_text) + r'["\']'
-            
-            # Pattern cho text trong thẻ XML
-            xml_pattern = r'>(' + re.escape(search_text) + r')<'
+    def _replace_in_file(self, file_path, engine):
+        """Tìm các chỗ cần thay trong một file, trả về FileChange (None nếu không có)"""
+        METRICS.count('files_scanned')
+        if Path(file_path).suffix == '.xml':
+            # File XML: đọc streaming, chỉ thay text node và thuộc tính hiển thị (bỏ qua comment)
+            from xml_translator import plan_file as plan_xml_file
+            with METRICS.timer('match'):
+                xml_edits = plan_xml_file(file_path, xml_translate_function(engine))
+            edits = [SpanEdit(edit.start, edit.end, edit.raw) for edit in xml_edits]
+            notes = [f'"{edit.old}" -> "{edit.new}"' for edit in xml_edits]
+            return FileChange(file_path, edits, newline='', notes=notes) if edits else None
             
-            # Pattern cho text trong thẻ bold 
-            bold_pattern = r'<bold>\s*' + re.escape(search_text) + r'\s*</bold>'
-            
-            if re.search(pattern, content) or re.search(xml_pattern, content) or re.search(bold_pattern, content):
-                # Xử lý text trong dấu nháy (giữ nguyên logic cũ)
-                if "'" in replace_text:
-                    new_content = re.sub(r'"' + re.escape(search_text) + r'"', 
-                                      f'"{replace_text}"', content)
-                    new_content = re.sub(r"'" + re.escape(search_text) + r"'",
-                                      f'"{replace_text}"', new_content)
-                else:
-                    new_content = re.sub(r'"' + re.escape(search_text) + r'"', 
-                                      f'"{replace_text}"', content)
-                    new_content = re.sub(r"'" + re.escape(search_text) + r"'",
-                                      f"'{replace_text}'", new_content)
-                
-                # Xử lý text trong thẻ XML
-                new_content = re.sub(xml_pattern, f'>{replace_text}<', new_content)
-                
-                # Xử lý text trong thẻ bold
-                new_content = re.sub(bold_pattern, f'<bold>{replace_text}</bold>', new_content)
-                
-                # Ghi file mới
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
-                    
-                logging.info(f'Đã thay thế "{search_text}" -> "{replace_text}" trong {file_path}')
-                print(f"Đã thay thế trong file: {file_path}")
-                
-        except Exception as e:
-            logging.error(f'Lỗi khi xử lý file {file_path}: {str(e)}')
\ No newline at end of file
+        # File khác: quét theo từng cửa sổ, không nạp cả file vào bộ nhớ
+        edits = []
+        notes = []
+        with METRICS.timer('match'):
+            for start, end, text, search_text, replace_text in engine.iter_file_edits(file_path):
+                edits.append(SpanEdit(start, end, text))
+                notes.append(f'"{search_text}" -> "{replace_text}"')
+        return FileChange(file_path, edits, notes=notes) if edits else None
+
+
+def catalog_prefilter(texts):
+    """Bộ lọc byte: file phải chứa ít nhất một msgstr (chưa escape) ở dạng escape của PO hoặc của XML"""
+    from file_walker import BytePrefilter
+    from xml_translator import escape
+    needles = set()
+    for text in texts:
+        needles.add(po_escape(text))
+        needles.add(escape(text))
+        needles.add(escape(text, {'"': '&quot;'}))
+        needles.add(escape(text, {"'": '&apos;'}))
+    # Text XML được giải mã entity trước khi tra catalog: giữ lại file có entity khác &amp; &lt; ...
+    version = catalog_version((needle, '') for needle in sorted(needles))
+    return MATCHERS.get(('prefilter', version), lambda: BytePrefilter(needles, [OTHER_ENTITY_BYTES]))
+
+
+def xml_translate_function(engine):
+    """Tạo hàm dịch text XML (đã giải mã entity) từ bộ so khớp của catalog"""
+    def translate(text):
+        # Khoá của engine ở dạng escape của file PO
+        replace_text = engine.replacements.get(po_escape(text))
+        return po_unescape(replace_text) if replace_text is not None else None
+    return translate
@@ -0,0 +1,91 @@
+import logging
+
+
+class TranslatorBackend:
+    """Giao diện chung cho các dịch vụ dịch: dịch một lô text cùng chiều ngôn ngữ"""
+
+    def translate_batch(self, texts, src, dest):
+        """Trả về danh sách bản dịch cùng thứ tự với texts"""
+        raise NotImplementedError
+
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    """Backend dùng googletrans, gửi cả lô trong một request"""
+
+    def __init__(self, translator=None):
+        if translator is None:
+            from googletrans import Translator
+            translator = Translator()
+        self.translator = translator
+
+    def translate_batch(self, texts, src, dest):
+        results = self.translator.translate(list(texts), src=src, dest=dest)
+        if not isinstance(results, list):
+            results = [results]
+        return [result.text for result in results]
+
+
+class FakeTranslatorBackend(TranslatorBackend):
+    """Backend dịch giả lập chạy local, dùng để kiểm thử và benchmark
+
+    mapping: dict {(src, dest, text): bản dịch}; text không có trong mapping
+    sẽ được dịch thành '[dest] text'. Mỗi lô gọi tới được lưu trong self.calls.
+    """
+
+    def __init__(self, mapping=None, fail_texts=()):
+        self.mapping = mapping or {}
+        self.fail_texts = set(fail_texts)
+        self.calls = []
+
+    def translate_batch(self, texts, src, dest):
+        texts = list(texts)
+        self.calls.append((src, dest, texts))
+        for text in texts:
+            if text in self.fail_texts:
+                raise RuntimeError(f'Không dịch được "{text}"')
+        return [self.mapping.get((src, dest, text), f'[{dest}] {text}') for text in texts]
+
+
+def iter_batches(texts, max_count=50, max_chars=4000):
+    """Chia texts thành các lô giới hạn theo số phần tử và tổng số ký tự"""
+    batch = []
+    batch_chars = 0
+    for text in texts:
+        if batch and (len(batch) >= max_count or batch_chars + len(text) > max_chars):
+            yield batch
+            batch = []
+            batch_chars = 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        yield batch
+
+
+class BatchTranslator:
+    """Gom các text cần dịch thành lô và gửi qua backend"""
+
+    def __init__(self, backend, max_count=50, max_chars=4000):
+        self.backend = backend
+        self.max_count = max_count
+        self.max_chars = max_chars
+
+    def translate_all(self, texts, src, dest, progress=None):
+        """Dịch danh sách text (đã loại trùng), trả về dict {text: bản dịch}
+
+        Lô bị lỗi sẽ được bỏ qua và ghi log, các text trong lô đó không có trong kết quả.
+        progress(n) được gọi sau mỗi lô với số text đã xử lý.
+        """
+        unique_texts = list(dict.fromkeys(text for text in texts if text))
+        translations = {}
+        for batch in iter_batches(unique_texts, self.max_count, self.max_chars):
+            try:
+                results = self.backend.translate_batch(batch, src, dest)
+            except Exception as e:
+                logging.error(f'Lỗi khi dịch lô {len(batch)} phần tử {src}->{dest}: {str(e)}')
+                results = []
+            for text, translation in zip(batch, results):
+                if translation:
+                    translations[text] = translation
+            if progress is not None:
+                progress(len(batch))
+        return translations
@@ -0,0 +1,120 @@
+import contextlib
+import os
+import threading
+from functools import partial
+
+from metrics import METRICS
+
+
+def add_jobs_argument(parser):
+    """Thêm tuỳ chọn --jobs dùng chung cho các script"""
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='Số tiến trình xử lý song song (0 = số CPU, mặc định 1)'
+    )
+    return parser
+
+
+def resolve_jobs(jobs):
+    """Chuẩn hoá số tiến trình: 0 hoặc số âm nghĩa là dùng toàn bộ CPU"""
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _process_pool(jobs):
+    """ProcessPoolExecutor khởi động tiến trình con bằng spawn
+
+    Pool được tạo khi đã có thread khác chạy (QueueListener của logging, các thread module
+    của batch runner) và giữ lock (METRICS, logging); fork lúc đó có thể làm tiến trình con
+    kẹt vì lock đang bị giữ. spawn khởi động tiến trình con sạch, không sao chép các lock đó.
+    """
+    # Import muộn: multiprocessing chỉ cần khi thật sự chạy song song
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'))
+
+
+# Pool tiến trình dùng chung (executor, số tiến trình) khi đang trong khối shared_pool
+_shared = None
+_shared_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def shared_pool(jobs):
+    """Dùng chung một pool tiến trình cho mọi lần gọi imap_tasks bên trong khối lệnh
+
+    Khi chạy nhiều bot trên nhiều module, tiến trình con chỉ được khởi động một lần
+    thay vì một lần cho mỗi bot của mỗi module. Có thể gọi imap_tasks từ nhiều thread.
+    """
+    global _shared
+    jobs = resolve_jobs(jobs)
+    with _shared_lock:
+        if jobs <= 1 or _shared is not None:
+            executor = None
+        else:
+            executor = _process_pool(jobs)
+            _shared = (executor, jobs)
+    if executor is None:
+        yield None
+        return
+    try:
+        yield executor
+    finally:
+        with _shared_lock:
+            _shared = None
+        executor.shutdown()
+
+
+def _call_safely(func, item):
+    """Gọi func trong tiến trình con, trả lỗi về thay vì làm hỏng cả pool"""
+    try:
+        return func(item), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _call_with_metrics(func, item):
+    """Như _call_safely nhưng trả kèm số liệu đo được trong tiến trình con"""
+    METRICS.reset()
+    result, error = _call_safely(func, item)
+    return result, error, METRICS.snapshot()
+
+
+def imap_tasks(func, items, jobs=1):
+    """Chạy func trên từng phần tử, trả về (phần tử, kết quả, lỗi) theo đúng thứ tự đầu vào
+
+    func phải pickle được (hàm cấp module hoặc method của object đơn giản).
+    Việc ghi log/in kết quả do tiến trình cha đảm nhận để output luôn ổn định.
+    Số liệu METRICS của tiến trình con được cộng dồn vào tiến trình cha.
+    Trong khối shared_pool, pool dùng chung được dùng thay cho jobs.
+    """
+    items = list(items)
+    shared = _shared
+    if shared is not None and len(items) > 1:
+        executor, jobs = shared
+        yield from _map_executor(executor, func, items, jobs)
+        return
+
+    jobs = min(resolve_jobs(jobs), len(items))
+    if jobs <= 1:
+        for item in items:
+            result, error = _call_safely(func, item)
+            yield item, result, error
+        return
+
+    with _process_pool(jobs) as executor:
+        yield from _map_executor(executor, func, items, jobs)
+
+
+def _map_executor(executor, func, items, jobs):
+    # Chia nhỏ theo chunk để giảm số lần pickle func và đối số
+    chunksize = max(1, len(items) // (jobs * 4))
+    results = executor.map(partial(_call_with_metrics, func), items, chunksize=chunksize)
+    for item, (result, error, snapshot) in zip(items, results):
+        METRICS.merge(snapshot)
+        yield item, result, error
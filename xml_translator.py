@@ -0,0 +1,267 @@
+import html
+import io
+import os
+import re
+
+from patterns import PATTERNS
+
+# Các thuộc tính chứa text hiển thị trong view/data của Odoo
+TRANSLATABLE_ATTRIBUTES = frozenset({
+    'string', 'help', 'placeholder', 'title', 'confirm', 'sum', 'avg', 'alt',
+    'label', 'aria-label', 'data-tooltip', 'add-label',
+})
+# Text trong các thẻ này không phải text hiển thị
+SKIPPED_ELEMENTS = frozenset({'script', 'style'})
+# Nội dung view/template QWeb: mọi thẻ con nằm trong phần arch
+ARCH_SCOPE = 'arch'
+ARCH_ELEMENTS = frozenset({'template', 'templates'})
+# Thuộc tính của thẻ viết tắt tương ứng với field của record: (thẻ, thuộc tính) -> (model, field)
+SHORTCUT_FIELDS = {('menuitem', 'name'): ('ir.ui.menu', 'name')}
+
+# Token XML: comment, CDATA, PI, DOCTYPE, thẻ (cho phép '>' trong giá trị thuộc tính), text
+_TOKEN_PATTERN = PATTERNS.compile(
+    'xml.token',
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<cdata><!\[CDATA\[.*?\]\]>)'
+    r'|(?P<pi><\?.*?\?>)'
+    r'|(?P<declaration><!(?!--|\[CDATA\[)[^>]*>)'
+    r'|(?P<tag></?[A-Za-z_:][^\s/>]*(?:[^>"\']|"[^"]*"|\'[^\']*\')*>)'
+    r'|(?P<text>[^<]+)',
+    re.DOTALL
+)
+# Thẻ dài hơn ngưỡng này mà chưa gặp '>' được coi là '<' lạc trong text
+MAX_TAG_SIZE = 1 << 20
+_TAG_NAME_PATTERN = PATTERNS.compile('xml.tag_name', r'</?([^\s/>]+)')
+_ATTRIBUTE_PATTERN = PATTERNS.compile(
+    'xml.attribute', r'(\s)([^\s=/>]+)(\s*=\s*)(?:"([^"]*)"|\'([^\']*)\')'
+)
+
+
+class XmlEdit:
+    """Một thay đổi giữ nguyên vị trí: thay text trong [start, end) của file gốc
+
+    old/new là text đã giải mã entity, raw là text mới đã escape để ghi vào file.
+    scope là vị trí của text: ARCH_SCOPE (trong arch của view hoặc template QWeb),
+    'field:<model>:<field>' (giá trị <field name="..."> của <record model="...">, hoặc thuộc
+    tính của thẻ viết tắt như <menuitem name="...">) hoặc '' (ngoài các loại trên).
+    """
+
+    __slots__ = ('start', 'end', 'kind', 'name', 'old', 'new', 'raw', 'scope')
+
+    def __init__(self, start, end, kind, name, old, new, raw=None, scope=''):
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.name = name
+        self.old = old
+        self.new = new
+        self.raw = raw
+        self.scope = scope
+
+    def __repr__(self):
+        return f'XmlEdit({self.start}, {self.end}, {self.kind!r}, {self.name!r}, {self.old!r} -> {self.new!r})'
+
+
+def _is_stray_bracket(buffer, position, eof):
+    """'<' tại position (không khớp token nào) chắc chắn không mở token, kể cả khi đọc thêm"""
+    if eof:
+        return True
+    following = buffer[position + 1:position + 2]
+    if not following or following in '!?':
+        # Chưa biết ký tự sau '<', hoặc comment/CDATA/PI chưa đóng: đợi chunk sau
+        return False
+    if following == '/' or following.isalpha() or following in '_:':
+        # Thẻ chưa đóng: chỉ đợi tới MAX_TAG_SIZE để bộ nhớ không phụ thuộc độ dài file
+        return len(buffer) - position > MAX_TAG_SIZE
+    return True
+
+
+def iter_tokens(reader, chunk_size=1 << 16):
+    """Đọc dần nội dung XML, trả về (loại token, offset, nội dung thô)
+
+    Chỉ giữ trong bộ nhớ một chunk và token đang dở, nên file lớn vẫn dùng bộ nhớ cố định.
+    '<' không mở được token nào (XML lỗi, hoặc "a < b" trong text) được trả như một text
+    riêng rồi đọc tiếp, không giữ phần còn lại của file trong buffer.
+    """
+    buffer = ''
+    offset = 0
+    eof = False
+    while not eof:
+        chunk = reader.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        position = 0
+        while position < len(buffer):
+            match = _TOKEN_PATTERN.match(buffer, position)
+            if match is not None and (eof or match.end() < len(buffer)):
+                yield match.lastgroup, offset + position, match.group()
+                position = match.end()
+            elif match is None and _is_stray_bracket(buffer, position, eof):
+                yield 'text', offset + position, '<'
+                position += 1
+            else:
+                # Token chạm cuối buffer có thể chưa đầy đủ: đợi chunk sau
+                break
+        offset += position
+        buffer = buffer[position:]
+
+
+def escape(text, entities=None):
+    """Escape &, <, > (và các ký tự trong entities) như xml.sax.saxutils.escape
+
+    Không dùng saxutils vì module đó kéo theo urllib/http/ssl, làm chậm lúc khởi động.
+    """
+    text = text.replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;')
+    for char, entity in (entities or {}).items():
+        text = text.replace(char, entity)
+    return text
+
+
+def _tag_name(raw):
+    match = _TAG_NAME_PATTERN.match(raw)
+    return match.group(1) if match else ''
+
+
+def iter_translatable(reader, chunk_size=1 << 16):
+    """Trả về (offset, kind, name, text) cho mọi text node và thuộc tính dịch được
+
+    kind là 'text' (name = thẻ cha) hoặc 'attribute' (name = tên thuộc tính).
+    offset là vị trí bắt đầu phần text (đã bỏ khoảng trắng đầu/cuối) trong file.
+    """
+    for edit in _scan(reader, None, None, chunk_size):
+        yield edit.start, edit.kind, edit.name, edit.old
+
+
+def rewrite_stream(reader, writer, translate, chunk_size=1 << 16):
+    """Dịch text node/thuộc tính và ghi ra writer, trả về danh sách XmlEdit
+
+    translate(text) nhận text đã giải mã entity, trả về text mới hoặc None để giữ nguyên.
+    Comment, CDATA, PI và phần còn lại của file được ghi lại nguyên văn.
+    """
+    return list(_scan(reader, writer, translate, chunk_size))
+
+
+def _attribute_value(raw, attribute):
+    for match in _ATTRIBUTE_PATTERN.finditer(raw):
+        if match.group(2) == attribute:
+            return match.group(4) if match.group(4) is not None else match.group(5)
+    return ''
+
+
+def _child_scope(name, raw, scope):
+    """scope của nội dung bên trong thẻ name (raw là thẻ mở), scope là của thẻ cha"""
+    if scope == ARCH_SCOPE or name in ARCH_ELEMENTS:
+        return ARCH_SCOPE
+    if name == 'record':
+        return f'record:{_attribute_value(raw, "model")}'
+    if name == 'field':
+        field_name = _attribute_value(raw, 'name')
+        if field_name == 'arch':
+            return ARCH_SCOPE
+        model = scope[len('record:'):] if scope.startswith('record:') else ''
+        return f'field:{model}:{field_name}'
+    return scope
+
+
+def _scan(reader, writer, translate, chunk_size):
+    # Mỗi phần tử: (tên thẻ, scope của nội dung bên trong)
+    stack = []
+    for kind, offset, raw in iter_tokens(reader, chunk_size):
+        if kind == 'tag':
+            if raw.startswith('</'):
+                if stack:
+                    stack.pop()
+            else:
+                name = _tag_name(raw)
+                scope = stack[-1][1] if stack else ''
+                child_scope = _child_scope(name, raw, scope)
+                raw, edits = _process_attributes(raw, offset, translate, scope, name)
+                yield from edits
+                if not raw.endswith('/>'):
+                    stack.append((name, child_scope))
+        elif kind == 'text' and stack and stack[-1][0] not in SKIPPED_ELEMENTS:
+            raw, edit = _process_text(raw, offset, stack[-1][0], translate, stack[-1][1])
+            if edit is not None:
+                yield edit
+        if writer is not None:
+            writer.write(raw)
+
+
+def _process_text(raw, offset, parent, translate, scope=''):
+    stripped = raw.strip()
+    if not stripped or not any(char.isalpha() for char in stripped):
+        return raw, None
+    leading = len(raw) - len(raw.lstrip())
+    text = html.unescape(stripped)
+    start = offset + leading
+    end = start + len(stripped)
+    if translate is None:
+        return raw, XmlEdit(start, end, 'text', parent, text, None, scope=scope)
+    new_text = translate(text)
+    if new_text is None or new_text == text:
+        return raw, None
+    escaped = escape(new_text)
+    new_raw = raw[:leading] + escaped + raw[leading + len(stripped):]
+    return new_raw, XmlEdit(start, end, 'text', parent, text, new_text, escaped, scope)
+
+
+def _process_attributes(raw, offset, translate, scope='', tag=None):
+    edits = []
+
+    def _substitute(match):
+        name = match.group(2)
+        shortcut = SHORTCUT_FIELDS.get((tag, name))
+        if name not in TRANSLATABLE_ATTRIBUTES and shortcut is None:
+            return match.group(0)
+        edit_scope = 'field:{}:{}'.format(*shortcut) if shortcut else scope
+        double_quoted = match.group(4) is not None
+        value = match.group(4) if double_quoted else match.group(5)
+        text = html.unescape(value)
+        if not text.strip():
+            return match.group(0)
+        start = offset + match.start(4 if double_quoted else 5)
+        end = start + len(value)
+        if translate is None:
+            edits.append(XmlEdit(start, end, 'attribute', name, text, None, scope=edit_scope))
+            return match.group(0)
+        new_text = translate(text)
+        if new_text is None or new_text == text:
+            return match.group(0)
+        quote = '"' if double_quoted else "'"
+        entities = {'"': '&quot;'} if double_quoted else {"'": '&apos;'}
+        escaped = escape(new_text, entities)
+        edits.append(XmlEdit(start, end, 'attribute', name, text, new_text, escaped, edit_scope))
+        return f'{match.group(1)}{name}{match.group(3)}{quote}{escaped}{quote}'
+
+    new_raw = _ATTRIBUTE_PATTERN.sub(_substitute, raw)
+    return new_raw, edits
+
+
+def rewrite_content(content, translate):
+    """Bản trong bộ nhớ của rewrite_stream, trả về (nội dung mới, danh sách XmlEdit)"""
+    writer = io.StringIO()
+    edits = rewrite_stream(io.StringIO(content), writer, translate)
+    return (writer.getvalue() if edits else content), edits
+
+
+def plan_file(file_path, translate, chunk_size=1 << 16):
+    """Tìm các thay đổi cho file XML mà không ghi file; trả về danh sách XmlEdit"""
+    with open(file_path, 'r', encoding='utf-8', newline='') as reader:
+        return list(_scan(reader, None, translate, chunk_size))
+
+
+def rewrite_file(file_path, translate, chunk_size=1 << 16):
+    """Dịch file XML theo kiểu streaming, ghi file tạm rồi đổi tên; trả về danh sách XmlEdit"""
+    from change_plan import replace_file, temp_path_for
+
+    tmp_path = temp_path_for(file_path)
+    try:
+        with open(file_path, 'r', encoding='utf-8', newline='') as reader, \
+                open(tmp_path, 'w', encoding='utf-8', newline='') as writer:
+            edits = rewrite_stream(reader, writer, translate, chunk_size)
+        if edits:
+            replace_file(tmp_path, file_path)
+        return edits
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)